@@ -3,15 +3,40 @@ REST API untuk Aplikasi Kasir Digital - Version 2.0
 Menggunakan Flask Framework dengan JWT Authentication
 """
 
-from flask import Flask, request, jsonify
+import csv
+import hashlib
+import io
+import json
+import pstats
+import zlib
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flasgger import Swagger
 from datetime import datetime
-from config import DAFTAR_PRODUK, DATE_FORMAT
-from database import db
+from config import DATE_FORMAT
+from database import db, parse_waktu
 from auth import AuthManager, token_required
+from katalog import snapshot
+from metrics import MetricsMiddleware, ROUTE_LAIN, registry, waktu_komponen
+from profiler import ProfilerMiddleware, profiler
+from tabel import KOLOM
+
+
+class JSONProviderTerukur(DefaultJSONProvider):
+    """JSON provider yang mencatat waktu serialisasi jsonify sebagai komponen request"""
+    
+    @waktu_komponen('serialization')
+    def dumps(self, obj, **kwargs):
+        return super().dumps(obj, **kwargs)
+
 
 # Inisialisasi Flask app
 app = Flask(__name__)
+# Waktu serialisasi jsonify dan durasi setiap request dicatat untuk /metrics
+app.json = JSONProviderTerukur(app)
+# Request terpilih (sampling atau header X-Kasir-Profile) diprofil dengan cProfile
+app.wsgi_app = ProfilerMiddleware(app.wsgi_app, profiler, AuthManager.verify_token)
+app.wsgi_app = MetricsMiddleware(app.wsgi_app, registry)
 
 # Inisialisasi Swagger untuk dokumentasi API
 swagger = Swagger(app, template={
@@ -25,6 +50,148 @@ swagger = Swagger(app, template={
     "schemes": ["http", "https"]
 })
 
+# Batas jumlah item per halaman untuk /api/riwayat
+RIWAYAT_MAX_LIMIT = 1000
+# Jumlah transaksi per chunk pada mode streaming
+STREAM_CHUNK_SIZE = 500
+
+
+def _int_arg(name, default=None, minimum=0, maximum=None):
+    """Ambil query parameter integer, raise ValueError jika tidak valid"""
+    value = request.args.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"Parameter '{name}' harus berupa angka")
+    if value < minimum or (maximum is not None and value > maximum):
+        batas = f"{minimum}-{maximum}" if maximum is not None else f">= {minimum}"
+        raise ValueError(f"Parameter '{name}' harus di antara {batas}")
+    return value
+
+
+def _waktu_arg(name, akhir=False):
+    """
+    Ambil query parameter waktu from/to (format parse_waktu), return string DATE_FORMAT
+    Batas akhir yang kurang presisi berarti akhir hari/jam/menit; raise ValueError jika tidak valid
+    """
+    value = request.args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        return parse_waktu(value, akhir)
+    except ValueError:
+        raise ValueError(
+            f"Parameter '{name}' harus berformat YYYY-MM-DD, YYYY-MM-DD HH, "
+            "YYYY-MM-DD HH:MM atau YYYY-MM-DD HH:MM:SS"
+        ) from None
+
+
+def _stream_riwayat(records):
+    """Tulis response JSON riwayat per chunk dari generator transaksi"""
+    yield '{"status": "success", "data": ['
+    total = 0
+    chunk = []
+    for _, transaksi in records:
+        chunk.append(json.dumps(transaksi))
+        total += 1
+        if len(chunk) >= STREAM_CHUNK_SIZE:
+            yield (',' if total > len(chunk) else '') + ','.join(chunk)
+            chunk = []
+    if chunk:
+        yield (',' if total > len(chunk) else '') + ','.join(chunk)
+    yield f'], "total": {total}}}'
+
+
+# Query parameter filter untuk /api/produk
+PRODUK_FILTER = ('kategori', 'min_harga', 'max_harga', 'q', 'nama', 'kode')
+
+# Jumlah item maksimal dalam satu request /api/transaksi/batch
+BATCH_MAX_ITEMS = 500
+
+
+# Awalan sel yang dibaca sebagai formula oleh Excel/Google Sheets
+CSV_AWALAN_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _sel_csv(nilai):
+    """Nilai teks yang diawali karakter formula diberi awalan ' agar tetap dibaca sebagai teks"""
+    if isinstance(nilai, str) and nilai.startswith(CSV_AWALAN_FORMULA):
+        return "'" + nilai
+    return nilai
+
+
+def _export_riwayat(rows, format_export):
+    """Generator chunk teks export riwayat (CSV dengan header, atau satu JSON per baris)"""
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator='\n')
+    if format_export == 'csv':
+        writer.writerow(('seq',) + KOLOM)
+    for jumlah, baris in enumerate(rows, 1):
+        transaksi = baris.to_dict()
+        if format_export == 'csv':
+            writer.writerow([baris.seq] + [_sel_csv(transaksi.get(kolom, '')) for kolom in KOLOM])
+        else:
+            buf.write(json.dumps({"seq": baris.seq, **transaksi}) + '\n')
+        if jumlah % STREAM_CHUNK_SIZE == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def _gzip_stream(chunks):
+    """Kompres generator teks menjadi stream gzip tanpa menampung seluruh isi"""
+    kompresor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = kompresor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield kompresor.flush()
+
+
+# Format yang didukung /api/riwayat/export beserta mimetype-nya
+EXPORT_FORMAT = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _validasi_transaksi(data, tanggal, operator, daftar_produk):
+    """
+    Validasi satu input transaksi {nama, kode_produk} terhadap katalog
+    Return (transaksi, None) jika valid, atau (None, (message, status_code))
+    """
+    if not isinstance(data, dict) or 'nama' not in data or 'kode_produk' not in data:
+        return None, ("Nama dan kode_produk harus disediakan", 400)
+    
+    nama = str(data.get('nama') or '').strip()
+    kode_produk = str(data.get('kode_produk') or '').upper().strip()
+    
+    if not nama:
+        return None, ("Nama pembeli tidak boleh kosong", 400)
+    
+    produk = daftar_produk.get(kode_produk)
+    if produk is None:
+        return None, (f"Kode produk '{kode_produk}' tidak ditemukan", 404)
+    
+    return {
+        "tanggal": tanggal,
+        "nama": nama,
+        "produk": produk['nama'],
+        "kategori": produk['kategori'],
+        "harga": produk['harga'],
+        "operator": operator
+    }, None
+
+
+@app.before_request
+def _label_route():
+    """Label route untuk metrik: pola URL (/api/riwayat), bukan path aslinya"""
+    request.environ['kasir.route'] = request.url_rule.rule if request.url_rule else ROUTE_LAIN
+
+
 # ============ ROUTES ============
 
 @app.route('/', methods=['GET'])
@@ -39,6 +206,17 @@ def home():
     }), 200
 
 
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Metrik request per route dalam format teks Prometheus
+    
+    Jumlah request per status, histogram latency, dan waktu di storage/auth/serialisasi;
+    di bawah gunicorn dijumlahkan dari semua worker
+    """
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+
 # ============ AUTHENTICATION ROUTES ============
 
 @app.route('/auth/register', methods=['POST'])
@@ -167,21 +345,64 @@ def login():
 @app.route('/api/produk', methods=['GET'])
 @token_required
 def get_produk():
-    """Endpoint untuk mendapatkan daftar produk"""
-    produk_list = []
-    for kode, info in DAFTAR_PRODUK.items():
-        produk_list.append({
-            "kode": kode,
-            "nama": info['nama'],
-            "harga": info['harga'],
-            "kategori": info['kategori']
-        })
+    """
+    Endpoint untuk mendapatkan daftar produk
     
-    return jsonify({
-        "status": "success",
-        "data": produk_list,
-        "total": len(produk_list)
-    }), 200
+    Body sudah diserialisasi per versi katalog; mendukung If-None-Match (304)
+    dan varian gzip jika client mengirim Accept-Encoding: gzip
+    
+    Filter opsional (dilayani dari index katalog): kategori, min_harga,
+    max_harga, q (awalan kata pada nama), nama (substring), kode (awalan kode)
+    """
+    katalog = snapshot()
+    
+    if any(request.args.get(p) for p in PRODUK_FILTER):
+        return _cari_produk(katalog)
+    
+    pakai_gzip = katalog.body_gzip is not None and request.accept_encodings['gzip'] > 0
+    etag = katalog.etag_gzip if pakai_gzip else katalog.etag
+    
+    if request.if_none_match.contains_weak(katalog.etag) or request.if_none_match.contains_weak(katalog.etag_gzip):
+        response = Response(status=304)
+    else:
+        response = Response(katalog.body_gzip if pakai_gzip else katalog.body, mimetype='application/json')
+        if pakai_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def _cari_produk(katalog):
+    """Response /api/produk dengan filter; ETag = versi katalog + query"""
+    try:
+        min_harga = _int_arg('min_harga')
+        max_harga = _int_arg('max_harga')
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    
+    filter_args = {p: request.args.get(p) for p in ('kategori', 'q', 'nama', 'kode')}
+    etag = katalog.versi + '-' + hashlib.sha256(
+        json.dumps([filter_args, min_harga, max_harga]).encode('utf-8')
+    ).hexdigest()[:16]
+    
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        produk_list = katalog.cari(min_harga=min_harga, max_harga=max_harga, **filter_args)
+        response = jsonify({
+            "status": "success",
+            "data": produk_list,
+            "total": len(produk_list)
+        })
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
 
 @app.route('/api/transaksi', methods=['POST'])
@@ -190,47 +411,78 @@ def buat_transaksi():
     """Endpoint untuk membuat transaksi baru"""
     try:
         data = request.get_json()
+        tanggal = datetime.now().strftime(DATE_FORMAT)
         
-        if not data or 'nama' not in data or 'kode_produk' not in data:
+        transaksi, error = _validasi_transaksi(data, tanggal, request.username, snapshot().produk)
+        if error:
+            message, status_code = error
             return jsonify({
                 "status": "error",
-                "message": "Nama dan kode_produk harus disediakan"
-            }), 400
+                "message": message
+            }), status_code
         
-        nama = data.get('nama', '').strip()
-        kode_produk = data.get('kode_produk', '').upper().strip()
+        db.tambah_transaksi(transaksi)
         
-        if not nama:
+        return jsonify({
+            "status": "success",
+            "message": "Transaksi berhasil dibuat",
+            "data": transaksi
+        }), 201
+    
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Terjadi kesalahan: {str(e)}"
+        }), 500
+
+
+@app.route('/api/transaksi/batch', methods=['POST'])
+@token_required
+def buat_transaksi_batch():
+    """
+    Endpoint untuk membuat banyak transaksi sekaligus
+    
+    Body: {"items": [{"nama": ..., "kode_produk": ...}, ...]} (atau langsung list item)
+    Semua item valid disimpan dengan satu kali penulisan; hasil dikembalikan per item
+    """
+    try:
+        data = request.get_json()
+        items = data.get('items') if isinstance(data, dict) else data
+        
+        if not isinstance(items, list) or not items:
             return jsonify({
                 "status": "error",
-                "message": "Nama pembeli tidak boleh kosong"
+                "message": "items harus berupa list transaksi yang tidak kosong"
             }), 400
         
-        if kode_produk not in DAFTAR_PRODUK:
+        if len(items) > BATCH_MAX_ITEMS:
             return jsonify({
                 "status": "error",
-                "message": f"Kode produk '{kode_produk}' tidak ditemukan"
-            }), 404
+                "message": f"Maksimal {BATCH_MAX_ITEMS} item per batch"
+            }), 400
         
-        produk = DAFTAR_PRODUK[kode_produk]
         tanggal = datetime.now().strftime(DATE_FORMAT)
+        # Satu snapshot untuk seluruh batch agar semua item memakai versi harga yang sama
+        daftar_produk = snapshot().produk
+        hasil = []
+        valid = []
+        for index, item in enumerate(items):
+            transaksi, error = _validasi_transaksi(item, tanggal, request.username, daftar_produk)
+            if error:
+                hasil.append({"index": index, "status": "error", "message": error[0]})
+            else:
+                hasil.append({"index": index, "status": "success", "data": transaksi})
+                valid.append(transaksi)
         
-        transaksi = {
-            "tanggal": tanggal,
-            "nama": nama,
-            "produk": produk['nama'],
-            "kategori": produk['kategori'],
-            "harga": produk['harga'],
-            "operator": request.username
-        }
-        
-        db.tambah_transaksi(transaksi)
+        db.tambah_banyak_transaksi(valid)
         
         return jsonify({
-            "status": "success",
-            "message": "Transaksi berhasil dibuat",
-            "data": transaksi
-        }), 201
+            "status": "success" if valid else "error",
+            "message": f"{len(valid)} dari {len(items)} transaksi berhasil dibuat",
+            "berhasil": len(valid),
+            "gagal": len(items) - len(valid),
+            "data": hasil
+        }), 201 if valid else 400
     
     except Exception as e:
         return jsonify({
@@ -242,11 +494,46 @@ def buat_transaksi():
 @app.route('/api/riwayat', methods=['GET'])
 @token_required
 def get_riwayat():
-    """Endpoint untuk mendapatkan riwayat transaksi"""
+    """
+    Endpoint untuk mendapatkan riwayat transaksi
+    
+    Query parameter opsional:
+    - nama: filter nama pembeli
+    - from + to: rentang waktu (YYYY-MM-DD sampai YYYY-MM-DD HH:MM:SS, inklusif; sama dengan /api/laporan)
+    - limit + cursor (atau after_seq): pagination berbasis seq
+    - stream=1: kirim seluruh riwayat per chunk tanpa memuat semuanya ke memori
+    """
     try:
         nama = request.args.get('nama')
+        try:
+            limit = _int_arg('limit', minimum=1, maximum=RIWAYAT_MAX_LIMIT)
+            cursor = _int_arg('cursor', default=_int_arg('after_seq', default=0))
+            dari = _waktu_arg('from')
+            sampai = _waktu_arg('to', akhir=True)
+        except ValueError as e:
+            return jsonify({
+                "status": "error",
+                "message": str(e)
+            }), 400
+        
+        if request.args.get('stream') in ('1', 'true'):
+            records = db.iter_transaksi(after_seq=cursor, nama=nama, dari=dari, sampai=sampai)
+            return Response(stream_with_context(_stream_riwayat(records)), mimetype='application/json')
+        
+        if limit is not None or cursor:
+            transaksi_list, next_cursor = db.get_transaksi_page(
+                limit or RIWAYAT_MAX_LIMIT, after_seq=cursor, nama=nama, dari=dari, sampai=sampai
+            )
+            return jsonify({
+                "status": "success",
+                "data": transaksi_list,
+                "total": len(transaksi_list),
+                "next_cursor": next_cursor
+            }), 200
         
-        if nama:
+        if dari or sampai:
+            transaksi_list = db.get_transaksi_by_tanggal(dari, sampai, nama=nama)
+        elif nama:
             transaksi_list = db.get_transaksi_by_nama(nama)
         else:
             transaksi_list = db.get_semua_transaksi()
@@ -264,13 +551,93 @@ def get_riwayat():
         }), 500
 
 
+@app.route('/api/riwayat/export', methods=['GET'])
+@token_required
+def export_riwayat():
+    """
+    Endpoint export riwayat transaksi untuk diolah di spreadsheet
+    
+    Query parameter:
+    - format: csv (default) atau ndjson
+    - nama, from, to: filter yang sama dengan /api/riwayat
+    - gzip=1: kirim sebagai file .gz
+    
+    Baris dikirim per chunk dari generator, jadi riwayat sebesar apa pun
+    tidak pernah dibuat utuh di memori
+    """
+    format_export = request.args.get('format', 'csv')
+    if format_export not in EXPORT_FORMAT:
+        return jsonify({
+            "status": "error",
+            "message": f"Format '{format_export}' tidak didukung. Pilihan: {', '.join(EXPORT_FORMAT)}"
+        }), 400
+    try:
+        dari = _waktu_arg('from')
+        sampai = _waktu_arg('to', akhir=True)
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    
+    rows = db.iter_baris(nama=request.args.get('nama'), dari=dari, sampai=sampai)
+    body = _export_riwayat(rows, format_export)
+    mimetype = EXPORT_FORMAT[format_export]
+    filename = f"riwayat.{format_export}"
+    if request.args.get('gzip') in ('1', 'true'):
+        body = _gzip_stream(body)
+        mimetype = 'application/gzip'
+        filename += '.gz'
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _laporan_periode():
+    """Laporan untuk rentang waktu ?from=&to= dikelompokkan ?group_by= (dari rollup)"""
+    group_by = [g.strip() for g in request.args.get('group_by', '').split(',') if g.strip()]
+    try:
+        # Aturan from/to sama dengan /api/riwayat
+        dari = _waktu_arg('from')
+        sampai = _waktu_arg('to', akhir=True)
+        laporan = db.get_laporan_periode(dari, sampai, group_by)
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "status": "error",
+            "message": f"Terjadi kesalahan: {str(e)}"
+        }), 500
+    
+    total_transaksi = laporan['total_transaksi']
+    rata_rata = laporan['total_penjualan'] / total_transaksi if total_transaksi > 0 else 0
+    return jsonify({
+        "status": "success",
+        "data": {
+            "from": dari,
+            "to": sampai,
+            "group_by": group_by,
+            "total_transaksi": total_transaksi,
+            "total_penjualan": laporan['total_penjualan'],
+            "rata_rata_per_transaksi": int(rata_rata),
+            "groups": laporan['groups']
+        }
+    }), 200
+
+
 @app.route('/api/laporan', methods=['GET'])
 @token_required
 def get_laporan():
     """Endpoint untuk mendapatkan laporan penjualan"""
+    if any(request.args.get(p) for p in ('from', 'to', 'group_by')):
+        return _laporan_periode()
     try:
-        total_transaksi = db.hitung_total_transaksi()
-        total_penjualan = db.hitung_total_penjualan()
+        ringkasan = db.get_ringkasan()
+        total_transaksi = ringkasan['total_transaksi']
+        total_penjualan = ringkasan['total_penjualan']
         rata_rata = total_penjualan / total_transaksi if total_transaksi > 0 else 0
         
         return jsonify({
@@ -278,7 +645,9 @@ def get_laporan():
             "data": {
                 "total_transaksi": total_transaksi,
                 "total_penjualan": total_penjualan,
-                "rata_rata_per_transaksi": int(rata_rata)
+                "rata_rata_per_transaksi": int(rata_rata),
+                "per_kategori": ringkasan['per_kategori'],
+                "per_operator": ringkasan['per_operator']
             }
         }), 200
     
@@ -289,6 +658,67 @@ def get_laporan():
         }), 500
 
 
+# ============ PROFILING ROUTES ============
+
+# Urutan yang boleh dipakai untuk ringkasan teks profil
+PROFIL_SORT = ('cumulative', 'tottime', 'calls')
+
+
+@app.route('/api/profil', methods=['GET'])
+@token_required
+def get_daftar_profil():
+    """
+    Daftar file profil request (terbaru lebih dulu)
+    
+    Profil dibuat untuk request yang terpilih sampling (KASIR_PROFILE_RATE) atau
+    yang mengirim header X-Kasir-Profile: 1 bersama token valid
+    """
+    daftar = profiler.daftar()
+    return jsonify({
+        "status": "success",
+        "data": daftar,
+        "total": len(daftar)
+    }), 200
+
+
+@app.route('/api/profil/<nama>', methods=['GET'])
+@token_required
+def get_profil(nama):
+    """
+    Unduh satu file profil (format pstats, buka dengan snakeviz atau pstats)
+    
+    Dengan format=teks: ringkasan fungsi teratas, diurutkan menurut sort
+    (cumulative, tottime, calls) sebanyak limit baris
+    """
+    path = profiler.path_file(nama)
+    if path is None:
+        return jsonify({
+            "status": "error",
+            "message": f"Profil '{nama}' tidak ditemukan"
+        }), 404
+    
+    if request.args.get('format') != 'teks':
+        return send_file(path, mimetype='application/octet-stream', as_attachment=True, download_name=nama)
+    
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in PROFIL_SORT:
+        return jsonify({
+            "status": "error",
+            "message": f"sort harus salah satu dari: {', '.join(PROFIL_SORT)}"
+        }), 400
+    try:
+        limit = _int_arg('limit', default=40, minimum=1, maximum=1000)
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    
+    teks = io.StringIO()
+    pstats.Stats(path, stream=teks).strip_dirs().sort_stats(sort).print_stats(limit)
+    return Response(teks.getvalue(), mimetype='text/plain')
+
+
 # ============ ERROR HANDLING ============
 
 @app.errorhandler(404)
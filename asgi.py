@@ -0,0 +1,200 @@
+"""
+ASGI entry point untuk terminal kasir yang banyak dan lama terhubung
+
+Koneksi dilayani event loop server ASGI (uvicorn). Body request dibaca di
+event loop, lalu setiap request dijalankan oleh app Flask yang sama di
+thread pool terbatas, jadi route, token_required dan bentuk response
+identik dengan mode WSGI. Koneksi yang sedang idle tidak memakan thread
+maupun worker; thread hanya dipakai selama request diproses.
+
+Usage:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 4
+    gunicorn asgi:app -k uvicorn.workers.UvicornWorker -w 4
+"""
+
+import asyncio
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from app import app as flask_app
+
+# Jumlah request yang diproses bersamaan per worker (koneksi idle tidak dihitung)
+ASGI_THREADS = int(os.environ.get("KASIR_ASGI_THREADS", "32"))
+# Batas ukuran body request (byte)
+ASGI_MAX_BODY = int(os.environ.get("KASIR_ASGI_MAX_BODY", str(10 * 1024 * 1024)))
+
+
+class WSGIKeASGI:
+    """Adapter ASGI -> WSGI dengan thread pool terbatas per proses worker"""
+
+    def __init__(self, wsgi_app, threads=ASGI_THREADS, max_body=ASGI_MAX_BODY):
+        self.wsgi_app = wsgi_app
+        self.threads = threads
+        self.max_body = max_body
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        # Dibuat saat request pertama, di dalam proses worker (setelah fork)
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.threads, thread_name_prefix="kasir-asgi")
+        return self._executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            # Websocket tidak didukung
+            await send({'type': 'websocket.close', 'code': 1000})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._executor is not None:
+                    self._executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _baca_body(self, receive):
+        """Body request lengkap; None jika client putus, False jika melebihi max_body"""
+        bagian = []
+        ukuran = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunk = message.get('body', b'')
+            ukuran += len(chunk)
+            if ukuran > self.max_body:
+                return False
+            bagian.append(chunk)
+            if not message.get('more_body'):
+                return b''.join(bagian)
+
+    async def _http(self, scope, receive, send):
+        body = await self._baca_body(receive)
+        if body is None:
+            return
+        if body is False:
+            await send({'type': 'http.response.start', 'status': 413,
+                        'headers': [(b'content-type', b'text/plain'), (b'connection', b'close')]})
+            await send({'type': 'http.response.body', 'body': b'Request body terlalu besar'})
+            return
+
+        loop = asyncio.get_running_loop()
+        putus = threading.Event()
+        pengawas = []
+
+        async def tunggu_putus():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            putus.set()
+
+        async def kirim_semua(messages):
+            # Response streaming: mulai awasi client putus agar generator bisa berhenti lebih awal
+            if not pengawas:
+                pengawas.append(loop.create_task(tunggu_putus()))
+            for message in messages:
+                await send(message)
+
+        def kirim(messages):
+            asyncio.run_coroutine_threadsafe(kirim_semua(messages), loop).result()
+
+        try:
+            sisa = await loop.run_in_executor(
+                self.executor, _jalankan_wsgi, self.wsgi_app, _environ(scope, body), kirim, putus
+            )
+            for message in sisa:
+                await send(message)
+        finally:
+            for task in pengawas:
+                task.cancel()
+
+
+def _jalankan_wsgi(wsgi_app, environ, kirim, putus):
+    """
+    Jalankan satu request WSGI sampai body ditutup, di satu thread yang sama
+    (thread-local metrik dan cProfile bergantung pada ini)
+    Chunk body ditahan satu langkah: response biasa dikembalikan utuh sebagai
+    daftar message untuk dikirim event loop, hanya response streaming yang
+    dikirim bertahap lewat `kirim`
+    """
+    mulai = []
+
+    def start_response(status, headers, exc_info=None):
+        if exc_info and mulai and mulai[0] is None:
+            raise exc_info[1].with_traceback(exc_info[2])
+        mulai[:] = [{
+            'type': 'http.response.start',
+            'status': int(status.split(' ', 1)[0]),
+            'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers]
+        }]
+        return lambda data: None  # callable write() lama tidak dipakai Flask
+
+    hasil = wsgi_app(environ, start_response)
+    try:
+        tertahan = None
+        for chunk in hasil:
+            if not chunk:
+                continue
+            if putus.is_set():
+                return []
+            if tertahan is not None:
+                pesan = [mulai[0]] if mulai[0] is not None else []
+                mulai[0] = None  # penanda response.start sudah dikirim
+                pesan.append({'type': 'http.response.body', 'body': tertahan, 'more_body': True})
+                kirim(pesan)
+            tertahan = chunk
+        pesan = [mulai[0]] if mulai[0] is not None else []
+        pesan.append({'type': 'http.response.body', 'body': tertahan or b'', 'more_body': False})
+        return pesan
+    finally:
+        close = getattr(hasil, 'close', None)
+        if close is not None:
+            close()
+
+
+def _environ(scope, body):
+    """environ WSGI (PEP 3333) dari scope HTTP ASGI"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]) if server[1] is not None else '80',
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for nama, nilai in scope.get('headers', []):
+        nama = nama.decode('latin-1').upper().replace('-', '_')
+        nilai = nilai.decode('latin-1')
+        if nama == 'CONTENT_LENGTH':
+            continue  # sudah diisi dari body yang benar-benar diterima
+        key = nama if nama == 'CONTENT_TYPE' else f'HTTP_{nama}'
+        environ[key] = f"{environ[key]},{nilai}" if key in environ else nilai
+    return environ
+
+
+app = WSGIKeASGI(flask_app)
@@ -6,9 +6,15 @@ Menggunakan JWT (JSON Web Token) untuk secure access
 import jwt
 import json
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify
+from metrics import waktu_komponen
+from storage import kunci_file
+from password import PoolPenuh, hash_password, perlu_rehash, verify_password
 
 # Secret key untuk encode/decode JWT (GANTI INI DI PRODUCTION!)
 SECRET_KEY = "your-secret-key-kasir-digital-2025"
@@ -16,31 +22,151 @@ SECRET_KEY = "your-secret-key-kasir-digital-2025"
 # File untuk menyimpan user
 USERS_FILE = "users.json"
 
+# Jumlah maksimal token terverifikasi yang disimpan di cache (0 = nonaktif)
+TOKEN_CACHE_SIZE = int(os.environ.get("KASIR_TOKEN_CACHE_SIZE", "10000"))
+
+
+class TokenCache:
+    """
+    LRU cache token yang sudah diverifikasi -> payload
+    Setiap entry kadaluarsa tepat pada `exp` token, sama seperti jwt.decode
+    """
+    
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, token):
+        """Ambil payload dari cache, None jika tidak ada atau sudah expired"""
+        with self._lock:
+            entry = self._data.get(token)
+            if entry is not None:
+                payload, exp = entry
+                if time.time() < exp:
+                    self._data.move_to_end(token)
+                    self.hits += 1
+                    return payload
+                del self._data[token]
+            self.misses += 1
+            return None
+    
+    def put(self, token, payload):
+        """Simpan payload token yang valid (token tanpa exp tidak di-cache)"""
+        exp = payload.get('exp')
+        if self.maxsize <= 0 or not isinstance(exp, (int, float)):
+            return
+        with self._lock:
+            self._data[token] = (payload, exp)
+            self._data.move_to_end(token)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+    
+    def clear(self):
+        """Kosongkan cache dan reset counter"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self):
+        """Statistik cache (ukuran, hit, miss)"""
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+token_cache = TokenCache()
+
+
+class UserStore:
+    """
+    Index user in-memory yang dimuat sekali dari users.json
+    Perubahan dari luar (proses lain atau edit manual) terdeteksi lewat
+    stat file; user baru ditulis langsung ke file (write-through, atomic)
+    """
+    
+    def __init__(self, filename=USERS_FILE):
+        self.filename = filename
+        self._users = {}
+        self._signature = None
+        self._lock = threading.Lock()
+    
+    def _stat(self):
+        try:
+            st = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+    
+    def _refresh(self):
+        """Muat ulang file hanya jika berubah sejak terakhir dibaca"""
+        signature = self._stat()
+        if signature == self._signature:
+            return
+        users = {}
+        if signature is not None:
+            with open(self.filename, 'r') as f:
+                users = json.load(f)
+        self._users = users
+        self._signature = signature
+    
+    def _save(self):
+        """Tulis semua user ke file sementara lalu rename (atomic)"""
+        tmp = f"{self.filename}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self._users, f, indent=2)
+        os.replace(tmp, self.filename)
+        self._signature = self._stat()
+    
+    def get(self, username):
+        """Ambil data user (dict) atau None"""
+        with self._lock:
+            self._refresh()
+            return self._users.get(username)
+    
+    def add(self, username, data):
+        """Tambahkan user baru, return False jika username sudah ada"""
+        with self._lock, kunci_file(self.filename):
+            self._refresh()
+            if username in self._users:
+                return False
+            self._users[username] = data
+            self._save()
+            return True
+    
+    def update(self, username, data):
+        """Perbarui data user yang sudah ada"""
+        with self._lock, kunci_file(self.filename):
+            self._refresh()
+            if username not in self._users:
+                return False
+            self._users[username] = data
+            self._save()
+            return True
+
+
+user_store = UserStore()
+
 
 class AuthManager:
     """Mengelola authentication dan authorization"""
     
     @staticmethod
-    def _load_users():
-        """Baca file users.json"""
-        if os.path.exists(USERS_FILE):
-            with open(USERS_FILE, 'r') as f:
-                return json.load(f)
-        return {}
-    
-    @staticmethod
-    def _save_users(users):
-        """Simpan users ke file"""
-        with open(USERS_FILE, 'w') as f:
-            json.dump(users, f, indent=2)
+    def _server_sibuk():
+        """Response saat antrean hashing password penuh"""
+        return {
+            "status": "error",
+            "message": "Server sedang sibuk, silakan coba lagi"
+        }, 503
     
     @staticmethod
+    @waktu_komponen('auth')
     def register(username, password):
         """Register user baru"""
-        users = AuthManager._load_users()
-        
         # Validasi
-        if username in users:
+        if user_store.get(username) is not None:
             return {
                 "status": "error",
                 "message": "Username sudah terdaftar"
@@ -52,13 +178,21 @@ class AuthManager:
                 "message": "Password minimal 6 karakter"
             }, 400
         
-        # Simpan user (hash password untuk production!)
-        users[username] = {
-            "password": password,  # HANYA UNTUK DEMO! Use bcrypt di production
+        try:
+            password_hash = hash_password(password)
+        except PoolPenuh:
+            return AuthManager._server_sibuk()
+        
+        user = {
+            "password": password_hash,
             "created_at": datetime.now().isoformat()
         }
         
-        AuthManager._save_users(users)
+        if not user_store.add(username, user):
+            return {
+                "status": "error",
+                "message": "Username sudah terdaftar"
+            }, 400
         
         return {
             "status": "success",
@@ -66,23 +200,36 @@ class AuthManager:
         }, 201
     
     @staticmethod
+    @waktu_komponen('auth')
     def login(username, password):
         """Login dan return JWT token"""
-        users = AuthManager._load_users()
+        user = user_store.get(username)
         
         # Validasi credentials
-        if username not in users:
+        if user is None:
             return {
                 "status": "error",
                 "message": "Username tidak ditemukan"
             }, 401
         
-        if users[username]["password"] != password:
+        try:
+            cocok = verify_password(password, user["password"])
+        except PoolPenuh:
+            return AuthManager._server_sibuk()
+        
+        if not cocok:
             return {
                 "status": "error",
                 "message": "Password salah"
             }, 401
         
+        # Password plain text lama (atau cost lama) di-hash ulang setelah login berhasil
+        if perlu_rehash(user["password"]):
+            try:
+                user_store.update(username, dict(user, password=hash_password(password)))
+            except PoolPenuh:
+                pass
+        
         # Generate JWT token (valid 24 jam)
         payload = {
             "username": username,
@@ -99,10 +246,15 @@ class AuthManager:
         }, 200
     
     @staticmethod
+    @waktu_komponen('auth')
     def verify_token(token):
-        """Verifikasi JWT token"""
+        """Verifikasi JWT token (token yang sudah pernah valid diambil dari cache)"""
+        payload = token_cache.get(token)
+        if payload is not None:
+            return payload, True
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+            token_cache.put(token, payload)
             return payload, True
         except jwt.ExpiredSignatureError:
             return None, False
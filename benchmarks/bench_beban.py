@@ -0,0 +1,373 @@
+"""
+Uji beban lokal: jalankan `gunicorn wsgi:app` (atau `uvicorn asgi:app` untuk
+worker class "uvicorn") lalu kirim campuran request realistis (login, produk,
+transaksi, riwayat, laporan) dari banyak klien.
+
+Usage:
+    python benchmarks/bench_beban.py [--worker-class sync gthread uvicorn] [--workers 1 4]
+                                     [--concurrency 8 32] [--durasi 10] [--idle 200]
+                                     [--mix login=2,produk=30,transaksi=25,riwayat=28,laporan=15]
+                                     [--out hasil.json]
+    python benchmarks/bench_beban.py --url http://127.0.0.1:5000 --concurrency 16
+
+Setiap kombinasi worker class x jumlah worker menjalankan server baru di
+folder sementara (data asli tidak tersentuh) yang sudah diisi --seed
+transaksi. Untuk setiap tingkat concurrency dilaporkan throughput,
+latency p50/p95/p99 dan error rate per route. Dengan --url, server yang
+sudah berjalan dipakai apa adanya (worker class/jumlah diabaikan).
+
+Klien memakai koneksi HTTP keep-alive per thread; --proses membagi klien ke
+beberapa proses agar generator beban tidak dibatasi GIL. --idle membuka
+koneksi yang tidak mengirim request selama pengukuran, seperti terminal
+kasir yang tetap terhubung.
+"""
+
+import argparse
+import http.client
+import importlib.util
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench_memori_transaksi import buat_transaksi  # noqa: E402
+
+ROUTES = ('login', 'produk', 'transaksi', 'riwayat', 'laporan')
+DEFAULT_MIX = "login=2,produk=30,transaksi=25,riwayat=28,laporan=15"
+# Modul yang dibutuhkan worker class async; "uvicorn" menjalankan mode ASGI (asgi:app)
+WORKER_MODUL = {'gevent': 'gevent', 'eventlet': 'eventlet', 'tornado': 'tornado', 'uvicorn': 'uvicorn'}
+USERNAME = "beban"
+PASSWORD = "password123"
+
+
+def _mix(teks):
+    bobot = {}
+    for bagian in teks.split(','):
+        route, _, nilai = bagian.partition('=')
+        route = route.strip()
+        if route not in ROUTES:
+            raise argparse.ArgumentTypeError(f"route '{route}' tidak dikenal (pilihan: {', '.join(ROUTES)})")
+        try:
+            bobot[route] = float(nilai)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"bobot '{nilai}' untuk {route} bukan angka")
+    if sum(bobot.values()) <= 0:
+        raise argparse.ArgumentTypeError("total bobot harus lebih dari 0")
+    return bobot
+
+
+def persentil(urut, p):
+    if not urut:
+        return None
+    return urut[min(len(urut) - 1, int(len(urut) * p / 100))]
+
+
+def _port_bebas():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _request(conn, method, path, body=None, token=None):
+    headers = {}
+    if body is not None:
+        body = json.dumps(body)
+        headers['Content-Type'] = 'application/json'
+    if token:
+        headers['Authorization'] = f'Bearer {token}'
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+def _konteks(url):
+    """Token dan data contoh (kode produk, nama pembeli) untuk klien"""
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+    status, _ = _request(conn, 'POST', '/auth/register', {"username": USERNAME, "password": PASSWORD})
+    if status not in (201, 400):  # 400: user sudah ada (server eksternal)
+        raise RuntimeError(f"register gagal: HTTP {status}")
+    status, body = _request(conn, 'POST', '/auth/login', {"username": USERNAME, "password": PASSWORD})
+    if status != 200:
+        raise RuntimeError(f"login gagal: HTTP {status}")
+    token = json.loads(body)['token']
+    status, body = _request(conn, 'GET', '/api/produk', token=token)
+    conn.close()
+    if status != 200:
+        raise RuntimeError(f"/api/produk gagal: HTTP {status}")
+    kode = [p['kode'] for p in json.loads(body)['data']]
+    return {"url": url, "token": token, "kode_produk": kode[:200]}
+
+
+def _buat_request(route, ctx, rng):
+    """(method, path, body, pakai_token) untuk satu request route"""
+    if route == 'login':
+        return 'POST', '/auth/login', {"username": USERNAME, "password": PASSWORD}, False
+    if route == 'produk':
+        return 'GET', '/api/produk', None, True
+    if route == 'transaksi':
+        body = {"nama": f"Pembeli {rng.randint(1, 5000)}", "kode_produk": rng.choice(ctx['kode_produk'])}
+        return 'POST', '/api/transaksi', body, True
+    if route == 'riwayat':
+        # Terminal kasir melihat riwayat satu pembeli atau halaman terbaru, bukan seluruh riwayat
+        if rng.random() < 0.5:
+            return 'GET', f"/api/riwayat?nama={quote(f'Pembeli {rng.randint(1, 5000)}')}", None, True
+        return 'GET', '/api/riwayat?limit=50', None, True
+    return 'GET', '/api/laporan', None, True
+
+
+def _klien(ctx, bobot, selesai, seed, hasil):
+    """Satu thread klien dengan koneksi keep-alive sendiri"""
+    rng = random.Random(seed)
+    parts = urlsplit(ctx['url'])
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=60)
+    routes, weights = list(bobot), list(bobot.values())
+    while time.time() < selesai:
+        route = rng.choices(routes, weights)[0]
+        method, path, body, pakai_token = _buat_request(route, ctx, rng)
+        start = time.perf_counter()
+        try:
+            status, _ = _request(conn, method, path, body, ctx['token'] if pakai_token else None)
+        except (OSError, http.client.HTTPException):
+            status = 'koneksi'
+            conn.close()
+        elapsed = (time.perf_counter() - start) * 1000
+        data = hasil[route]
+        data['latency'].append(elapsed)
+        data['status'][status] += 1
+    conn.close()
+
+
+def _proses_klien(args):
+    """Jalankan beberapa thread klien dalam satu proses, return hasil per route"""
+    ctx, bobot, mulai, durasi, jumlah_thread, seed = args
+    hasil_thread = [{r: {'latency': [], 'status': Counter()} for r in ROUTES} for _ in range(jumlah_thread)]
+    # Semua proses mulai dan berhenti pada waktu yang sama
+    time.sleep(max(0.0, mulai - time.time()))
+    threads = [
+        threading.Thread(target=_klien, args=(ctx, bobot, mulai + durasi, seed * 1000 + i, hasil_thread[i]))
+        for i in range(jumlah_thread)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    gabung = {r: {'latency': [], 'status': Counter()} for r in ROUTES}
+    for hasil in hasil_thread:
+        for r in ROUTES:
+            gabung[r]['latency'].extend(hasil[r]['latency'])
+            gabung[r]['status'].update(hasil[r]['status'])
+    return gabung
+
+
+def jalankan_beban(ctx, bobot, concurrency, durasi, proses):
+    """Kirim beban selama `durasi` detik, return ringkasan per route"""
+    proses = max(1, min(proses, concurrency))
+    pembagian = [concurrency // proses + (1 if i < concurrency % proses else 0) for i in range(proses)]
+    mulai = time.time() + 0.5
+    tugas = [(ctx, bobot, mulai, durasi, n, i + 1) for i, n in enumerate(pembagian)]
+    if proses == 1:
+        semua = [_proses_klien(tugas[0])]
+    else:
+        with multiprocessing.Pool(proses) as pool:
+            semua = pool.map(_proses_klien, tugas)
+
+    ringkasan = {}
+    total = gagal = 0
+    for route in ROUTES:
+        latency = sorted(x for h in semua for x in h[route]['latency'])
+        status = Counter()
+        for h in semua:
+            status.update(h[route]['status'])
+        if not latency:
+            continue
+        error = sum(n for s, n in status.items() if s == 'koneksi' or s >= 400)
+        total += len(latency)
+        gagal += error
+        ringkasan[route] = {
+            "request": len(latency),
+            "rps": round(len(latency) / durasi, 1),
+            "p50_ms": round(persentil(latency, 50), 2),
+            "p95_ms": round(persentil(latency, 95), 2),
+            "p99_ms": round(persentil(latency, 99), 2),
+            "error_rate": round(error / len(latency), 4),
+            "status": {str(s): n for s, n in sorted(status.items(), key=str)}
+        }
+    ringkasan["total"] = {
+        "request": total,
+        "rps": round(total / durasi, 1),
+        "error_rate": round(gagal / total, 4) if total else 0.0
+    }
+    return ringkasan
+
+
+def cetak(ringkasan):
+    print(f"  {'route':<10} {'req':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'error':>7}")
+    for route in ROUTES:
+        r = ringkasan.get(route)
+        if r:
+            print(f"  {route:<10} {r['request']:>7} {r['rps']:>8.1f} {r['p50_ms']:>9.2f} "
+                  f"{r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['error_rate']:>7.2%}")
+    t = ringkasan['total']
+    print(f"  {'total':<10} {t['request']:>7} {t['rps']:>8.1f} {'':>29} {t['error_rate']:>7.2%}", flush=True)
+
+
+def isi_data(folder, backend, jumlah):
+    """Isi storage default backend di folder server dengan transaksi sintetis"""
+    from database import DEFAULT_FILES
+    from storage import buat_storage
+
+    storage = buat_storage(backend, os.path.join(folder, DEFAULT_FILES[backend]))
+    records = buat_transaksi(jumlah)
+    while True:
+        batch = list(islice(records, 100000))
+        if not batch:
+            break
+        storage.extend(batch)
+
+
+def mulai_server(folder, worker_class, workers, threads, backend, iterations):
+    port = _port_bebas()
+    env = dict(os.environ, KASIR_STORAGE=backend, PYTHONPATH=str(ROOT))
+    if worker_class == 'uvicorn':
+        cmd = [
+            sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', '127.0.0.1', '--port', str(port),
+            '--workers', str(workers), '--log-level', 'warning'
+        ]
+        env['KASIR_ASGI_THREADS'] = str(threads)
+    else:
+        cmd = [
+            sys.executable, '-m', 'gunicorn', 'wsgi:app',
+            '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+            '--worker-class', worker_class, '--log-level', 'warning'
+        ]
+        if worker_class == 'gthread':
+            cmd += ['--threads', str(threads)]
+    if iterations:
+        env['KASIR_PASSWORD_ITERATIONS'] = str(iterations)
+    server = subprocess.Popen(cmd, cwd=folder, env=env)
+    url = f'http://127.0.0.1:{port}'
+    batas = time.time() + 30
+    while time.time() < batas:
+        if server.poll() is not None:
+            raise RuntimeError(f"server berhenti dengan exit code {server.returncode}")
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            _request(conn, 'GET', '/')
+            conn.close()
+            return server, url
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("server tidak siap dalam 30 detik")
+
+
+def buka_idle(url, jumlah):
+    """Koneksi TCP yang dibiarkan terbuka tanpa request, seperti terminal kasir yang sedang diam"""
+    parts = urlsplit(url)
+    koneksi = []
+    for _ in range(jumlah):
+        koneksi.append(socket.create_connection((parts.hostname, parts.port), timeout=10))
+    return koneksi
+
+
+def uji(url, args, label):
+    """Jalankan semua tingkat concurrency terhadap satu server"""
+    ctx = _konteks(url)
+    if args.warmup:
+        jalankan_beban(ctx, args.mix, min(args.concurrency), args.warmup, 1)
+    hasil = []
+    for concurrency in args.concurrency:
+        print(f"== {', '.join(f'{k} {v}' for k, v in label.items())}, concurrency {concurrency}, "
+              f"idle {args.idle}", flush=True)
+        idle = buka_idle(url, args.idle)
+        try:
+            ringkasan = jalankan_beban(ctx, args.mix, concurrency, args.durasi, args.proses)
+        finally:
+            for s in idle:
+                s.close()
+        cetak(ringkasan)
+        hasil.append(dict(label, concurrency=concurrency, idle=args.idle, hasil=ringkasan))
+    return hasil
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Uji beban server lokal per route")
+    parser.add_argument('--url', default=None, help="pakai server yang sudah berjalan")
+    parser.add_argument('--worker-class', nargs='+', default=['sync', 'gthread'])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--threads', type=int, default=4, help="thread per worker untuk gthread")
+    parser.add_argument('--asgi-threads', type=int, default=32, help="thread pool per worker untuk uvicorn")
+    parser.add_argument('--idle', type=int, default=0, help="koneksi idle yang dibuka selama pengukuran")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[8, 32])
+    parser.add_argument('--durasi', type=float, default=10, help="detik per tingkat concurrency")
+    parser.add_argument('--warmup', type=float, default=2, help="detik pemanasan sebelum diukur")
+    parser.add_argument('--mix', type=_mix, default=_mix(DEFAULT_MIX))
+    parser.add_argument('--proses', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="proses generator beban")
+    parser.add_argument('--backend', default='log', choices=['json', 'log', 'sqlite', 'segmen'])
+    parser.add_argument('--seed', type=int, default=100000, help="transaksi awal di storage server")
+    parser.add_argument('--iterations', type=int, default=None, help="cost PBKDF2 di server")
+    parser.add_argument('--out', default=None, help="tulis hasil JSON ke file ini")
+    args = parser.parse_args()
+
+    hasil = []
+    if args.url:
+        hasil += uji(args.url.rstrip('/'), args, {"server": args.url})
+    else:
+        if set(args.worker_class) - {'uvicorn'} and importlib.util.find_spec('gunicorn') is None:
+            print("gunicorn belum terpasang (pip install gunicorn), atau gunakan --url")
+            sys.exit(2)
+        for worker_class in args.worker_class:
+            modul = WORKER_MODUL.get(worker_class)
+            if modul and importlib.util.find_spec(modul) is None:
+                print(f"Lewati worker class {worker_class}: modul {modul} belum terpasang")
+                continue
+            for workers in args.workers:
+                with tempfile.TemporaryDirectory() as folder:
+                    isi_data(folder, args.backend, args.seed)
+                    threads = args.asgi_threads if worker_class == 'uvicorn' else args.threads
+                    server, url = mulai_server(folder, worker_class, workers, threads,
+                                               args.backend, args.iterations)
+                    try:
+                        label = {"worker_class": worker_class, "workers": workers}
+                        if worker_class in ('gthread', 'uvicorn'):
+                            label["threads"] = threads
+                        hasil += uji(url, args, label)
+                    finally:
+                        server.terminate()
+                        server.wait(timeout=30)
+
+    if args.out:
+        laporan = {
+            "meta": {
+                "waktu": datetime.now().isoformat(timespec='seconds'),
+                "durasi": args.durasi,
+                "mix": args.mix,
+                "backend": args.backend,
+                "seed": args.seed,
+                "cpu": os.cpu_count()
+            },
+            "hasil": hasil
+        }
+        with open(args.out, 'w') as f:
+            json.dump(laporan, f, indent=2)
+        print(f"\nHasil ditulis ke {args.out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark importer daftar harga Excel: cara lama (read semua kolom + df.iterrows())
+dibandingkan versi vectorized di scripts/import_products_from_xls.py.
+
+Usage:
+    python benchmarks/bench_import_xls.py ["Daftar_Harga_01 Dec 2025.xls"] [--repeat 3]
+
+Hasil kedua cara dicek harus sama persis sebelum waktu dicetak.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / 'scripts'))
+
+import import_products_from_xls as importer  # noqa: E402
+
+
+def rowwise_products(df, code_col, name_col, price_col, cat_col):
+    """Implementasi lama (per baris dengan iterrows), disimpan untuk pembanding"""
+    products = {}
+    for _, row in df.iterrows():
+        code = str(row[code_col]).strip()
+        if not code or code.lower() == 'nan':
+            continue
+        name = str(row[name_col]).strip()
+        try:
+            harga = int(float(row[price_col]))
+        except Exception:
+            harga_str = str(row[price_col])
+            digits = ''.join(ch for ch in harga_str if ch.isdigit())
+            harga = int(digits) if digits else 0
+
+        kategori = str(row[cat_col]).strip() if cat_col and row[cat_col] and str(row[cat_col]).strip().lower() != 'nan' else 'Lainnya'
+
+        products[code] = {
+            'nama': name,
+            'harga': harga,
+            'kategori': kategori
+        }
+    return products
+
+
+def best_of(repeat, func):
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Excel price-list importer")
+    parser.add_argument('excel', nargs='?', default=str(ROOT / 'Daftar_Harga_01 Dec 2025.xls'))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    path = Path(args.excel)
+
+    with importer.open_excel(path) as xl:
+        header_row, cols = importer.detect_header(xl)
+        usecols = sorted(i for i in cols.values() if i is not None)
+
+        t_read_all, df_all = best_of(args.repeat, lambda: xl.parse(header=header_row))
+        t_read_cols, _ = best_of(args.repeat, lambda: xl.parse(header=header_row, usecols=usecols))
+
+    names = {key: df_all.columns[i] for key, i in cols.items() if i is not None}
+    t_rowwise, lama = best_of(args.repeat, lambda: rowwise_products(
+        df_all, names['code'], names['name'], names['price'], names.get('cat')))
+    t_vector, baru = best_of(args.repeat, lambda: importer.clean_products(
+        df_all, names['code'], names['name'], names['price'], names.get('cat')))
+    t_total, _ = best_of(args.repeat, lambda: importer.read_excel_to_products(path))
+
+    if lama != baru:
+        beda = [k for k in set(lama) | set(baru) if lama.get(k) != baru.get(k)]
+        print(f"HASIL BERBEDA untuk {len(beda)} kode, contoh: {beda[:5]}")
+        sys.exit(1)
+
+    print(f"file            : {path.name} ({len(df_all)} baris, {len(baru)} produk)")
+    print(f"parse semua kol : {t_read_all * 1000:8.1f} ms")
+    print(f"parse usecols   : {t_read_cols * 1000:8.1f} ms")
+    print(f"clean iterrows  : {t_rowwise * 1000:8.1f} ms")
+    print(f"clean vectorized: {t_vector * 1000:8.1f} ms  ({t_rowwise / t_vector:.1f}x lebih cepat)")
+    print(f"import total    : {t_total * 1000:8.1f} ms  (open + header + usecols + clean)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark throughput AuthManager.login pada cost hashing tertentu.
+
+Usage:
+    python benchmarks/bench_login.py [--iterations 200000] [--threads 8] [--logins 200]
+
+Mengukur login/detik dan latency rata-rata untuk banyak thread yang login
+bersamaan (seperti lonjakan login saat ganti shift), memakai users.json
+sementara sehingga data asli tidak tersentuh.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark login throughput")
+    parser.add_argument('--iterations', type=int, default=200000, help="cost PBKDF2")
+    parser.add_argument('--threads', type=int, default=8, help="jumlah login bersamaan")
+    parser.add_argument('--logins', type=int, default=200, help="total login")
+    parser.add_argument('--workers', type=int, default=None, help="ukuran hash pool")
+    args = parser.parse_args()
+
+    os.environ["KASIR_PASSWORD_ITERATIONS"] = str(args.iterations)
+    if args.workers:
+        os.environ["KASIR_HASH_WORKERS"] = str(args.workers)
+    # Antrean dibuat cukup besar agar benchmark mengukur throughput, bukan penolakan
+    os.environ.setdefault("KASIR_HASH_QUEUE", str(args.threads))
+
+    import auth
+    from auth import AuthManager, UserStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        auth.user_store = UserStore(os.path.join(tmp, "users.json"))
+        AuthManager.register("bench", "password123")
+
+        latencies = []
+        status_codes = []
+        lock = threading.Lock()
+        per_thread = args.logins // args.threads
+
+        def worker():
+            for _ in range(per_thread):
+                start = time.perf_counter()
+                _, status = AuthManager.login("bench", "password123")
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    status_codes.append(status)
+
+        threads = [threading.Thread(target=worker) for _ in range(args.threads)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        total = time.perf_counter() - start
+
+    ok = status_codes.count(200)
+    latencies.sort()
+    print(f"iterations={args.iterations} threads={args.threads} workers={args.workers or os.cpu_count()}")
+    print(f"logins      : {len(latencies)} ({ok} ok, {len(latencies) - ok} ditolak)")
+    print(f"throughput  : {len(latencies) / total:.1f} login/s")
+    print(f"latency avg : {statistics.mean(latencies) * 1000:.1f} ms")
+    print(f"latency p95 : {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
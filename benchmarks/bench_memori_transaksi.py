@@ -0,0 +1,100 @@
+"""
+Benchmark memori penyimpanan transaksi in-memory: list of dict (hasil parse
+file JSON, seperti cache lama) dibandingkan TabelTransaksi berbentuk kolom.
+
+Usage:
+    python benchmarks/bench_memori_transaksi.py [--jumlah 1000000]
+
+Memori diukur dengan tracemalloc, hasilnya dinormalisasi ke per satu juta transaksi.
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import DAFTAR_PRODUK, DATE_FORMAT  # noqa: E402
+from tabel import TabelTransaksi  # noqa: E402
+
+
+def buat_transaksi(jumlah, seed=1):
+    """Transaksi sintetis: ~5000 pembeli, 5 operator, produk dari katalog"""
+    rng = random.Random(seed)
+    produk = list(DAFTAR_PRODUK.values())
+    operator = [f"kasir{i}" for i in range(5)]
+    waktu = datetime(2025, 1, 1)
+    for _ in range(jumlah):
+        waktu += timedelta(seconds=rng.randint(0, 60))
+        info = rng.choice(produk)
+        yield {
+            "tanggal": waktu.strftime(DATE_FORMAT),
+            "nama": f"Pembeli {rng.randint(1, 5000)}",
+            "produk": info['nama'],
+            "kategori": info['kategori'],
+            "harga": info['harga'],
+            "operator": rng.choice(operator)
+        }
+
+
+def ukur_memori(func):
+    """Memori (byte) yang masih terpakai oleh hasil func()"""
+    gc.collect()
+    tracemalloc.start()
+    hasil = func()
+    gc.collect()
+    terpakai = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return hasil, terpakai
+
+
+def ukur_waktu(func):
+    start = time.perf_counter()
+    hasil = func()
+    return hasil, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark memori transaksi in-memory")
+    parser.add_argument('--jumlah', type=int, default=1000000)
+    args = parser.parse_args()
+
+    # Baris JSON per record, seperti isi file yang di-parse oleh storage
+    baris = [json.dumps(t) for t in buat_transaksi(args.jumlah)]
+
+    list_dict, t_dict = ukur_waktu(lambda: [json.loads(b) for b in baris])
+    del list_dict
+    list_dict, mem_dict = ukur_memori(lambda: [json.loads(b) for b in baris])
+
+    def isi_tabel():
+        tabel = TabelTransaksi()
+        for seq, transaksi in enumerate(list_dict, 1):
+            tabel.tambah(seq, transaksi)
+        return tabel
+
+    # list_dict sudah ada sebelum pengukuran, jadi hanya memori tabel yang terhitung
+    tabel, t_tabel = ukur_waktu(isi_tabel)
+    del tabel
+    tabel, mem_tabel = ukur_memori(isi_tabel)
+    assert [tabel.to_dict(i) for i in range(len(tabel))] == list_dict
+    del list_dict
+
+    _, t_materialisasi = ukur_waktu(lambda: [tabel.to_dict(i) for i in range(len(tabel))])
+
+    per_juta = 1000000 / args.jumlah
+    print(f"transaksi         : {args.jumlah}")
+    print(f"list of dict      : {mem_dict * per_juta / 2**20:8.1f} MiB/juta ({mem_dict / args.jumlah:.0f} B/transaksi)")
+    print(f"TabelTransaksi    : {mem_tabel * per_juta / 2**20:8.1f} MiB/juta ({mem_tabel / args.jumlah:.0f} B/transaksi)")
+    print(f"penghematan       : {mem_dict / mem_tabel:.1f}x")
+    print(f"isi tabel         : {t_tabel:.2f} s (parse list of dict: {t_dict:.2f} s)")
+    print(f"materialisasi dict: {t_materialisasi:.2f} s untuk semua transaksi")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+Benchmark skala: operasi Database dan endpoint Flask pada riwayat berukuran
+10 ribu, 100 ribu dan 1 juta transaksi sintetis.
+
+Usage:
+    python benchmarks/bench_skala.py [--sizes 10000 100000 1000000] [--backend log]
+                                     [--out hasil.json] [--baseline baseline.json]
+
+Setiap ukuran diisi ke storage sementara (data asli tidak tersentuh), lalu
+setiap operasi diulang beberapa kali dan median/p95-nya dicatat. Endpoint
+diukur lewat Flask test client dengan token asli, termasuk login (PBKDF2)
+dan /api/produk dengan katalog penuh.
+
+Hasil ditulis sebagai JSON (--out). Dengan --baseline, hasil dibandingkan
+dengan file hasil sebelumnya dan exit code 1 jika ada operasi yang lebih
+lambat dari batas --toleransi.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_memori_transaksi import buat_transaksi  # noqa: E402
+
+# Transaksi per penulisan saat mengisi storage
+SEED_BATCH = 100000
+
+
+def ukur(func, ulang):
+    """Jalankan func beberapa kali, return statistik waktu dalam ms"""
+    waktu = []
+    for _ in range(ulang):
+        start = time.perf_counter()
+        func()
+        waktu.append((time.perf_counter() - start) * 1000)
+    waktu.sort()
+    return {
+        "median_ms": round(statistics.median(waktu), 3),
+        "p95_ms": round(waktu[max(0, int(len(waktu) * 0.95 + 0.5) - 1)], 3),
+        "min_ms": round(waktu[0], 3),
+        "n": ulang
+    }
+
+
+def katalog_sintetis(jumlah):
+    """Katalog seukuran daftar harga supplier: kode -> {nama, harga, kategori}"""
+    kategori = ["Pulsa", "Data", "Game", "E-Money", "PLN", "Voucher"]
+    return {
+        f"P{i:05d}": {
+            "nama": f"Produk {kategori[i % len(kategori)]} {i} Nominal {(i % 50 + 1) * 1000}",
+            "harga": (i % 50 + 1) * 1000 + 500,
+            "kategori": kategori[i % len(kategori)]
+        }
+        for i in range(jumlah)
+    }
+
+
+def isi_storage(storage, jumlah):
+    records = buat_transaksi(jumlah)
+    while True:
+        batch = list(islice(records, SEED_BATCH))
+        if not batch:
+            break
+        storage.extend(batch)
+
+
+def bench_ukuran(backend, jumlah, args, tmp):
+    """Semua pengukuran untuk satu backend dan satu ukuran riwayat"""
+    import app as app_module
+    import auth
+    import katalog as katalog_module
+    from auth import AuthManager, UserStore
+    from database import Database
+    from storage import buat_storage
+
+    hasil = {}
+    path = os.path.join(tmp, f"transaksi-{jumlah}.{backend}")
+
+    start = time.perf_counter()
+    isi_storage(buat_storage(backend, path), jumlah)
+    hasil["seed"] = {"median_ms": round((time.perf_counter() - start) * 1000, 3), "n": 1}
+
+    start = time.perf_counter()
+    database = Database(path, backend=backend)
+    hasil["db.muat"] = {"median_ms": round((time.perf_counter() - start) * 1000, 3), "n": 1}
+
+    contoh = database.get_transaksi_page(1, after_seq=jumlah // 2)[0][0]
+    nama = contoh['nama']
+    hari = contoh['tanggal'][:10]
+    bulan = contoh['tanggal'][:7]
+    baru = dict(contoh, tanggal=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+
+    ulang = args.ulang
+    hasil["db.tambah_transaksi"] = ukur(lambda: database.tambah_transaksi(dict(baru)), ulang)
+    hasil["db.get_transaksi_by_nama"] = ukur(lambda: database.get_transaksi_by_nama(nama), ulang)
+    hasil["db.get_transaksi_page"] = ukur(lambda: database.get_transaksi_page(100, after_seq=jumlah // 2), ulang)
+    hasil["db.get_transaksi_by_tanggal"] = ukur(
+        lambda: database.get_transaksi_by_tanggal(f"{hari} 00:00:00", f"{hari} 23:59:59"), ulang)
+    hasil["db.get_ringkasan"] = ukur(database.get_ringkasan, ulang)
+    hasil["db.get_laporan_periode"] = ukur(
+        lambda: database.get_laporan_periode(f"{bulan}-01", hari, ["day", "kategori"]), ulang)
+
+    # Endpoint lewat test client, dengan db, user store dan katalog sementara
+    app_module.db = database
+    auth.user_store = UserStore(os.path.join(tmp, f"users-{jumlah}.json"))
+    katalog_path = os.path.join(tmp, "products.json")
+    katalog_module.katalog = katalog_module.Katalog(path=katalog_path, produk=katalog_sintetis(args.produk))
+    AuthManager.register("bench", "password123")
+    client = app_module.app.test_client()
+
+    def login():
+        response = client.post('/auth/login', json={"username": "bench", "password": "password123"})
+        assert response.status_code == 200, response.data
+        return response
+
+    token = json.loads(login().data)['token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def get(url, status=200):
+        def jalan():
+            response = client.get(url, headers=headers)
+            assert response.status_code == status, (url, response.status_code)
+            response.get_data()
+        return jalan
+
+    def post_transaksi():
+        response = client.post('/api/transaksi', json={"nama": nama, "kode_produk": "P00001"}, headers=headers)
+        assert response.status_code == 201, response.data
+
+    hasil["api.login"] = ukur(login, max(3, ulang // 4))
+    hasil["api.produk"] = ukur(get('/api/produk'), ulang)
+    hasil["api.produk_304"] = ukur(
+        lambda: client.get('/api/produk', headers=dict(headers, **{'If-None-Match': f'"{katalog_module.snapshot().etag}"'})),
+        ulang)
+    hasil["api.produk_filter"] = ukur(get('/api/produk?kategori=Game&max_harga=20000'), ulang)
+    hasil["api.transaksi"] = ukur(post_transaksi, ulang)
+    hasil["api.riwayat_nama"] = ukur(get(f'/api/riwayat?nama={nama}'), ulang)
+    hasil["api.riwayat_page"] = ukur(get(f'/api/riwayat?limit=100&cursor={jumlah // 2}'), ulang)
+    hasil["api.riwayat_rentang"] = ukur(get(f'/api/riwayat?from={hari}&to={hari}'), ulang)
+    hasil["api.laporan"] = ukur(get('/api/laporan'), ulang)
+    hasil["api.laporan_periode"] = ukur(get(f'/api/laporan?from={bulan}-01&to={hari}&group_by=day'), ulang)
+    if jumlah <= args.riwayat_penuh_max:
+        hasil["api.riwayat_semua"] = ukur(get('/api/riwayat'), max(1, ulang // 10))
+    return hasil
+
+
+def bandingkan(hasil, baseline, toleransi):
+    """Cetak perbandingan median dengan baseline, return daftar operasi yang melambat"""
+    lambat = []
+    print(f"\n{'operasi':<52} {'baseline':>10} {'sekarang':>10} {'rasio':>7}")
+    for key, nilai in hasil.items():
+        lama = baseline.get(key)
+        if not lama or not lama.get('median_ms'):
+            continue
+        rasio = nilai['median_ms'] / lama['median_ms']
+        tanda = ""
+        if rasio > toleransi and not key.endswith(('/seed', '/db.muat')):
+            tanda = "  LEBIH LAMBAT"
+            lambat.append(key)
+        print(f"{key:<52} {lama['median_ms']:>10.2f} {nilai['median_ms']:>10.2f} {rasio:>6.2f}x{tanda}")
+    return lambat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark skala storage dan API")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--backend', nargs='+', default=['log'], choices=['json', 'log', 'sqlite', 'segmen'])
+    parser.add_argument('--ulang', type=int, default=20, help="pengulangan per operasi")
+    parser.add_argument('--produk', type=int, default=3000, help="jumlah produk katalog")
+    parser.add_argument('--iterations', type=int, default=None, help="cost PBKDF2 untuk login")
+    parser.add_argument('--riwayat-penuh-max', type=int, default=100000,
+                        help="ukuran maksimal untuk mengukur GET /api/riwayat tanpa filter")
+    parser.add_argument('--out', default=None, help="tulis hasil JSON ke file ini")
+    parser.add_argument('--baseline', default=None, help="file hasil sebelumnya untuk dibandingkan")
+    parser.add_argument('--toleransi', type=float, default=1.25, help="rasio median maksimal terhadap baseline")
+    args = parser.parse_args()
+
+    if args.iterations:
+        os.environ["KASIR_PASSWORD_ITERATIONS"] = str(args.iterations)
+
+    hasil = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        # Import app di dalam folder sementara agar file default (transaksi.json, users.json) tidak menyentuh data asli
+        cwd = os.getcwd()
+        os.chdir(tmp)
+        try:
+            for backend in args.backend:
+                for jumlah in args.sizes:
+                    print(f"== {backend} / {jumlah} transaksi", flush=True)
+                    for op, nilai in bench_ukuran(backend, jumlah, args, tmp).items():
+                        key = f"{backend}/{jumlah}/{op}"
+                        hasil[key] = nilai
+                        p95 = f"  p95 {nilai['p95_ms']:9.2f} ms" if 'p95_ms' in nilai else ""
+                        print(f"  {op:<28} {nilai['median_ms']:10.2f} ms{p95}", flush=True)
+        finally:
+            os.chdir(cwd)
+
+    laporan = {
+        "meta": {
+            "waktu": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": args.sizes,
+            "backend": args.backend,
+            "ulang": args.ulang,
+            "produk": args.produk,
+            "fsync": os.environ.get("KASIR_FSYNC", "1") != "0",
+        },
+        "hasil": hasil
+    }
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(laporan, f, indent=2)
+        print(f"\nHasil ditulis ke {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['hasil']
+        lambat = bandingkan(hasil, baseline, args.toleransi)
+        if lambat:
+            print(f"\n{len(lambat)} operasi lebih lambat dari {args.toleransi}x baseline")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,6 +2,10 @@
 Configuration file untuk Aplikasi Kasir Digital
 """
 
+import json
+import os
+from pathlib import Path
+
 # Database Produk (expanded catalog)
 DAFTAR_PRODUK = {
     # Game Top-up
@@ -52,23 +56,38 @@ DAFTAR_PRODUK = {
 
 # If there's a products.json file in project root (created from Excel import),
 # load it and override the hard-coded `DAFTAR_PRODUK` so the app uses the latest catalog.
-try:
-    import json
-    from pathlib import Path
-    p = Path(__file__).resolve().parent / 'products.json'
-    if p.exists():
-        with p.open('r', encoding='utf-8') as fh:
+# The file is watched afterwards by katalog.Katalog and reloaded without restart.
+FILE_PRODUK = Path(__file__).resolve().parent / 'products.json'
+
+
+def load_produk_file(path=FILE_PRODUK):
+    """Baca katalog dari products.json, return dict atau None jika tidak ada/tidak valid"""
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
             data = json.load(fh)
-            # validate simple structure: code -> {nama,harga,kategori}
-            if isinstance(data, dict) and data:
-                DAFTAR_PRODUK = data
-except Exception:
-    # If any error occurs while loading external catalog, keep built-in catalog.
-    pass
+    except (OSError, ValueError):
+        return None
+    # validate simple structure: code -> {nama,harga,kategori}
+    if not isinstance(data, dict) or not data:
+        return None
+    for info in data.values():
+        if not isinstance(info, dict) or not {'nama', 'harga', 'kategori'} <= info.keys():
+            return None
+    return data
+
+
+DAFTAR_PRODUK = load_produk_file() or DAFTAR_PRODUK
 
 # File Configuration
 FILE_TRANSAKSI = "transaksi.json"
+FILE_TRANSAKSI_LOG = "transaksi.ndjson"
+FILE_TRANSAKSI_DB = "transaksi.db"
+FILE_TRANSAKSI_SEGMEN = "transaksi_segmen"
 LOG_FILE = "app.log"
 
+# Storage backend transaksi: "json" (default, file JSON array), "log" (append-only),
+# "segmen" (append-only, satu file per bulan di folder FILE_TRANSAKSI_SEGMEN) atau "sqlite"
+STORAGE_BACKEND = os.environ.get("KASIR_STORAGE", "json")
+
 # Format
 DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
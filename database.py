@@ -1,62 +1,429 @@
 """
 Database module untuk mengelola data transaksi
-Menggunakan JSON sebagai penyimpanan data
+Penyimpanan data ditangani oleh backend di storage.py
+(JSON array sebagai default, append-only log, log per bulan, atau SQLite)
+Salinan in-memory untuk query disimpan berbentuk kolom (tabel.py)
 """
 
-import json
-import os
-from datetime import datetime
-from config import FILE_TRANSAKSI, DATE_FORMAT
+import threading
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
+from datetime import datetime, timedelta
+from config import (
+    FILE_TRANSAKSI, FILE_TRANSAKSI_LOG, FILE_TRANSAKSI_DB, FILE_TRANSAKSI_SEGMEN, STORAGE_BACKEND, DATE_FORMAT
+)
+from metrics import waktu_komponen
+from storage import buat_storage
+from tabel import TabelTransaksi
+
+# File default untuk setiap backend
+DEFAULT_FILES = {
+    "json": FILE_TRANSAKSI,
+    "log": FILE_TRANSAKSI_LOG,
+    "sqlite": FILE_TRANSAKSI_DB,
+    "segmen": FILE_TRANSAKSI_SEGMEN,
+}
+
+# Format batas rentang waktu menurut panjang teks: (format strptime, detik sampai akhir satuan terkecilnya)
+FORMAT_WAKTU = {
+    10: ("%Y-%m-%d", 86399),
+    13: ("%Y-%m-%d %H", 3599),
+    16: ("%Y-%m-%d %H:%M", 59),
+    19: (DATE_FORMAT, 0),
+}
+
+
+def parse_waktu(teks, akhir=False):
+    """
+    Parse batas rentang 'YYYY-MM-DD', 'YYYY-MM-DD HH', 'YYYY-MM-DD HH:MM' atau
+    'YYYY-MM-DD HH:MM:SS' (pemisah boleh 'T') menjadi string DATE_FORMAT.
+    Batas akhir yang kurang presisi diisi sampai akhir hari/jam/menit itu.
+    Satu aturan untuk from/to di /api/riwayat dan /api/laporan
+    """
+    teks = teks.strip().replace('T', ' ')
+    try:
+        fmt, sisa = FORMAT_WAKTU[len(teks)]
+        waktu = datetime.strptime(teks, fmt)
+    except (KeyError, ValueError):
+        raise ValueError(
+            f"Format waktu '{teks}' tidak valid, gunakan YYYY-MM-DD, YYYY-MM-DD HH, "
+            "YYYY-MM-DD HH:MM atau YYYY-MM-DD HH:MM:SS"
+        ) from None
+    if akhir:
+        waktu += timedelta(seconds=sisa)
+    # Bukan strftime: %Y tidak selalu diisi nol untuk tahun < 1000
+    return (f"{waktu.year:04d}-{waktu.month:02d}-{waktu.day:02d} "
+            f"{waktu.hour:02d}:{waktu.minute:02d}:{waktu.second:02d}")
+
+
+class Ringkasan:
+    """Agregat penjualan (jumlah, total, per kategori, per operator) yang diperbarui per transaksi"""
+    
+    def __init__(self):
+        self.total_transaksi = 0
+        self.total_penjualan = 0
+        self.per_kategori = {}
+        self.per_operator = {}
+    
+    @staticmethod
+    def _tambah_ke(bucket, key, harga):
+        entry = bucket.get(key)
+        if entry is None:
+            entry = bucket[key] = {"total_transaksi": 0, "total_penjualan": 0}
+        entry["total_transaksi"] += 1
+        entry["total_penjualan"] += harga
+    
+    def tambah(self, transaksi):
+        """Masukkan satu transaksi ke agregat"""
+        harga = transaksi['harga']
+        self.total_transaksi += 1
+        self.total_penjualan += harga
+        self._tambah_ke(self.per_kategori, transaksi.get('kategori', 'Lainnya'), harga)
+        if transaksi.get('operator'):
+            self._tambah_ke(self.per_operator, transaksi['operator'], harga)
+    
+    def tambah_agregat(self, agregat):
+        """Gabungkan agregat yang sudah dihitung (segmen arsip) tanpa membaca record-nya"""
+        self.total_transaksi += agregat['total_transaksi']
+        self.total_penjualan += agregat['total_penjualan']
+        for bucket, per_key in ((self.per_kategori, agregat['per_kategori']), (self.per_operator, agregat['per_operator'])):
+            for key, nilai in per_key.items():
+                entry = bucket.setdefault(key, {"total_transaksi": 0, "total_penjualan": 0})
+                entry["total_transaksi"] += nilai["total_transaksi"]
+                entry["total_penjualan"] += nilai["total_penjualan"]
+    
+    def to_dict(self):
+        """Salinan agregat dalam bentuk dict (aman untuk dikirim ke client)"""
+        return {
+            "total_transaksi": self.total_transaksi,
+            "total_penjualan": self.total_penjualan,
+            "per_kategori": {k: dict(v) for k, v in self.per_kategori.items()},
+            "per_operator": {k: dict(v) for k, v in self.per_operator.items()}
+        }
+
+
+class Rollup:
+    """
+    Rollup penjualan per periode waktu (jam, hari, bulan) x (kategori, operator)
+    Diperbarui setiap transaksi, sehingga laporan per rentang waktu cukup
+    menjumlahkan beberapa bucket tanpa membaca ulang transaksi
+    """
+    
+    # Panjang prefix string tanggal (DATE_FORMAT) untuk setiap granularitas
+    GRANULARITAS = {"hour": 13, "day": 10, "month": 7}
+    LEBIH_HALUS = {"month": "day", "day": "hour"}
+    GROUP_BY = ("hour", "day", "month", "kategori", "operator")
+    
+    def __init__(self):
+        self.buckets = {g: {} for g in self.GRANULARITAS}
+        # Key bucket yang ada per granularitas, urut waktu (untuk mencari rentang dengan bisect)
+        self.urut = {g: [] for g in self.GRANULARITAS}
+    
+    def _bucket(self, granularitas, key):
+        per_key = self.buckets[granularitas].get(key)
+        if per_key is None:
+            per_key = self.buckets[granularitas][key] = {}
+            urut = self.urut[granularitas]
+            if not urut or key > urut[-1]:
+                urut.append(key)
+            else:
+                # Jarang (transaksi terlambat); list baru agar query yang sedang berjalan tidak bergeser
+                self.urut[granularitas] = sorted(urut + [key])
+        return per_key
+    
+    @staticmethod
+    def _tambah_ke(per_key, key, jumlah, total):
+        # Entry diganti, bukan diubah, agar query tanpa lock selalu membaca pasangan yang utuh
+        entry = per_key.get(key)
+        per_key[key] = (jumlah, total) if entry is None else (entry[0] + jumlah, entry[1] + total)
+    
+    def tambah(self, transaksi):
+        """Masukkan satu transaksi ke bucket jam, hari dan bulannya"""
+        tanggal = transaksi['tanggal']
+        key = (transaksi.get('kategori', 'Lainnya'), transaksi.get('operator'))
+        harga = transaksi['harga']
+        for granularitas, panjang in self.GRANULARITAS.items():
+            self._tambah_ke(self._bucket(granularitas, tanggal[:panjang]), key, 1, harga)
+    
+    def tambah_per_hari(self, per_hari):
+        """
+        Masukkan agregat per hari ([hari, kategori, operator, jumlah, total]) dari segmen arsip
+        Hanya bucket hari dan bulan yang terisi, rincian per jam tidak tersedia lagi
+        """
+        for hari, kategori, operator, jumlah, total in per_hari:
+            for granularitas in ("day", "month"):
+                per_key = self._bucket(granularitas, hari[:self.GRANULARITAS[granularitas]])
+                self._tambah_ke(per_key, (kategori, operator), jumlah, total)
+    
+    @staticmethod
+    def _jam(granularitas, key):
+        """Key jam pertama dan terakhir yang tercakup bucket hari/bulan, None jika key tidak valid"""
+        try:
+            if granularitas == "day":
+                datetime.strptime(key, "%Y-%m-%d")
+                return f"{key} 00", f"{key} 23"
+            hari = monthrange(*datetime.strptime(key, "%Y-%m").timetuple()[:2])[1]
+        except ValueError:
+            return None
+        return f"{key}-01 00", f"{key}-{hari:02d} 23"
+    
+    def _bucket_rentang(self, granularitas, dari, sampai):
+        """
+        (granularitas, key) bucket yang menutup rentang jam [dari, sampai] sekasar mungkin
+        (mulai dari `granularitas`); bucket yang hanya sebagian masuk rentang dipecah ke
+        granularitas lebih halus. Hanya key bucket yang ada yang dilewati, jadi biayanya
+        mengikuti jumlah data, bukan panjang rentang
+        """
+        panjang = self.GRANULARITAS[granularitas]
+        urut = self.urut[granularitas]
+        for key in urut[bisect_left(urut, dari[:panjang]):bisect_right(urut, sampai[:panjang])]:
+            if granularitas == "hour":
+                yield granularitas, key
+                continue
+            jam = self._jam(granularitas, key)
+            if jam is None:
+                continue
+            pertama, terakhir = jam
+            if dari <= pertama and terakhir <= sampai:
+                yield granularitas, key
+            else:
+                yield from self._bucket_rentang(
+                    self.LEBIH_HALUS[granularitas], max(dari, pertama), min(sampai, terakhir)
+                )
+    
+    def query(self, dari=None, sampai=None, group_by=()):
+        """
+        Agregat penjualan dalam rentang waktu, dikelompokkan menurut group_by
+        (kombinasi dari hour/day/month/kategori/operator)
+        Return (total_transaksi, total_penjualan, groups)
+        Aman dipanggil tanpa lock selama hanya satu thread yang menambah data
+        """
+        for g in group_by:
+            if g not in self.GROUP_BY:
+                raise ValueError(f"group_by '{g}' tidak dikenal. Pilihan: {', '.join(self.GROUP_BY)}")
+        periode = [g for g in group_by if g in self.GRANULARITAS]
+        if len(periode) > 1:
+            raise ValueError("group_by hanya boleh memakai satu periode waktu (hour, day atau month)")
+        terkasar = periode[0] if periode else "month"
+        
+        dari = parse_waktu(dari) if dari else "0001-01-01 00:00:00"
+        sampai = parse_waktu(sampai, akhir=True) if sampai else "9999-12-31 23:59:59"
+        if dari > sampai:
+            raise ValueError("Waktu 'from' harus sebelum atau sama dengan 'to'")
+        # Rollup berpresisi jam: batas dipotong ke jam yang memuatnya
+        dari, sampai = dari[:13], sampai[:13]
+        
+        total_transaksi = 0
+        total_penjualan = 0
+        groups = {}
+        for granularitas, bucket in self._bucket_rentang(terkasar, dari, sampai):
+            per_key = self.buckets[granularitas].get(bucket)
+            if not per_key:
+                continue
+            for (kategori, operator), (jumlah, total) in list(per_key.items()):
+                total_transaksi += jumlah
+                total_penjualan += total
+                if not group_by:
+                    continue
+                group_key = tuple(
+                    bucket[:self.GRANULARITAS[g]] if g in self.GRANULARITAS
+                    else kategori if g == "kategori" else operator
+                    for g in group_by
+                )
+                entry = groups.setdefault(group_key, [0, 0])
+                entry[0] += jumlah
+                entry[1] += total
+        
+        hasil = [
+            dict(zip(group_by, key), total_transaksi=jumlah, total_penjualan=total)
+            for key, (jumlah, total) in sorted(groups.items(), key=lambda item: tuple(str(k) for k in item[0]))
+        ]
+        return total_transaksi, total_penjualan, hasil
 
 
 class Database:
     """Mengelola operasi database transaksi"""
     
-    def __init__(self, filename=FILE_TRANSAKSI):
-        self.filename = filename
-        self._init_database()
+    def __init__(self, filename=None, backend=None):
+        backend = backend or STORAGE_BACKEND
+        self.backend = backend
+        self.filename = filename or DEFAULT_FILES.get(backend, FILE_TRANSAKSI)
+        self.storage = buat_storage(backend, self.filename)
+        self._lock = threading.RLock()
+        self._muat_ulang()
     
-    def _init_database(self):
-        """Inisialisasi file database jika belum ada"""
-        if not os.path.exists(self.filename):
-            self._write([])
+    def _muat_ulang(self):
+        """Bangun ulang state in-memory dari awal (saat startup atau storage diganti dari luar)"""
+        with self._lock:
+            self._ringkasan = Ringkasan()
+            self._rollup = Rollup()
+            self._tabel = TabelTransaksi()
+            self._seq = 0
+            self._versi = None
+            # Data yang sudah diarsipkan storage hanya masuk lewat agregatnya
+            arsip = self.storage.agregat_arsip()
+            for agregat in arsip:
+                self._ringkasan.tambah_agregat(agregat)
+                self._rollup.tambah_per_hari(agregat['per_hari'])
+            self._jumlah_arsip = len(arsip)
+            self._sinkron()
     
-    def _read(self):
-        """Baca semua transaksi dari file"""
-        try:
-            with open(self.filename, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return []
+    def _terapkan(self, seq, transaksi):
+        """Masukkan satu record baru ke tabel, agregat dan index"""
+        self._tabel.tambah(seq, transaksi)
+        self._ringkasan.tambah(transaksi)
+        self._rollup.tambah(transaksi)
+        self._seq = seq
+    
+    def _sinkron(self):
+        """
+        Samakan state in-memory dengan storage
+        Jika versi storage tidak berubah cukup satu stat; jika berubah, backend append-only
+        hanya membaca record dengan seq baru (termasuk yang ditulis worker lain); file JSON
+        yang record lamanya ikut berubah (diedit dari luar) dibaca ulang seluruhnya
+        """
+        with self._lock:
+            versi = self.storage.versi()
+            if versi is not None and versi == self._versi:
+                return
+            if (self.storage.seq_terakhir() < self._seq
+                    or len(self.storage.agregat_arsip()) != self._jumlah_arsip
+                    or (self._seq and self.storage.berubah_dari_luar(self._seq))):
+                # Storage dipotong/diedit/diganti dari luar, atau ada segmen yang baru diarsipkan
+                self._muat_ulang()
+                return
+            for seq, transaksi in self.storage.iter_from(self._seq):
+                self._terapkan(seq, transaksi)
+            self._versi = versi
     
-    def _write(self, data):
-        """Simpan transaksi ke file"""
-        with open(self.filename, 'w') as f:
-            json.dump(data, f, indent=2)
+    def _snapshot(self):
+        """
+        Tabel aktif beserta jumlah barisnya saat ini
+        Tabel hanya di-append, jadi baris [0, n) aman dibaca tanpa memegang lock
+        """
+        with self._lock:
+            self._sinkron()
+            return self._tabel, len(self._tabel)
     
+    @waktu_komponen('storage')
     def tambah_transaksi(self, transaksi):
-        """Tambahkan transaksi baru"""
-        data = self._read()
-        data.append(transaksi)
-        self._write(data)
+        """Tambahkan transaksi baru (aman dipanggil dari banyak thread dan proses)"""
+        self.storage.append(transaksi)
+        self._sinkron()
     
+    @waktu_komponen('storage')
+    def tambah_banyak_transaksi(self, daftar_transaksi):
+        """Tambahkan banyak transaksi dengan satu kali penulisan ke storage"""
+        if not daftar_transaksi:
+            return
+        self.storage.extend(daftar_transaksi)
+        self._sinkron()
+    
+    @waktu_komponen('storage')
     def get_semua_transaksi(self):
         """Ambil semua transaksi"""
-        return self._read()
+        tabel, n = self._snapshot()
+        return [tabel.to_dict(i) for i in range(n)]
+    
+    @waktu_komponen('storage', iterasi=True)
+    def iter_baris(self, after_seq=0, nama=None, dari=None, sampai=None):
+        """
+        Generator BarisTransaksi (view tanpa dict) dengan seq > after_seq, urut seq
+        Filter opsional: nama pembeli dan rentang tanggal dari/sampai (DATE_FORMAT, inklusif)
+        """
+        with self._lock:
+            self._sinkron()
+            tabel, n = self._tabel, len(self._tabel)
+            mulai = tabel.index_setelah(after_seq)
+            if dari or sampai:
+                index = tabel.index_by_tanggal(dari, sampai)
+                if nama:
+                    # Irisan dua daftar index yang sama-sama urut; set dibuat dari yang lebih kecil
+                    per_nama = tabel.index_by_nama(nama)
+                    kecil, besar = sorted((index, per_nama), key=len)
+                    kecil = set(kecil)
+                    index = [i for i in besar if i in kecil]
+            elif nama:
+                index = tabel.index_by_nama(nama)
+            else:
+                return (tabel.baris(i) for i in range(mulai, n))
+            index = index[bisect_left(index, mulai):]
+        return (tabel.baris(i) for i in index if i < n)
+    
+    @waktu_komponen('storage', iterasi=True)
+    def iter_transaksi(self, after_seq=0, nama=None, dari=None, sampai=None):
+        """Generator (seq, transaksi) dengan seq > after_seq; dict dibuat per item saat diambil"""
+        return ((baris.seq, baris.to_dict()) for baris in self.iter_baris(after_seq, nama, dari, sampai))
+    
+    @waktu_komponen('storage')
+    def get_transaksi_page(self, limit, after_seq=0, nama=None, dari=None, sampai=None):
+        """
+        Ambil satu halaman transaksi setelah cursor after_seq
+        Return (items, next_cursor); setiap item diberi field `seq`,
+        next_cursor bernilai None jika tidak ada halaman berikutnya
+        """
+        items = []
+        for baris in self.iter_baris(after_seq, nama, dari, sampai):
+            if len(items) == limit:
+                return items, items[-1]['seq']
+            items.append(dict(baris.to_dict(), seq=baris.seq))
+        return items, None
     
+    @waktu_komponen('storage')
     def get_transaksi_by_nama(self, nama):
-        """Ambil transaksi berdasarkan nama pembeli"""
-        data = self._read()
-        return [t for t in data if t['nama'].lower() == nama.lower()]
+        """Ambil transaksi berdasarkan nama pembeli (lewat index nama)"""
+        return [baris.to_dict() for baris in self.iter_baris(nama=nama)]
+    
+    @waktu_komponen('storage')
+    def get_transaksi_by_operator(self, operator):
+        """Ambil transaksi yang dibuat oleh operator (username kasir)"""
+        tabel, n = self._snapshot()
+        index = tabel.index_by_operator(operator)
+        return [tabel.to_dict(i) for i in index[:bisect_left(index, n)]]
+    
+    @waktu_komponen('storage')
+    def get_transaksi_by_tanggal(self, dari=None, sampai=None, nama=None):
+        """Ambil transaksi dalam rentang tanggal (format DATE_FORMAT, inklusif), lewat index waktu"""
+        return [baris.to_dict() for baris in self.iter_baris(nama=nama, dari=dari or None, sampai=sampai or None)]
+    
+    @waktu_komponen('storage')
+    def get_ringkasan(self):
+        """Ambil agregat penjualan (O(1), dari running total)"""
+        with self._lock:
+            self._sinkron()
+            return self._ringkasan.to_dict()
+    
+    @waktu_komponen('storage')
+    def get_laporan_periode(self, dari=None, sampai=None, group_by=()):
+        """
+        Laporan penjualan untuk rentang waktu dari rollup (dari/sampai: format parse_waktu,
+        inklusif, presisi jam), dikelompokkan menurut group_by
+        Raise ValueError untuk parameter yang tidak valid
+        """
+        with self._lock:
+            self._sinkron()
+            rollup = self._rollup
+        # Rollup hanya ditambah (dan diganti utuh saat muat ulang), jadi query tidak menahan penulisan
+        total_transaksi, total_penjualan, groups = rollup.query(dari, sampai, tuple(group_by))
+        return {
+            "total_transaksi": total_transaksi,
+            "total_penjualan": total_penjualan,
+            "groups": groups
+        }
     
+    @waktu_komponen('storage')
     def hitung_total_penjualan(self):
         """Hitung total penjualan"""
-        data = self._read()
-        return sum(t['harga'] for t in data)
+        with self._lock:
+            self._sinkron()
+            return self._ringkasan.total_penjualan
     
+    @waktu_komponen('storage')
     def hitung_total_transaksi(self):
         """Hitung jumlah transaksi"""
-        return len(self._read())
+        with self._lock:
+            self._sinkron()
+            return self._ringkasan.total_transaksi
 
 
 # Singleton instance
@@ -0,0 +1,294 @@
+"""
+Katalog module untuk daftar produk
+Response /api/produk diserialisasi sekali per versi katalog, lengkap
+dengan ETag dan varian gzip yang sudah dikompresi
+
+products.json dipantau oleh Katalog: perubahan dideteksi lewat stat file
+(dibatasi per interval), di-parse di background thread, lalu snapshot baru
+dipasang sekaligus. Request yang sedang berjalan tetap memakai snapshot
+yang diambilnya di awal, jadi selalu melihat satu versi katalog yang konsisten
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from config import DAFTAR_PRODUK, FILE_PRODUK, load_produk_file
+
+# Simpan varian gzip dari response katalog (matikan dengan KASIR_KATALOG_GZIP=0)
+KATALOG_GZIP = os.environ.get("KASIR_KATALOG_GZIP", "1") != "0"
+# Jeda minimal (detik) antar pengecekan perubahan products.json
+KATALOG_CHECK_INTERVAL = float(os.environ.get("KASIR_KATALOG_INTERVAL", "2"))
+
+
+def _tokens(teks):
+    """Pecah teks menjadi token huruf/angka lowercase"""
+    return re.findall(r'[0-9a-z]+', teks.lower())
+
+
+def _trigram(teks):
+    return {teks[i:i + 3] for i in range(len(teks) - 2)}
+
+
+class IndexKatalog:
+    """
+    Index pencarian untuk satu snapshot katalog:
+    - bucket per kategori (case-insensitive)
+    - daftar harga terurut untuk filter rentang harga (bisect)
+    - daftar kode terurut untuk pencarian prefix kode (bisect)
+    - token nama terurut untuk pencarian prefix kata, dan trigram untuk substring
+    """
+
+    def __init__(self, produk):
+        self.urutan = {kode: i for i, kode in enumerate(produk)}
+        self.kategori = {}
+        token_index = {}
+        self.trigram = {}
+        for kode, info in produk.items():
+            self.kategori.setdefault(str(info['kategori']).lower(), []).append(kode)
+            nama = str(info['nama']).lower()
+            for token in _tokens(nama):
+                token_index.setdefault(token, set()).add(kode)
+            for tri in _trigram(nama):
+                self.trigram.setdefault(tri, set()).add(kode)
+
+        by_harga = sorted((info['harga'], kode) for kode, info in produk.items())
+        self.harga = [h for h, _ in by_harga]
+        self.harga_kode = [k for _, k in by_harga]
+        self.kode = sorted(produk)
+        self.kode_upper = [k.upper() for k in self.kode]
+        self.token = sorted(token_index)
+        self.token_kode = [token_index[t] for t in self.token]
+        self.nama = {kode: str(info['nama']).lower() for kode, info in produk.items()}
+
+    @staticmethod
+    def _rentang_prefix(sorted_list, prefix):
+        return bisect_left(sorted_list, prefix), bisect_left(sorted_list, prefix + '\uffff')
+
+    def _by_kode_prefix(self, prefix):
+        awal, akhir = self._rentang_prefix(self.kode_upper, prefix.upper())
+        return set(self.kode[awal:akhir])
+
+    def _by_harga(self, min_harga, max_harga):
+        awal = 0 if min_harga is None else bisect_left(self.harga, min_harga)
+        akhir = len(self.harga) if max_harga is None else bisect_right(self.harga, max_harga)
+        return set(self.harga_kode[awal:akhir])
+
+    def _by_token_prefix(self, query):
+        """Setiap kata di query harus menjadi awalan salah satu kata di nama produk"""
+        hasil = None
+        for kata in _tokens(query):
+            awal, akhir = self._rentang_prefix(self.token, kata)
+            cocok = set().union(*self.token_kode[awal:akhir])
+            hasil = cocok if hasil is None else hasil & cocok
+            if not hasil:
+                return set()
+        return hasil if hasil is not None else set(self.urutan)
+
+    def _by_substring(self, teks, kandidat):
+        teks = teks.lower()
+        trigrams = _trigram(teks)
+        if trigrams:
+            sets = sorted((self.trigram.get(t, set()) for t in trigrams), key=len)
+            dari_index = set.intersection(*sets)
+            kandidat = dari_index if kandidat is None else kandidat & dari_index
+        elif kandidat is None:
+            kandidat = self.urutan.keys()
+        return {kode for kode in kandidat if teks in self.nama[kode]}
+
+    def cari(self, kategori=None, min_harga=None, max_harga=None, q=None, nama=None, kode=None):
+        """Kode produk yang cocok dengan semua filter, urut sesuai katalog"""
+        sets = []
+        if kategori:
+            sets.append(set(self.kategori.get(kategori.lower(), ())))
+        if min_harga is not None or max_harga is not None:
+            sets.append(self._by_harga(min_harga, max_harga))
+        if kode:
+            sets.append(self._by_kode_prefix(kode))
+        if q:
+            sets.append(self._by_token_prefix(q))
+
+        kandidat = None
+        if sets:
+            sets.sort(key=len)
+            kandidat = set.intersection(*sets)
+        if nama:
+            kandidat = self._by_substring(nama, kandidat)
+        if kandidat is None:
+            return list(self.urutan)
+        return sorted(kandidat, key=self.urutan.__getitem__)
+
+
+class SnapshotKatalog:
+    """
+    Satu versi katalog beserta response yang sudah diserialisasi
+    Snapshot tidak pernah diubah setelah dibuat; versi baru = snapshot baru
+    """
+
+    def __init__(self, produk):
+        self.produk = produk
+        produk_list = [
+            {
+                "kode": kode,
+                "nama": info['nama'],
+                "harga": info['harga'],
+                "kategori": info['kategori']
+            }
+            for kode, info in produk.items()
+        ]
+        self.body = json.dumps({
+            "status": "success",
+            "data": produk_list,
+            "total": len(produk_list)
+        }, separators=(',', ':')).encode('utf-8')
+        self.versi = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = self.versi
+        self.body_gzip = gzip.compress(self.body, compresslevel=9, mtime=0) if KATALOG_GZIP else None
+        self.etag_gzip = self.versi + "-gzip"
+        self.index = IndexKatalog(produk)
+
+    def cari(self, **filter):
+        """List produk (format response /api/produk) yang cocok dengan filter"""
+        return [
+            {
+                "kode": kode,
+                "nama": self.produk[kode]['nama'],
+                "harga": self.produk[kode]['harga'],
+                "kategori": self.produk[kode]['kategori']
+            }
+            for kode in self.index.cari(**filter)
+        ]
+
+
+class Katalog:
+    """Holder snapshot katalog aktif yang di-reload otomatis saat products.json berubah"""
+
+    def __init__(self, path=FILE_PRODUK, produk=DAFTAR_PRODUK, interval=KATALOG_CHECK_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self._snapshot = SnapshotKatalog(produk)
+        self._signature = self._stat()
+        self._last_check = time.monotonic()
+        self._lock = threading.Lock()
+        self._reload_thread = None
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def current(self):
+        """Snapshot aktif; sesekali mengecek file dan memicu reload di background"""
+        now = time.monotonic()
+        if now - self._last_check >= self.interval:
+            self._cek_perubahan(now)
+        return self._snapshot
+
+    def _cek_perubahan(self, now):
+        with self._lock:
+            if now - self._last_check < self.interval:
+                return
+            self._last_check = now
+            signature = self._stat()
+            if signature == self._signature or signature is None:
+                return
+            if self._reload_thread is not None and self._reload_thread.is_alive():
+                return
+            self._reload_thread = threading.Thread(
+                target=self.muat_ulang, args=(signature,), name="katalog-reload", daemon=True
+            )
+            self._reload_thread.start()
+
+    def muat_ulang(self, signature=None):
+        """Parse products.json dan pasang snapshot baru (katalog lama dipertahankan jika file tidak valid)"""
+        signature = signature or self._stat()
+        produk = load_produk_file(self.path)
+        # Signature dicatat walau gagal agar file rusak tidak di-parse berulang kali
+        self._signature = signature
+        if produk is None:
+            return False
+        self._snapshot = SnapshotKatalog(produk)
+        return True
+
+
+def diff_katalog(lama, baru):
+    """
+    Bandingkan dua katalog (kode -> {nama, harga, kategori})
+    Return dict list kode: added, removed, price_changed, updated (nama/kategori berubah)
+    """
+    kode_lama, kode_baru = set(lama), set(baru)
+    sama = kode_lama & kode_baru
+    return {
+        "added": sorted(kode_baru - kode_lama),
+        "removed": sorted(kode_lama - kode_baru),
+        "price_changed": sorted(k for k in sama if lama[k].get('harga') != baru[k].get('harga')),
+        "updated": sorted(
+            k for k in sama
+            if (lama[k].get('nama'), lama[k].get('kategori')) != (baru[k].get('nama'), baru[k].get('kategori'))
+        ),
+    }
+
+
+def tulis_katalog(path, produk):
+    """Tulis products.json secara atomic (file sementara di folder yang sama lalu rename)"""
+    path = str(path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(produk, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def catat_riwayat_harga(path, lama, baru, diff, tanggal):
+    """
+    Append perubahan harga ke file riwayat (satu baris JSON per kode)
+    `harga` bernilai None untuk produk yang dihapus, `harga_lama` None untuk produk baru
+    Return jumlah baris yang ditulis
+    """
+    baris = []
+    for kode in diff['added']:
+        baris.append({"tanggal": tanggal, "kode": kode, "harga": baru[kode]['harga'], "harga_lama": None})
+    for kode in diff['price_changed']:
+        baris.append({"tanggal": tanggal, "kode": kode, "harga": baru[kode]['harga'], "harga_lama": lama[kode]['harga']})
+    for kode in diff['removed']:
+        baris.append({"tanggal": tanggal, "kode": kode, "harga": None, "harga_lama": lama[kode]['harga']})
+    if not baris:
+        return 0
+    data = ''.join(json.dumps(b, separators=(',', ':'), ensure_ascii=False) + '\n' for b in baris)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(data)
+    return len(baris)
+
+
+def harga_pada(path, kode, tanggal):
+    """
+    Harga produk yang berlaku pada `tanggal` (string DATE_FORMAT) menurut file riwayat harga
+    Return None jika belum tercatat atau produk sudah dihapus saat itu
+    """
+    harga = None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry['tanggal'] > tanggal:
+                    break  # riwayat ditulis berurutan waktu
+                if entry['kode'] == kode:
+                    harga = entry['harga']
+    except FileNotFoundError:
+        return None
+    return harga
+
+
+katalog = Katalog()
+
+
+def snapshot():
+    """Ambil snapshot katalog yang sedang aktif"""
+    return katalog.current()
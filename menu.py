@@ -3,8 +3,9 @@ Menu module untuk UI aplikasi
 """
 
 from datetime import datetime
-from config import DAFTAR_PRODUK, DATE_FORMAT
+from config import DATE_FORMAT
 from database import db
+from katalog import snapshot
 from utils import clear_screen, format_rupiah, tampilkan_separator, input_dengan_validasi
 
 
@@ -24,7 +25,7 @@ class Menu:
         """Tampilkan daftar produk"""
         print("\n📦 DAFTAR PRODUK TERSEDIA:")
         tampilkan_separator()
-        for kode, info in DAFTAR_PRODUK.items():
+        for kode, info in snapshot().produk.items():
             print(f"  {kode:12} | {info['nama']:30} | {format_rupiah(info['harga'])}")
         tampilkan_separator()
     
@@ -47,8 +48,9 @@ class Menu:
         print("\n📊 LAPORAN PENJUALAN")
         tampilkan_separator()
         
-        total_transaksi = db.hitung_total_transaksi()
-        total_penjualan = db.hitung_total_penjualan()
+        ringkasan = db.get_ringkasan()
+        total_transaksi = ringkasan['total_transaksi']
+        total_penjualan = ringkasan['total_penjualan']
         
         print(f"  Total Transaksi  : {total_transaksi} transaksi")
         print(f"  Total Penjualan  : {format_rupiah(total_penjualan)}")
@@ -56,6 +58,10 @@ class Menu:
         if total_transaksi > 0:
             rata_rata = total_penjualan / total_transaksi
             print(f"  Rata-rata/Item  : {format_rupiah(int(rata_rata))}")
+            
+            print("\n  Per Kategori:")
+            for kategori, info in sorted(ringkasan['per_kategori'].items()):
+                print(f"    {kategori:15} | {info['total_transaksi']:>5} trx | {format_rupiah(info['total_penjualan'])}")
         
         tampilkan_separator()
         input("\n⏎ Tekan Enter untuk kembali ke menu...")
@@ -0,0 +1,402 @@
+"""
+Metrik request per route dalam format teks Prometheus
+Setiap worker mencatat jumlah request dan histogram latency per route, plus
+waktu yang dihabiskan di storage (method Database), auth (verify_token) dan
+serialisasi JSON. Di bawah gunicorn atau `uvicorn --workers N` setiap
+worker menyimpan snapshot metriknya ke folder bersama (KASIR_METRICS_DIR)
+secara berkala, dan /metrics menjumlahkan semua worker dari deployment yang
+sama (KASIR_METRICS_GRUP, default pid master/supervisor)
+"""
+
+import atexit
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+from storage import kunci_file
+
+# Batas atas bucket histogram latency (detik)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Folder snapshot metrik per worker gunicorn ("" = hanya metrik proses ini)
+METRICS_DIR = os.environ.get("KASIR_METRICS_DIR", os.path.join(tempfile.gettempdir(), "kasir_metrics"))
+# Id deployment yang metriknya dijumlahkan ("" = pid master gunicorn / supervisor uvicorn)
+METRICS_GRUP = os.environ.get("KASIR_METRICS_GRUP", "")
+# Jeda (detik) antar penulisan snapshot worker; /metrics bisa tertinggal selama ini
+METRICS_FLUSH_INTERVAL = float(os.environ.get("KASIR_METRICS_FLUSH_INTERVAL", "1"))
+# Label route untuk request yang tidak cocok dengan route mana pun (agar jumlah label tetap kecil)
+ROUTE_LAIN = "<lainnya>"
+
+# Waktu komponen untuk request yang sedang berjalan di thread ini
+_lokal = threading.local()
+
+
+def waktu_komponen(komponen, iterasi=False):
+    """
+    Decorator: tambahkan durasi panggilan ke komponen request aktif
+    Di luar request (CLI, script) dan untuk panggilan bersarang hanya memanggil fungsi aslinya.
+    iterasi=True untuk fungsi yang mengembalikan generator: setiap langkah iterasi
+    (mis. saat body response di-stream) ikut dihitung, bukan hanya pembuatannya
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            akumulasi = getattr(_lokal, 'komponen', None)
+            if akumulasi is None or _lokal.aktif:
+                return f(*args, **kwargs)
+            _lokal.aktif = True
+            start = time.perf_counter()
+            try:
+                hasil = f(*args, **kwargs)
+            finally:
+                akumulasi[komponen] = akumulasi.get(komponen, 0.0) + time.perf_counter() - start
+                _lokal.aktif = False
+            return _iter_terukur(hasil, akumulasi, komponen) if iterasi else hasil
+        return wrapper
+    return decorator
+
+
+def _iter_terukur(iterable, akumulasi, komponen):
+    """
+    Generator yang menambahkan waktu setiap next() ke akumulasi milik request pemanggil
+    (dipegang langsung, karena body bisa di-stream dari thread lain)
+    """
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            akumulasi[komponen] = akumulasi.get(komponen, 0.0) + time.perf_counter() - start
+        yield item
+
+
+def _histogram_baru():
+    return [[0] * (len(BUCKETS) + 1), 0.0]
+
+
+def _amati(histogram, detik):
+    histogram[0][bisect_left(BUCKETS, detik)] += 1
+    histogram[1] += detik
+
+
+def _escape(nilai):
+    return str(nilai).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _label(**labels):
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+class Registry:
+    """Counter dan histogram request milik satu proses worker"""
+
+    def __init__(self, folder=METRICS_DIR, grup=METRICS_GRUP or None, flush_interval=METRICS_FLUSH_INTERVAL):
+        self.folder = folder
+        self.flush_interval = flush_interval
+        self._grup = grup
+        self._lock = threading.Lock()
+        self._lock_simpan = threading.Lock()
+        self._kotor = False
+        # pid proses yang sudah punya thread penulis (worker gunicorn dibuat lewat fork)
+        self._pid_penulis = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # (route, method, status) -> jumlah
+            self.requests = {}
+            # (route, method) -> histogram durasi request
+            self.durasi = {}
+            # (route, komponen) -> histogram waktu komponen
+            self.komponen = {}
+
+    @property
+    def grup(self):
+        """
+        Id kelompok proses yang metriknya dijumlahkan: KASIR_METRICS_GRUP jika
+        diisi, pid master untuk worker gunicorn dan pid supervisor untuk worker
+        `uvicorn --workers N` (proses multiprocessing), pid sendiri untuk server
+        satu proses
+        """
+        if self._grup is None:
+            if 'gunicorn' in sys.modules or multiprocessing.parent_process() is not None:
+                return os.getppid()
+            return os.getpid()
+        return self._grup
+
+    def catat(self, route, method, status, detik, komponen):
+        """Catat satu request selesai beserta waktu per komponen"""
+        with self._lock:
+            if self.folder and self._pid_penulis != os.getpid():
+                self._mulai_penulis()
+            key = (route, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            histogram = self.durasi.get((route, method))
+            if histogram is None:
+                histogram = self.durasi[(route, method)] = _histogram_baru()
+            _amati(histogram, detik)
+            for nama, waktu in komponen.items():
+                histogram = self.komponen.get((route, nama))
+                if histogram is None:
+                    histogram = self.komponen[(route, nama)] = _histogram_baru()
+                _amati(histogram, waktu)
+            self._kotor = True
+
+    def data(self):
+        """Salinan metrik proses ini dalam bentuk yang bisa ditulis sebagai JSON"""
+        with self._lock:
+            return {
+                "requests": [[*key, n] for key, n in self.requests.items()],
+                "durasi": [[*key, list(h[0]), h[1]] for key, h in self.durasi.items()],
+                "komponen": [[*key, list(h[0]), h[1]] for key, h in self.komponen.items()]
+            }
+
+    def _path(self):
+        return os.path.join(self.folder, f"{self.grup}-{os.getpid()}.json")
+
+    def _mulai_penulis(self):
+        """Thread latar yang menulis snapshot setiap flush_interval jika ada request baru"""
+        self._pid_penulis = os.getpid()
+
+        def loop():
+            while True:
+                time.sleep(self.flush_interval)
+                self._simpan_jika_kotor()
+
+        threading.Thread(target=loop, name="kasir-metrics", daemon=True).start()
+        atexit.register(self._simpan_jika_kotor)
+
+    def _simpan_jika_kotor(self):
+        if not self._kotor:
+            return
+        try:
+            self.simpan()
+        except OSError:
+            pass  # gagal menulis snapshot metrik tidak boleh mengganggu worker
+
+    def simpan(self):
+        """Tulis snapshot worker ini ke folder metrik (file sementara lalu rename)"""
+        if not self.folder:
+            return
+        with self._lock_simpan:
+            self._kotor = False
+            os.makedirs(self.folder, exist_ok=True)
+            path = self._path()
+            tmp = f"{path}.tmp"
+            with open(tmp, 'w') as f:
+                json.dump(self.data(), f, separators=(',', ':'))
+            os.replace(tmp, path)
+
+    def gabung(self):
+        """
+        Jumlahkan metrik semua worker dalam grup yang sama (termasuk worker yang sudah
+        berhenti, agar counter tidak turun); file dari master yang sudah mati dihapus
+        """
+        if not self.folder:
+            return self.data()
+        self.simpan()
+        grup = str(self.grup)
+        # Dikunci antar worker: pelipatan dan pembacaan tidak boleh bersilangan,
+        # kalau tidak satu worker mati bisa terhitung dua kali dalam satu scrape
+        with kunci_file(os.path.join(self.folder, "gabung")):
+            self._lipat_worker_mati(grup)
+            semua = []
+            for nama in os.listdir(self.folder):
+                pemilik = _pemilik(nama)
+                if pemilik is None:
+                    continue
+                if pemilik[0] != grup:
+                    if pemilik[0].isdigit() and not _pid_hidup(int(pemilik[0])):
+                        _hapus(os.path.join(self.folder, nama))
+                    continue
+                data = _baca_snapshot(os.path.join(self.folder, nama))
+                if data is not None:
+                    semua.append(data)
+        return _jumlahkan(semua)
+
+    def _lipat_worker_mati(self, grup):
+        """
+        Gabungkan snapshot worker grup ini yang sudah berhenti (mis. restart karena
+        max-requests) ke satu file `<grup>-arsip.json`, agar jumlah file tidak terus
+        bertambah selama master hidup
+        """
+        arsip = os.path.join(self.folder, f"{grup}-arsip.json")
+        semua, terlipat = [], []
+        for nama in os.listdir(self.folder):
+            pemilik = _pemilik(nama)
+            if pemilik is None or pemilik[0] != grup or not pemilik[1].isdigit():
+                continue
+            pid = int(pemilik[1])
+            if pid == os.getpid() or _pid_hidup(pid):
+                continue
+            data = _baca_snapshot(os.path.join(self.folder, nama))
+            if data is not None:
+                semua.append(data)
+                terlipat.append(nama)
+        if not terlipat:
+            return
+        lama = _baca_snapshot(arsip)
+        if lama is not None:
+            semua.append(lama)
+        tmp = f"{arsip}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(_jumlahkan(semua), f, separators=(',', ':'))
+        os.replace(tmp, arsip)
+        for nama in terlipat:
+            _hapus(os.path.join(self.folder, nama))
+
+    def render(self):
+        """Metrik gabungan semua worker dalam format teks Prometheus"""
+        data = self.gabung()
+        baris = [
+            "# HELP kasir_http_requests_total Jumlah request HTTP per route, method dan status",
+            "# TYPE kasir_http_requests_total counter"
+        ]
+        for route, method, status, n in sorted(data['requests']):
+            baris.append(f"kasir_http_requests_total{_label(route=route, method=method, status=status)} {n}")
+        baris += [
+            "# HELP kasir_http_request_duration_seconds Latency request HTTP per route",
+            "# TYPE kasir_http_request_duration_seconds histogram"
+        ]
+        for route, method, counts, total in sorted(data['durasi']):
+            baris += _render_histogram("kasir_http_request_duration_seconds", counts, total,
+                                       route=route, method=method)
+        baris += [
+            "# HELP kasir_http_component_duration_seconds Waktu per request di storage, auth dan serialisasi",
+            "# TYPE kasir_http_component_duration_seconds histogram"
+        ]
+        for route, komponen, counts, total in sorted(data['komponen']):
+            baris += _render_histogram("kasir_http_component_duration_seconds", counts, total,
+                                       route=route, component=komponen)
+        return '\n'.join(baris) + '\n'
+
+
+def _pid_hidup(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # proses ada, milik user lain
+    return True
+
+
+def _pemilik(nama):
+    """(grup, worker) dari nama file snapshot `<grup>-<worker>.json`, None untuk file lain"""
+    if not nama.endswith('.json') or '-' not in nama:
+        return None
+    return tuple(nama[:-len('.json')].rsplit('-', 1))
+
+
+def _hapus(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _baca_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # worker sedang menulis atau file rusak
+
+
+def _jumlahkan(semua):
+    requests, durasi, komponen = {}, {}, {}
+    for data in semua:
+        for *key, n in data['requests']:
+            key = tuple(key)
+            requests[key] = requests.get(key, 0) + n
+        for tujuan, sumber in ((durasi, data['durasi']), (komponen, data['komponen'])):
+            for a, b, counts, total in sumber:
+                histogram = tujuan.get((a, b))
+                if histogram is None:
+                    histogram = tujuan[(a, b)] = _histogram_baru()
+                histogram[0] = [x + y for x, y in zip(histogram[0], counts)]
+                histogram[1] += total
+    return {
+        "requests": [[*key, n] for key, n in requests.items()],
+        "durasi": [[*key, h[0], h[1]] for key, h in durasi.items()],
+        "komponen": [[*key, h[0], h[1]] for key, h in komponen.items()]
+    }
+
+
+def _render_histogram(nama, counts, total, **labels):
+    baris = []
+    kumulatif = 0
+    for batas, n in zip(BUCKETS + ('+Inf',), counts):
+        kumulatif += n
+        baris.append(f"{nama}_bucket{_label(**labels, le=batas)} {kumulatif}")
+    baris.append(f"{nama}_sum{_label(**labels)} {round(total, 6)}")
+    baris.append(f"{nama}_count{_label(**labels)} {kumulatif}")
+    return baris
+
+
+class MetricsMiddleware:
+    """
+    Middleware WSGI yang mengukur setiap request sampai body selesai dikirim
+    (termasuk response streaming). Label route diisi oleh hook before_request
+    lewat environ['kasir.route']
+    """
+
+    def __init__(self, wsgi_app, registry):
+        self.wsgi_app = wsgi_app
+        self.registry = registry
+
+    def __call__(self, environ, start_response):
+        start = time.perf_counter()
+        akumulasi = {}
+        _lokal.komponen = akumulasi
+        _lokal.aktif = False
+        status = []
+
+        def _start_response(status_line, headers, exc_info=None):
+            status[:] = [status_line.split(' ', 1)[0]]
+            return start_response(status_line, headers, exc_info)
+
+        def selesai():
+            if _lokal.__dict__.get('komponen') is akumulasi:
+                _lokal.komponen = None
+            self.registry.catat(
+                environ.get('kasir.route', ROUTE_LAIN), environ.get('REQUEST_METHOD', ''),
+                status[0] if status else '500', time.perf_counter() - start, akumulasi
+            )
+        try:
+            hasil = self.wsgi_app(environ, _start_response)
+        except BaseException:
+            selesai()
+            raise
+        return BodyWSGI(hasil, selesai)
+
+
+class BodyWSGI:
+    """Body response WSGI yang memanggil `saat_ditutup` setelah server menutupnya"""
+
+    def __init__(self, hasil, saat_ditutup):
+        self._hasil = hasil
+        self._saat_ditutup = saat_ditutup
+
+    def __iter__(self):
+        return iter(self._hasil)
+
+    def close(self):
+        try:
+            close = getattr(self._hasil, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self._saat_ditutup()
+
+
+# Singleton instance
+registry = Registry()
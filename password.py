@@ -0,0 +1,109 @@
+"""
+Password hashing untuk Kasir Digital API
+Menggunakan PBKDF2-HMAC-SHA256 (hashlib) dengan salt acak per user
+
+Hashing sengaja dibuat lambat, jadi dijalankan di thread pool yang
+ukurannya dibatasi: hashlib melepas GIL selama hashing, dan jumlah
+request yang boleh menunggu antrean juga dibatasi agar lonjakan login
+tidak menahan semua worker
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+ALGORITHM = "pbkdf2_sha256"
+
+# Cost (jumlah iterasi PBKDF2), bisa diatur lewat environment
+PASSWORD_ITERATIONS = int(os.environ.get("KASIR_PASSWORD_ITERATIONS", "200000"))
+# Jumlah thread hashing dan batas antrean tambahan
+HASH_WORKERS = int(os.environ.get("KASIR_HASH_WORKERS", str(os.cpu_count() or 2)))
+HASH_QUEUE = int(os.environ.get("KASIR_HASH_QUEUE", "32"))
+# Batas waktu menunggu hasil hashing (detik)
+HASH_TIMEOUT = float(os.environ.get("KASIR_HASH_TIMEOUT", "10"))
+
+
+class PoolPenuh(Exception):
+    """
+    Antrean hashing penuh atau hashing tidak selesai dalam HASH_TIMEOUT,
+    request sebaiknya ditolak cepat (503)
+    """
+
+
+class HashPool:
+    """Thread pool hashing dengan batas jumlah pekerjaan yang berjalan + antre"""
+
+    def __init__(self, workers=HASH_WORKERS, queue=HASH_QUEUE):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hash")
+        self._slot = threading.BoundedSemaphore(workers + queue)
+
+    def run(self, func, *args):
+        """
+        Jalankan func di pool dan tunggu hasilnya, raise PoolPenuh jika antrean
+        penuh atau hasilnya tidak datang dalam HASH_TIMEOUT
+        """
+        if not self._slot.acquire(blocking=False):
+            raise PoolPenuh("Antrean hashing penuh")
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slot.release()
+            raise
+        future.add_done_callback(lambda _: self._slot.release())
+        try:
+            return future.result(timeout=HASH_TIMEOUT)
+        except FutureTimeout:
+            # Pekerjaan tetap selesai di pool dan melepas slotnya sendiri
+            raise PoolPenuh("Hashing melebihi batas waktu") from None
+
+
+hash_pool = HashPool()
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+
+
+def _hash(password, iterations):
+    salt = os.urandom(16)
+    return f"{ALGORITHM}${iterations}${_b64(salt)}${_b64(_pbkdf2(password, salt, iterations))}"
+
+
+def _verify(password, stored):
+    if not is_hashed(stored):
+        # Entry lama (plain text) dari users.json sebelum hashing dipakai
+        return hmac.compare_digest(password.encode('utf-8'), str(stored).encode('utf-8'))
+    _, iterations, salt, expected = stored.split('$')
+    digest = _pbkdf2(password, base64.b64decode(salt), int(iterations))
+    return hmac.compare_digest(_b64(digest), expected)
+
+
+def is_hashed(stored):
+    """Cek apakah nilai password tersimpan sudah berupa hash"""
+    return isinstance(stored, str) and stored.startswith(ALGORITHM + '$') and stored.count('$') == 3
+
+
+def perlu_rehash(stored):
+    """True jika password masih plain text atau cost-nya berbeda dari konfigurasi"""
+    if not is_hashed(stored):
+        return True
+    return int(stored.split('$')[1]) != PASSWORD_ITERATIONS
+
+
+def hash_password(password):
+    """Hash password dengan salt acak (di hash pool)"""
+    return hash_pool.run(_hash, password, PASSWORD_ITERATIONS)
+
+
+def verify_password(password, stored):
+    """Cocokkan password dengan nilai tersimpan (hash atau plain text lama)"""
+    if not is_hashed(stored):
+        return _verify(password, stored)
+    return hash_pool.run(_verify, password, stored)
@@ -0,0 +1,156 @@
+"""
+Profiling cProfile per request yang bisa dinyalakan di production
+Request diprofil jika terpilih sampling (KASIR_PROFILE_RATE) atau jika
+client yang sudah login mengirim header X-Kasir-Profile: 1. Hasilnya
+ditulis sebagai file .prof (format pstats) ke KASIR_PROFILE_DIR; hanya
+KASIR_PROFILE_MAX file terbaru yang disimpan
+"""
+
+import cProfile
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from metrics import BodyWSGI
+
+# Peluang satu request diprofil (0 = sampling mati, hanya lewat header)
+PROFILE_RATE = float(os.environ.get("KASIR_PROFILE_RATE", "0"))
+# Hanya path dengan awalan ini yang ikut sampling, dipisah koma (kosong = semua path)
+PROFILE_PATHS = tuple(p for p in os.environ.get("KASIR_PROFILE_PATHS", "").split(",") if p)
+PROFILE_DIR = os.environ.get("KASIR_PROFILE_DIR", "profiles")
+# Jumlah file profil yang disimpan (yang lebih lama dihapus)
+PROFILE_MAX = int(os.environ.get("KASIR_PROFILE_MAX", "50"))
+# Header untuk meminta profil satu request (butuh token valid)
+PROFILE_HEADER = "X-Kasir-Profile"
+_HEADER_ENVIRON = "HTTP_" + PROFILE_HEADER.upper().replace("-", "_")
+
+# <tanggal>-<jam>-<mikrodetik>-<method>-<path, '/' menjadi '.'>-<durasi>ms-<pid>.prof
+_NAMA_FILE = re.compile(r"^[0-9]{8}-[0-9]{6}-[0-9]{6}-[A-Z]+-[\w.]*-[0-9]+ms-[0-9]+\.prof$")
+
+
+class Profiler:
+    """Memilih request yang diprofil dan mengelola folder hasilnya"""
+
+    def __init__(self, folder=PROFILE_DIR, rate=PROFILE_RATE, paths=PROFILE_PATHS, maks=PROFILE_MAX):
+        self.folder = folder
+        self.rate = rate
+        self.paths = paths
+        self.maks = maks
+        # Hanya satu profil aktif per proses (cProfile di Python 3.12+ tidak bisa paralel)
+        self._aktif = threading.Lock()
+
+    def terpilih_sampling(self, path):
+        if self.rate <= 0 or (self.paths and not path.startswith(self.paths)):
+            return False
+        return random.random() < self.rate
+
+    def mulai(self):
+        """cProfile.Profile yang sudah aktif, atau None jika proses ini sedang memprofil request lain"""
+        if not self._aktif.acquire(blocking=False):
+            return None
+        profil = cProfile.Profile()
+        try:
+            profil.enable()
+        except ValueError:  # profiler lain (debugger, coverage) sedang aktif
+            self._aktif.release()
+            return None
+        return profil
+
+    def selesai(self, profil, method, path, detik):
+        """Hentikan profil, tulis ke folder, lalu buang file lama di luar batas"""
+        profil.disable()
+        self._aktif.release()
+        os.makedirs(self.folder, exist_ok=True)
+        slug = re.sub(r"[^\w.]+", "_", path.strip("/").replace("/", "."))[:60]
+        nama = (f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{method}-{slug}-"
+                f"{int(detik * 1000)}ms-{os.getpid()}.prof")
+        path_file = os.path.join(self.folder, nama)
+        profil.dump_stats(f"{path_file}.tmp")
+        os.replace(f"{path_file}.tmp", path_file)
+        self.rotasi()
+        return nama
+
+    def rotasi(self):
+        for nama in self.daftar()[self.maks:]:
+            try:
+                os.remove(os.path.join(self.folder, nama['nama']))
+            except OSError:
+                pass  # sudah dihapus worker lain
+
+    def daftar(self):
+        """File profil terbaru lebih dulu: nama, waktu, method, path, durasi_ms, ukuran"""
+        try:
+            semua = [n for n in os.listdir(self.folder) if _NAMA_FILE.match(n)]
+        except FileNotFoundError:
+            return []
+        hasil = []
+        for nama in sorted(semua, reverse=True):
+            tanggal, jam, _, method, slug, durasi, _ = nama[:-len(".prof")].split("-", 6)
+            try:
+                ukuran = os.path.getsize(os.path.join(self.folder, nama))
+            except OSError:
+                continue
+            hasil.append({
+                "nama": nama,
+                "waktu": datetime.strptime(f"{tanggal}{jam}", "%Y%m%d%H%M%S").isoformat(sep=' '),
+                "method": method,
+                "path": "/" + slug.replace(".", "/"),
+                "durasi_ms": int(durasi[:-2]),
+                "ukuran": ukuran
+            })
+        return hasil
+
+    def path_file(self, nama):
+        """Path lengkap file profil, None jika nama tidak valid atau file tidak ada"""
+        if not _NAMA_FILE.match(nama):
+            return None
+        path = os.path.join(self.folder, nama)
+        return path if os.path.isfile(path) else None
+
+
+class ProfilerMiddleware:
+    """
+    Middleware WSGI yang memprofil request terpilih sampai body selesai dikirim
+    `verifikasi_token(token) -> (payload, valid)` dipakai untuk header X-Kasir-Profile
+    """
+
+    def __init__(self, wsgi_app, profiler, verifikasi_token):
+        self.wsgi_app = wsgi_app
+        self.profiler = profiler
+        self.verifikasi_token = verifikasi_token
+
+    def _diminta(self, environ):
+        if environ.get(_HEADER_ENVIRON) != "1":
+            return False
+        bagian = environ.get("HTTP_AUTHORIZATION", "").split(" ")
+        return len(bagian) == 2 and self.verifikasi_token(bagian[1])[1]
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "")
+        if not (self.profiler.terpilih_sampling(path) or self._diminta(environ)):
+            return self.wsgi_app(environ, start_response)
+        profil = self.profiler.mulai()
+        if profil is None:
+            return self.wsgi_app(environ, start_response)
+
+        start = time.perf_counter()
+        method = environ.get("REQUEST_METHOD", "")
+
+        def selesai():
+            try:
+                self.profiler.selesai(profil, method, path, time.perf_counter() - start)
+            except OSError:
+                pass  # gagal menulis profil tidak boleh menggagalkan request
+
+        try:
+            hasil = self.wsgi_app(environ, start_response)
+        except BaseException:
+            selesai()
+            raise
+        return BodyWSGI(hasil, selesai)
+
+
+# Singleton instance
+profiler = Profiler()
@@ -9,7 +9,7 @@ import sys
 if __name__ == '__main__':
     # Run pytest
     result = subprocess.run(
-        [sys.executable, '-m', 'pytest', 'tests/test_api.py', '-v', '--tb=short'],
+        [sys.executable, '-m', 'pytest', 'tests/', '-v', '--tb=short'],
         cwd='.'
     )
     sys.exit(result.returncode)
@@ -1,104 +1,170 @@
 """
 Import products from an Excel price list and write `products.json`.
 
-Expected Excel columns (case-insensitive):
-- code (product code, e.g. ML_86)
-- nama (product name)
-- harga (price, numeric)
-- kategori (category string)
+Expected Excel columns (case-insensitive, header may sit below a title row):
+- code / kode (product code, e.g. ML_86)
+- nama / keterangan (product name)
+- harga / harga umum (price, numeric)
+- kategori / produk (category string)
 
 Usage:
-    pip install pandas openpyxl
-    python scripts/import_products_from_xls.py path/to/Daftar_Harga_01_Dec_2025.xls
+    pip install pandas openpyxl xlrd
+    python scripts/import_products_from_xls.py path/to/Daftar_Harga_01_Dec_2025.xls [--diff-out diff.json]
 
-The script will create `products.json` in the project root. Restart the app to load the new catalog.
+The new catalog is compared with the current `products.json`: added, removed and
+price-changed codes are printed (and written to --diff-out), the catalog is replaced
+atomically, and every change is appended to `price_history.ndjson` so reports can
+look up the price that was in effect at a given time (katalog.harga_pada).
+
+The script will create `products.json` in the project root. Running app workers pick up
+the new catalog automatically (see katalog.Katalog), no restart needed.
 """
 
+import io
 import sys
 import os
 import json
 from pathlib import Path
 
 try:
+    import numpy as np
     import pandas as pd
 except Exception as e:
-    print("Missing dependency: pandas. Install with: pip install pandas openpyxl")
+    print("Missing dependency: pandas. Install with: pip install pandas openpyxl xlrd")
     raise
 
 
+# Kolom yang dicari (nama kolom dinormalisasi ke lowercase)
+POSSIBLE_CODE_COLS = ['code', 'kode', 'kode_produk', 'product_code']
+POSSIBLE_NAME_COLS = ['nama', 'name', 'product_name', 'keterangan']
+POSSIBLE_PRICE_COLS = ['harga', 'price', 'harga_rp', 'harga umum']
+POSSIBLE_CAT_COLS = ['kategori', 'category', 'produk']
+
+# Jumlah baris teratas yang diperiksa untuk mencari baris header
+# (daftar harga dari supplier biasanya diawali baris judul)
+HEADER_SCAN_ROWS = 10
+
+
 def normalize_column_name(name):
     return str(name).strip().lower()
 
 
-def read_excel_to_products(excel_path: Path):
-    """Read Excel file and convert to products dict. Supports both .xls and .xlsx formats."""
+def find_columns(columns):
+    """Cari kolom code/name/price/category dari list nama kolom, return dict posisi kolom atau None"""
+    normalized = [normalize_column_name(c) for c in columns]
+
+    def find_col(possibles):
+        for p in possibles:
+            if p in normalized:
+                return normalized.index(p)
+        return None
+
+    found = {
+        'code': find_col(POSSIBLE_CODE_COLS),
+        'name': find_col(POSSIBLE_NAME_COLS),
+        'price': find_col(POSSIBLE_PRICE_COLS),
+        'cat': find_col(POSSIBLE_CAT_COLS),
+    }
+    if found['code'] is None or found['name'] is None or found['price'] is None:
+        return None
+    return found
+
+
+def open_excel(excel_path: Path):
+    """Buka workbook sekali (ExcelFile) agar header dan data bisa dibaca tanpa parse ulang file"""
     file_ext = str(excel_path).lower()
-    
+
     # For .xls files (legacy format), use xlrd engine
     if file_ext.endswith('.xls'):
-        engine = 'xlrd'
+        # Beberapa export .xls ditandai "corrupt" oleh xlrd padahal isinya terbaca normal
+        return pd.ExcelFile(excel_path, engine='xlrd', engine_kwargs={
+            'ignore_workbook_corruption': True,
+            'logfile': io.StringIO(),
+        })
     # For .xlsx files, use openpyxl engine
-    elif file_ext.endswith('.xlsx'):
-        engine = 'openpyxl'
+    if file_ext.endswith('.xlsx'):
+        return pd.ExcelFile(excel_path, engine='openpyxl')
+    return pd.ExcelFile(excel_path)
+
+
+def detect_header(xl):
+    """Cari baris header di beberapa baris teratas, return (nomor_baris, posisi_kolom)"""
+    top = xl.parse(header=None, nrows=HEADER_SCAN_ROWS)
+    for row_number, values in enumerate(top.itertuples(index=False)):
+        found = find_columns(values)
+        if found:
+            return row_number, found
+    raise ValueError(f"Required columns not found. Found columns: {[normalize_column_name(c) for c in top.iloc[0]]}")
+
+
+def _as_str(series):
+    """Versi kolom sebagai string ter-strip (nilai kosong menjadi 'nan' seperti str(NaN))"""
+    return series.astype(object).where(series.notna(), 'nan').astype(str).str.strip()
+
+
+def clean_products(df, code_col, name_col, price_col, cat_col=None):
+    """
+    Bersihkan DataFrame menjadi dict products secara column-wise (tanpa iterasi per baris)
+    - kode di-strip, baris dengan kode kosong/NaN dibuang
+    - harga: konversi numerik (dibulatkan ke bawah menuju nol), fallback ambil digit saja, default 0
+    - kategori kosong/NaN menjadi 'Lainnya'
+    """
+    code = _as_str(df[code_col])
+    keep = df[code_col].notna() & code.ne('') & code.str.lower().ne('nan')
+    df = df[keep]
+    code = code[keep]
+
+    name = _as_str(df[name_col])
+
+    raw_price = df[price_col]
+    price = pd.to_numeric(raw_price, errors='coerce')
+    price = price.where(np.isfinite(price))
+    digits = raw_price.astype(object).astype(str).str.replace(r'\D', '', regex=True)
+    fallback = pd.to_numeric(digits, errors='coerce').fillna(0)
+    harga = np.trunc(price.fillna(fallback)).astype('int64')
+
+    if cat_col is not None:
+        raw_cat = df[cat_col]
+        kategori = _as_str(raw_cat)
+        kosong = ~raw_cat.astype(object).astype(bool) | kategori.eq('') | kategori.str.lower().eq('nan')
+        kategori = kategori.mask(kosong, 'Lainnya')
     else:
-        engine = None
-    
-    df = pd.read_excel(excel_path, engine=engine)
-    # Normalize column names
-    df.columns = [normalize_column_name(c) for c in df.columns]
-
-    # Try to detect columns
-    possible_code_cols = ['code', 'kode', 'kode_produk', 'product_code']
-    possible_name_cols = ['nama', 'name', 'product_name']
-    possible_price_cols = ['harga', 'price', 'harga_rp']
-    possible_cat_cols = ['kategori', 'category']
+        kategori = pd.Series('Lainnya', index=df.index)
 
-    def find_col(possibles):
-        for p in possibles:
-            if p in df.columns:
-                return p
-        return None
-
-    code_col = find_col(possible_code_cols)
-    name_col = find_col(possible_name_cols)
-    price_col = find_col(possible_price_cols)
-    cat_col = find_col(possible_cat_cols)
+    return {
+        c: {'nama': n, 'harga': h, 'kategori': k}
+        for c, n, h, k in zip(code.tolist(), name.tolist(), harga.tolist(), kategori.tolist())
+    }
 
-    if not code_col or not name_col or not price_col:
-        raise ValueError(f"Required columns not found. Found columns: {list(df.columns)}")
 
-    products = {}
-    for _, row in df.iterrows():
-        code = str(row[code_col]).strip()
-        if not code or code.lower() == 'nan':
-            continue
-        name = str(row[name_col]).strip()
-        # price normalization
-        try:
-            harga = int(float(row[price_col]))
-        except Exception:
-            # try removing non-digits
-            harga_str = str(row[price_col])
-            digits = ''.join(ch for ch in harga_str if ch.isdigit())
-            harga = int(digits) if digits else 0
+def read_excel_to_products(excel_path: Path):
+    """Read Excel file and convert to products dict. Supports both .xls and .xlsx formats."""
+    with open_excel(excel_path) as xl:
+        header_row, cols = detect_header(xl)
+        # Baca hanya kolom yang dibutuhkan
+        usecols = sorted(i for i in cols.values() if i is not None)
+        df = xl.parse(header=header_row, usecols=usecols)
 
-        kategori = str(row[cat_col]).strip() if cat_col and row[cat_col] and str(row[cat_col]).strip().lower() != 'nan' else 'Lainnya'
+    columns = {key: df.columns[usecols.index(i)] for key, i in cols.items() if i is not None}
+    return clean_products(df, columns['code'], columns['name'], columns['price'], columns.get('cat'))
 
-        products[code] = {
-            'nama': name,
-            'harga': harga,
-            'kategori': kategori
-        }
 
-    return products
+def main():
+    import argparse
 
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from datetime import datetime
+    from config import DATE_FORMAT, load_produk_file
+    from katalog import catat_riwayat_harga, diff_katalog, tulis_katalog
 
-if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Usage: python scripts/import_products_from_xls.py path/to/Daftar_Harga.xls")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Import products from an Excel price list")
+    parser.add_argument('excel', help="path/to/Daftar_Harga.xls")
+    parser.add_argument('--out', default=str(Path(os.getcwd()) / 'products.json'), help="products.json tujuan")
+    parser.add_argument('--history', default=None, help="file riwayat harga (default: price_history.ndjson di folder --out)")
+    parser.add_argument('--diff-out', default=None, help="tulis daftar kode yang berubah ke file JSON")
+    args = parser.parse_args()
 
-    excel_path = Path(sys.argv[1])
+    excel_path = Path(args.excel)
     if not excel_path.exists():
         print(f"File not found: {excel_path}")
         sys.exit(2)
@@ -109,8 +175,30 @@ if __name__ == '__main__':
         print("Failed to parse Excel:", e)
         sys.exit(3)
 
-    out_path = Path(os.getcwd()) / 'products.json'
-    with open(out_path, 'w', encoding='utf-8') as f:
-        json.dump(products, f, indent=2, ensure_ascii=False)
+    out_path = Path(args.out)
+    history_path = Path(args.history) if args.history else out_path.parent / 'price_history.ndjson'
+    current = load_produk_file(out_path) or {}
+    diff = diff_katalog(current, products)
+
+    if args.diff_out:
+        with open(args.diff_out, 'w', encoding='utf-8') as f:
+            json.dump(diff, f, indent=2)
+
+    print(f"added: {len(diff['added'])}, removed: {len(diff['removed'])}, "
+          f"price changed: {len(diff['price_changed'])}, updated: {len(diff['updated'])}")
+
+    if not any(diff.values()):
+        # File tidak disentuh agar cache/ETag katalog di app tetap berlaku
+        print(f"No changes, {out_path} left untouched")
+        return
+
+    tulis_katalog(out_path, products)
+    tanggal = datetime.now().strftime(DATE_FORMAT)
+    jumlah = catat_riwayat_harga(history_path, current, products, diff, tanggal)
 
     print(f"Wrote {len(products)} products to {out_path}")
+    print(f"Appended {jumlah} price changes to {history_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Perawatan storage transaksi per bulan (KASIR_STORAGE=segmen).
+
+Usage:
+    python scripts/kelola_segmen.py status
+    python scripts/kelola_segmen.py segel [--sebelum 2025-12]
+    python scripts/kelola_segmen.py kompres
+    python scripts/kelola_segmen.py arsip --sebelum 2025-06
+    python scripts/kelola_segmen.py migrasi transaksi.json [--dari json]
+
+- segel  : tutup segmen aktif yang bulannya sudah lewat (mis. dijalankan cron tanggal 1)
+- kompres: gzip semua segmen tersegel
+- arsip  : pindahkan segmen tersegel sebelum bulan tertentu ke folder arsip/;
+           record-nya tidak dimuat lagi oleh aplikasi, agregatnya tetap masuk laporan
+- migrasi: salin transaksi dari backend lain (json/log/sqlite) ke folder segmen yang masih kosong
+
+Folder segmen default `transaksi_segmen`, bisa diganti dengan --folder.
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import FILE_TRANSAKSI_SEGMEN  # noqa: E402
+from storage import SegmentStorage, buat_storage  # noqa: E402
+
+# Jumlah transaksi per penulisan saat migrasi
+MIGRASI_BATCH = 10000
+
+
+def _bulan(teks):
+    try:
+        datetime.strptime(teks, "%Y-%m")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{teks}' bukan bulan YYYY-MM")
+    return teks
+
+
+def status(storage, args):
+    segmen = storage.manifest()['segmen']
+    if not segmen:
+        print("Belum ada segmen")
+        return
+    print(f"{'bulan':<8} {'status':<7} {'seq':^17} {'transaksi':>10} {'penjualan':>14}  file")
+    for s in segmen:
+        agregat = storage.agregat(s)
+        seq_akhir = s.get('seq_akhir', storage.seq_terakhir() if s['status'] == 'aktif' else '?')
+        jumlah = agregat['total_transaksi'] if agregat else '-'
+        total = agregat['total_penjualan'] if agregat else '-'
+        print(f"{s['bulan']:<8} {s['status']:<7} {s['seq_awal']:>8}-{seq_akhir:<8} {jumlah:>10} {total:>14}  {s['file']}")
+
+
+def segel(storage, args):
+    if storage.segel(args.sebelum):
+        print("Segmen aktif disegel")
+    else:
+        print(f"Tidak ada segmen aktif sebelum {args.sebelum}")
+
+
+def kompres(storage, args):
+    bulan = storage.kompres()
+    print(f"Dikompres: {', '.join(bulan)}" if bulan else "Tidak ada segmen yang perlu dikompres")
+
+
+def arsip(storage, args):
+    bulan = storage.arsipkan(args.sebelum)
+    print(f"Diarsipkan: {', '.join(bulan)}" if bulan else f"Tidak ada segmen tersegel sebelum {args.sebelum}")
+
+
+def migrasi(storage, args):
+    if storage.manifest()['segmen']:
+        print(f"Folder segmen '{storage.dirname}' sudah berisi data")
+        sys.exit(3)
+    if not Path(args.src).exists():
+        print(f"File not found: {args.src}")
+        sys.exit(2)
+    records = (t for _, t in buat_storage(args.dari, args.src).iter_records())
+    jumlah = 0
+    while True:
+        batch = list(islice(records, MIGRASI_BATCH))
+        if not batch:
+            break
+        storage.extend(batch)
+        jumlah += len(batch)
+    print(f"Migrated {jumlah} transaksi from {args.src} to {storage.dirname}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perawatan storage transaksi per bulan")
+    parser.add_argument('--folder', default=FILE_TRANSAKSI_SEGMEN)
+    sub = parser.add_subparsers(dest='perintah', required=True)
+
+    sub.add_parser('status').set_defaults(func=status)
+    p = sub.add_parser('segel')
+    p.add_argument('--sebelum', type=_bulan, default=datetime.now().strftime("%Y-%m"))
+    p.set_defaults(func=segel)
+    sub.add_parser('kompres').set_defaults(func=kompres)
+    p = sub.add_parser('arsip')
+    p.add_argument('--sebelum', type=_bulan, required=True)
+    p.set_defaults(func=arsip)
+    p = sub.add_parser('migrasi')
+    p.add_argument('src')
+    p.add_argument('--dari', default='json', choices=['json', 'log', 'sqlite'])
+    p.set_defaults(func=migrasi)
+
+    args = parser.parse_args()
+    args.func(SegmentStorage(args.folder), args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+"""
+Migrasi satu kali `transaksi.json` (JSON array) ke append-only log `transaksi.ndjson`.
+
+Usage:
+    python scripts/migrate_transaksi_to_log.py [transaksi.json] [transaksi.ndjson]
+
+Setelah migrasi, jalankan aplikasi dengan `KASIR_STORAGE=log` agar memakai log baru.
+File sumber tidak diubah atau dihapus.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from config import FILE_TRANSAKSI, FILE_TRANSAKSI_LOG  # noqa: E402
+from storage import migrasi_json_ke_log  # noqa: E402
+
+
+if __name__ == '__main__':
+    src = sys.argv[1] if len(sys.argv) > 1 else FILE_TRANSAKSI
+    dst = sys.argv[2] if len(sys.argv) > 2 else FILE_TRANSAKSI_LOG
+
+    if not Path(src).exists():
+        print(f"File not found: {src}")
+        sys.exit(2)
+
+    try:
+        jumlah = migrasi_json_ke_log(src, dst)
+    except (FileExistsError, ValueError) as e:
+        print("Migrasi gagal:", e)
+        sys.exit(3)
+
+    print(f"Migrated {jumlah} transaksi from {src} to {dst}")
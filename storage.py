@@ -0,0 +1,930 @@
+"""
+Storage backend untuk data transaksi
+Setiap backend menyimpan transaksi sesuai urutan masuk dan memberi
+nomor urut (seq) mulai dari 1 untuk setiap record
+
+Penulisan aman untuk banyak proses (gunicorn dengan beberapa worker):
+setiap penulisan memegang file lock, dan append dari banyak thread
+digabung menjadi satu penulisan + fsync (group commit)
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from array import array
+from bisect import bisect_right
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# fsync setelah setiap group commit pada log (matikan hanya untuk benchmark/test)
+FSYNC = os.environ.get("KASIR_FSYNC", "1") != "0"
+# Kompres segmen bulanan dengan gzip langsung saat disegel
+SEGMEN_GZIP = os.environ.get("KASIR_SEGMEN_GZIP", "0") == "1"
+
+_SPASI = re.compile(rb"\s*")
+
+
+@contextmanager
+def kunci_file(path):
+    """Exclusive lock antar proses memakai file `<path>.lock`"""
+    with open(path + '.lock', 'a+b') as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class _Permintaan:
+    """Satu permintaan append yang menunggu giliran ditulis"""
+
+    __slots__ = ('items', 'seqs', 'error', 'selesai')
+
+    def __init__(self, items):
+        self.items = items
+        self.seqs = None
+        self.error = None
+        self.selesai = False
+
+
+class GroupCommit:
+    """
+    Menggabungkan append dari banyak thread menjadi satu penulisan
+    Thread pertama yang datang saat tidak ada penulisan berjalan menjadi
+    leader: ia menulis semua permintaan yang sedang antre sekaligus,
+    sementara thread lain menunggu hasilnya
+    """
+
+    def __init__(self, tulis_batch):
+        self._tulis_batch = tulis_batch
+        self._cond = threading.Condition()
+        self._antrian = []
+        self._sedang_menulis = False
+
+    def submit(self, items):
+        """Tulis list transaksi, return list seq (urutan sama dengan items)"""
+        permintaan = _Permintaan(items)
+        with self._cond:
+            self._antrian.append(permintaan)
+            while self._sedang_menulis and not permintaan.selesai:
+                self._cond.wait()
+            if not permintaan.selesai:
+                self._sedang_menulis = True
+                batch, self._antrian = self._antrian, []
+            else:
+                batch = None
+
+        if batch is not None:
+            try:
+                seqs = self._tulis_batch([t for p in batch for t in p.items])
+                pos = 0
+                for p in batch:
+                    p.seqs = seqs[pos:pos + len(p.items)]
+                    pos += len(p.items)
+            except Exception as e:
+                for p in batch:
+                    p.error = e
+            finally:
+                with self._cond:
+                    for p in batch:
+                        p.selesai = True
+                    self._sedang_menulis = False
+                    self._cond.notify_all()
+
+        if permintaan.error is not None:
+            raise permintaan.error
+        return permintaan.seqs
+
+
+class Storage:
+    """
+    Base class backend. Storage hanya menulis dan membaca ulang record berdasarkan
+    seq; query (nama, tanggal, operator, total) dijawab salinan in-memory di Database
+    """
+
+    def _tulis_batch(self, daftar):
+        """Tulis list transaksi dalam satu penulisan, return list seq-nya"""
+        raise NotImplementedError
+
+    @property
+    def _writer(self):
+        writer = self.__dict__.get('_group_commit')
+        if writer is None:
+            writer = self.__dict__.setdefault('_group_commit', GroupCommit(self._tulis_batch))
+        return writer
+
+    def append(self, transaksi):
+        """Tambahkan satu transaksi, return seq yang diberikan"""
+        return self._writer.submit([transaksi])[0]
+
+    def extend(self, daftar):
+        """Tambahkan banyak transaksi dalam satu penulisan, return list seq"""
+        if not daftar:
+            return []
+        return self._writer.submit(list(daftar))
+
+    def seq_terakhir(self):
+        """Seq terbesar yang sudah tersimpan (0 jika kosong)"""
+        raise NotImplementedError
+
+    def iter_records(self):
+        raise NotImplementedError
+
+    def iter_from(self, after_seq=0):
+        """(seq, transaksi) dengan seq > after_seq, urut berdasarkan seq"""
+        return ((seq, t) for seq, t in self.iter_records() if seq > after_seq)
+
+    def berubah_dari_luar(self, seq):
+        """
+        True jika record sampai `seq` (yang sudah dibaca pemanggil) mungkin sudah diubah
+        atau diganti dari luar, sehingga salinan in-memory harus dibangun ulang
+        Backend append-only cukup membaca record dengan seq baru
+        """
+        return False
+
+    def agregat_arsip(self):
+        """
+        Agregat data yang sudah diarsipkan (tidak lagi dibaca per record),
+        list dict hasil agregat_transaksi(); kosong untuk backend tanpa arsip
+        """
+        return []
+
+    def versi(self):
+        """
+        Penanda murah (tanpa membaca data) yang berubah setiap isi storage berubah,
+        dipakai untuk mendeteksi perubahan dari luar proses ini
+        """
+        try:
+            st = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+
+class JsonStorage(Storage):
+    """Format lama: satu file JSON array yang ditulis ulang setiap kali ada transaksi"""
+
+    def __init__(self, filename):
+        self.filename = filename
+        # (versi, jumlah record, seq awal, batch) dari penulisan terakhir proses ini.
+        # Salinan in-memory untuk query ada di Database
+        self._terakhir = (None, 0, 0, [])
+        # Sidik isi file terakhir yang dibaca/ditulis proses ini: (jumlah record, panjang byte
+        # sebelum ']' penutup, hash bagian itu). Isi baru yang diawali byte yang sama hanya
+        # menambah record di belakang (penulisan worker lain), jadi tidak perlu muat ulang
+        self._sidik = (0, 0, None)
+        # True jika sejak muat penuh terakhir ada isi yang bukan sekadar tambahan (diedit dari luar)
+        self._putus = False
+        # (versi, bytes, data) isi yang baru dibaca, dipakai ulang sampai iter_from berikutnya
+        self._cache = (None, None, None)
+        self._lock = threading.Lock()
+        if not os.path.exists(self.filename):
+            with kunci_file(self.filename):
+                if not os.path.exists(self.filename):
+                    self._write([])
+
+    def _baca(self):
+        """(versi, bytes, data) isi file saat ini; file hanya dibaca dan di-parse sekali per versi"""
+        try:
+            with open(self.filename, 'rb') as f:
+                st = os.fstat(f.fileno())
+                versi = (st.st_ino, st.st_size, st.st_mtime_ns)
+                if versi == self._cache[0]:
+                    return self._cache
+                raw = f.read()
+        except FileNotFoundError:
+            return None, b'[]', []
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            data = []
+        self._cache = (versi, raw, data)
+        return self._cache
+
+    def _read(self):
+        """Baca semua transaksi dari file"""
+        return self._baca()[2]
+
+    def _lepas_cache(self):
+        self._cache = (None, None, None)
+
+    @staticmethod
+    def _sidik_dari(raw, jumlah):
+        i = len(raw)
+        while i and raw[i - 1] in b' \t\r\n':
+            i -= 1
+        if not i or raw[i - 1] != ord(']'):
+            return jumlah, 0, None
+        i -= 1
+        while i and raw[i - 1] in b' \t\r\n':
+            i -= 1
+        return jumlah, i, hashlib.sha1(memoryview(raw)[:i]).digest()
+
+    def _lanjutan(self, raw):
+        """True jika `raw` berisi record yang terakhir dilihat tanpa perubahan, ditambah record baru"""
+        jumlah, panjang, digest = self._sidik
+        if jumlah == 0:
+            return True
+        if digest is None or len(raw) <= panjang or hashlib.sha1(memoryview(raw)[:panjang]).digest() != digest:
+            return False
+        berikut = _SPASI.match(raw, panjang).end()
+        return raw[berikut:berikut + 1] in (b',', b']')
+
+    def _masih_terakhir(self):
+        """True jika file belum berubah sejak penulisan terakhir proses ini"""
+        versi = self._terakhir[0]
+        return versi is not None and versi == self.versi()
+
+    def _write(self, data):
+        """
+        Simpan transaksi ke file (tulis ke file sementara lalu rename, agar atomic)
+        Return isi yang ditulis (bytes)
+        """
+        raw = json.dumps(data, indent=2).encode('utf-8')
+        tmp = f"{self.filename}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.filename)
+        return raw
+
+    def _tulis_batch(self, daftar):
+        with kunci_file(self.filename), self._lock:
+            _, raw, data = self._baca()
+            if not self._lanjutan(raw):
+                # Isi yang akan dilanjutkan sudah diedit pihak lain sejak terakhir dilihat
+                self._putus = True
+            awal = len(data)
+            data = data + list(daftar)
+            raw = self._write(data)
+            self._sidik = self._sidik_dari(raw, len(data))
+            self._lepas_cache()
+            self._terakhir = (self.versi(), len(data), awal, list(daftar))
+        return list(range(awal + 1, len(data) + 1))
+
+    def berubah_dari_luar(self, seq):
+        # File JSON bisa diedit atau diganti tanpa mengubah jumlah record. Penulisan worker
+        # lain hanya menambah record, jadi prefix byte isi yang sudah dibaca tetap sama
+        with self._lock:
+            if self._putus:
+                return True
+            if self._masih_terakhir():
+                return False  # penulisan sendiri, sudah dicek melanjutkan isi sebelumnya
+            return not self._lanjutan(self._baca()[1])
+
+    def seq_terakhir(self):
+        if self._masih_terakhir():
+            return self._terakhir[1]
+        return len(self._read())
+
+    def iter_records(self):
+        """Iterasi (seq, transaksi) untuk semua record"""
+        data = self._read()
+        self._lepas_cache()
+        return enumerate(data, 1)
+
+    def iter_from(self, after_seq=0):
+        with self._lock:
+            _, _, awal, batch = self._terakhir
+            if after_seq >= awal and self._masih_terakhir():
+                # Record baru hasil penulisan sendiri, tidak perlu parse ulang file
+                return enumerate(batch[after_seq - awal:], after_seq + 1)
+            _, raw, data = self._baca()
+            if after_seq == 0:
+                self._putus = False
+            elif not self._lanjutan(raw):
+                self._putus = True  # berubah lagi sejak dicek; muat ulang di sinkron berikutnya
+            self._sidik = self._sidik_dari(raw, len(data))
+            self._lepas_cache()
+        # seq = posisi di array, jadi bisa langsung di-slice
+        return enumerate(data[after_seq:], after_seq + 1)
+
+
+class LogStorage(Storage):
+    """
+    Append-only log: satu transaksi per baris (newline-delimited JSON)
+    Setiap baris berisi field `seq` ditambah field transaksi, sehingga
+    menambah transaksi cukup satu kali append tanpa membaca ulang file
+    """
+
+    def __init__(self, filename, seq_dasar=0):
+        self.filename = filename
+        # Seq sebelum record pertama file ini (dipakai segmen yang melanjutkan segmen sebelumnya)
+        self.seq_dasar = seq_dasar
+        if not os.path.exists(self.filename):
+            open(self.filename, 'a').close()
+        self.last_seq = self._tail_seq()
+        # Index seq -> byte offset, dibangun saat pertama dibutuhkan lalu diperpanjang
+        self._idx_seq = array('Q')
+        self._idx_offset = array('Q')
+        self._idx_end = 0
+        self._idx_lock = threading.Lock()
+
+    @staticmethod
+    def _parse(line):
+        """Parse satu baris log, return (seq, transaksi) atau None jika rusak"""
+        try:
+            record = json.loads(line)
+            seq = record.pop('seq')
+        except (ValueError, KeyError, AttributeError, TypeError):
+            return None
+        return seq, record
+
+    def _tail_seq(self):
+        """Cari seq terakhir dengan membaca file dari belakang (tanpa scan penuh)"""
+        with open(self.filename, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            pos = f.tell()
+            buf = b''
+            while pos > 0:
+                step = min(4096, pos)
+                pos -= step
+                f.seek(pos)
+                buf = f.read(step) + buf
+                lines = buf.split(b'\n')
+                # Baris pertama bisa terpotong kecuali sudah di awal file
+                candidates = lines if pos == 0 else lines[1:]
+                for line in reversed(candidates):
+                    parsed = self._parse(line) if line.strip() else None
+                    if parsed:
+                        return parsed[0]
+                buf = lines[0] if pos > 0 else b''
+        return self.seq_dasar
+
+    @staticmethod
+    def _encode(seq, transaksi):
+        """Serialisasi satu record ke satu baris log"""
+        record = {"seq": seq}
+        record.update(transaksi)
+        return (json.dumps(record, separators=(',', ':')) + '\n').encode('utf-8')
+
+    def _needs_newline(self, f):
+        """Cek apakah file tidak diakhiri newline (sisa tulisan yang terpotong)"""
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return False
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) != b'\n'
+
+    def _tulis_batch(self, daftar):
+        """
+        Append semua transaksi dengan satu write + fsync
+        Seq terakhir dibaca ulang di dalam lock karena proses lain bisa saja baru menulis
+        """
+        with kunci_file(self.filename):
+            return self._append(daftar)
+
+    def _append(self, daftar):
+        """Append batch ke file; pemanggil harus sudah memegang lock"""
+        seq = self._tail_seq()
+        seqs = list(range(seq + 1, seq + 1 + len(daftar)))
+        data = b''.join(self._encode(s, t) for s, t in zip(seqs, daftar))
+        with open(self.filename, 'a+b') as f:
+            if self._needs_newline(f):
+                data = b'\n' + data
+            f.write(data)
+            f.flush()
+            if FSYNC:
+                os.fsync(f.fileno())
+        self.last_seq = seqs[-1]
+        return seqs
+
+    def seq_terakhir(self):
+        return self._tail_seq()
+
+    def iter_records(self):
+        """Streaming (seq, transaksi) dari log, baris rusak dilewati"""
+        return self._iter_at(0)
+
+    def _iter_at(self, offset):
+        with open(self.filename, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.strip():
+                    continue
+                parsed = self._parse(line)
+                if parsed:
+                    yield parsed
+
+    def _perbarui_index(self):
+        """Tambahkan baris baru (sejak posisi terakhir yang sudah di-index) ke index offset"""
+        with self._idx_lock:
+            if os.path.getsize(self.filename) < self._idx_end:
+                # File diganti/dipotong dari luar, index dibangun ulang
+                self._idx_seq = array('Q')
+                self._idx_offset = array('Q')
+                self._idx_end = 0
+            with open(self.filename, 'rb') as f:
+                f.seek(self._idx_end)
+                offset = self._idx_end
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break  # baris terakhir belum selesai ditulis
+                    parsed = self._parse(line) if line.strip() else None
+                    if parsed:
+                        self._idx_seq.append(parsed[0])
+                        self._idx_offset.append(offset)
+                    offset += len(line)
+                self._idx_end = offset
+
+    def iter_from(self, after_seq=0):
+        """Mulai membaca langsung dari offset record setelah after_seq (tanpa scan dari awal)"""
+        self._perbarui_index()
+        pos = bisect_right(self._idx_seq, after_seq)
+        if pos == len(self._idx_seq):
+            offset = self._idx_end
+        else:
+            offset = self._idx_offset[pos]
+        return ((seq, t) for seq, t in self._iter_at(offset) if seq > after_seq)
+
+
+class SqliteStorage(Storage):
+    """
+    Backend SQLite: satu baris per transaksi, seq dari AUTOINCREMENT.
+    Query API dijawab dari tabel in-memory, jadi tidak ada index tambahan
+    yang harus ikut ditulis pada setiap insert
+    """
+
+    KOLOM = ("tanggal", "nama", "produk", "kategori", "harga", "operator")
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS transaksi (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tanggal TEXT NOT NULL,
+            nama TEXT NOT NULL,
+            produk TEXT NOT NULL,
+            kategori TEXT NOT NULL,
+            harga INTEGER NOT NULL,
+            operator TEXT
+        );
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(self.SCHEMA)
+        self._migrasi(conn)
+
+    def _conn(self):
+        """Koneksi SQLite per thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.filename, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def _migrasi(self, conn):
+        """
+        File .db lama masih punya kolom nama_key (NOT NULL) dan index query
+        yang tidak dipakai lagi: buang sekali, di bawah lock tulis SQLite
+        supaya worker yang start bersamaan tidak memigrasi dua kali
+        """
+        def kolom():
+            return {row[1] for row in conn.execute("PRAGMA table_info(transaksi)")}
+
+        if 'nama_key' not in kolom():
+            return
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if 'nama_key' not in kolom():
+                return
+            for nama in ("nama", "tanggal", "operator"):
+                conn.execute(f"DROP INDEX IF EXISTS idx_transaksi_{nama}")
+            conn.execute("ALTER TABLE transaksi DROP COLUMN nama_key")
+
+    @classmethod
+    def _to_row(cls, transaksi):
+        return (
+            transaksi['tanggal'],
+            transaksi['nama'],
+            transaksi['produk'],
+            transaksi['kategori'],
+            transaksi['harga'],
+            transaksi.get('operator')
+        )
+
+    @classmethod
+    def _to_record(cls, row):
+        """Ubah baris SQL menjadi (seq, transaksi) dengan bentuk dict yang sama seperti JSON"""
+        transaksi = dict(zip(cls.KOLOM, row[1:]))
+        if transaksi['operator'] is None:
+            del transaksi['operator']
+        return row[0], transaksi
+
+    def _query(self, where="", params=()):
+        sql = f"SELECT seq, {', '.join(self.KOLOM)} FROM transaksi {where} ORDER BY seq"
+        for row in self._conn().execute(sql, params):
+            yield self._to_record(row)
+
+    def _tulis_batch(self, daftar):
+        """Insert semua transaksi dalam satu transaksi SQL (SQLite mengunci antar proses)"""
+        conn = self._conn()
+        seqs = []
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for transaksi in daftar:
+                cur = conn.execute(
+                    "INSERT INTO transaksi (tanggal, nama, produk, kategori, harga, operator) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    self._to_row(transaksi)
+                )
+                seqs.append(cur.lastrowid)
+        return seqs
+
+    def seq_terakhir(self):
+        return self.versi() or 0
+
+    def iter_records(self):
+        return self._query()
+
+    def iter_from(self, after_seq=0):
+        return self._query("WHERE seq > ?", (after_seq,))
+
+    def versi(self):
+        # Tabel hanya di-append, jadi seq terbesar cukup sebagai penanda
+        return self._conn().execute("SELECT MAX(seq) FROM transaksi").fetchone()[0]
+
+
+def agregat_transaksi(records):
+    """
+    Agregat untuk satu kumpulan transaksi: jumlah, total, per kategori, per operator
+    dan per hari x kategori x operator (list [hari, kategori, operator, jumlah, total])
+    """
+    total_transaksi = 0
+    total_penjualan = 0
+    per_kategori = {}
+    per_operator = {}
+    per_hari = {}
+    for transaksi in records:
+        harga = transaksi['harga']
+        kategori = transaksi.get('kategori', 'Lainnya')
+        operator = transaksi.get('operator')
+        total_transaksi += 1
+        total_penjualan += harga
+        entry = per_kategori.setdefault(kategori, {"total_transaksi": 0, "total_penjualan": 0})
+        entry["total_transaksi"] += 1
+        entry["total_penjualan"] += harga
+        if operator:
+            entry = per_operator.setdefault(operator, {"total_transaksi": 0, "total_penjualan": 0})
+            entry["total_transaksi"] += 1
+            entry["total_penjualan"] += harga
+        entry = per_hari.setdefault((transaksi['tanggal'][:10], kategori, operator), [0, 0])
+        entry[0] += 1
+        entry[1] += harga
+    return {
+        "total_transaksi": total_transaksi,
+        "total_penjualan": total_penjualan,
+        "per_kategori": per_kategori,
+        "per_operator": per_operator,
+        "per_hari": [list(key) + value for key, value in sorted(per_hari.items(), key=lambda item: str(item[0]))]
+    }
+
+
+class SegmentStorage(Storage):
+    """
+    Log transaksi yang dipecah per bulan (menurut tanggal transaksi) di dalam satu folder
+    manifest.json mencatat setiap segmen dan rentang seq-nya. Hanya segmen aktif
+    (bulan terbaru) yang ditulis; segmen bulan lalu disegel beserta agregatnya
+    (file <segmen>.agregat.json di samping file segmen), lalu bisa dikompres (gzip) atau diarsipkan (record tidak lagi dimuat, agregat tetap dipakai)
+    Transaksi bertanggal bulan lama yang datang terlambat masuk ke segmen aktif
+    """
+
+    MANIFEST = "manifest.json"
+    FOLDER_ARSIP = "arsip"
+
+    def __init__(self, dirname):
+        self.filename = dirname
+        self.dirname = dirname
+        self.manifest_path = os.path.join(dirname, self.MANIFEST)
+        self._manifest = (None, None)
+        self._log = {}
+        # File agregat -> isinya (file agregat tidak pernah diubah setelah ditulis)
+        self._agregat = {}
+        os.makedirs(dirname, exist_ok=True)
+        if not os.path.exists(self.manifest_path):
+            with kunci_file(self.manifest_path):
+                if not os.path.exists(self.manifest_path):
+                    self._tulis_manifest({"segmen": []})
+
+    # Manifest
+
+    def _stat_manifest(self):
+        try:
+            st = os.stat(self.manifest_path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def manifest(self):
+        """Isi manifest (di-cache selama file tidak berubah), jangan diubah langsung"""
+        versi = self._stat_manifest()
+        if versi is None or versi != self._manifest[0]:
+            try:
+                with open(self.manifest_path, 'r') as f:
+                    data = json.load(f)
+            except (json.JSONDecodeError, FileNotFoundError):
+                data = {"segmen": []}
+            self._manifest = (versi, data)
+        return self._manifest[1]
+
+    def _tulis_json(self, path, data):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def _tulis_manifest(self, data):
+        self._tulis_json(self.manifest_path, data)
+        self._manifest = (self._stat_manifest(), data)
+
+    def _baca_manifest_baru(self):
+        """
+        Salinan manifest yang bisa diubah (dipanggil sambil memegang lock manifest)
+        Hanya untuk rotasi dan perawatan; append biasa memakai manifest yang di-cache
+        """
+        return json.loads(json.dumps(self.manifest()))
+
+    def agregat(self, segmen):
+        """Agregat segmen tersegel (hasil agregat_transaksi()), None untuk segmen aktif"""
+        nama = segmen.get('file_agregat')
+        if nama is None:
+            return None
+        agregat = self._agregat.get(nama)
+        if agregat is None:
+            with open(os.path.join(self.dirname, nama), 'r') as f:
+                agregat = self._agregat[nama] = json.load(f)
+        return agregat
+
+    # Segmen
+
+    def _path(self, segmen):
+        return os.path.join(self.dirname, segmen['file'])
+
+    def _log_aktif(self, segmen):
+        """LogStorage untuk segmen aktif (di-cache agar index offset-nya terpakai ulang)"""
+        path = self._path(segmen)
+        log = self._log.get(path)
+        if log is None:
+            log = self._log[path] = LogStorage(path, seq_dasar=segmen['seq_awal'] - 1)
+        return log
+
+    @staticmethod
+    def _aktif(manifest):
+        segmen = manifest['segmen']
+        return segmen[-1] if segmen and segmen[-1]['status'] == 'aktif' else None
+
+    @staticmethod
+    def _bulan(transaksi):
+        """Bulan segmen untuk transaksi ('YYYY-MM'); tanpa tanggal valid dianggap bulan ini"""
+        bulan = str(transaksi.get('tanggal', ''))[:7]
+        if len(bulan) == 7 and bulan[4] == '-' and (bulan[:4] + bulan[5:]).isdigit():
+            return bulan
+        return datetime.now().strftime("%Y-%m")
+
+    def _iter_segmen(self, segmen):
+        """(seq, transaksi) dari satu segmen tersegel (plain atau gzip)"""
+        path = self._path(segmen)
+        if not os.path.exists(path) and os.path.exists(path + '.gz'):
+            path += '.gz'  # baru saja dikompres oleh proses lain
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            for line in f:
+                parsed = LogStorage._parse(line) if line.strip() else None
+                if parsed:
+                    yield parsed
+
+    def _kompres(self, segmen):
+        """
+        Tulis versi gzip file segmen dan arahkan manifest ke sana
+        Return path file lama (dihapus pemanggil setelah manifest ditulis) atau None
+        """
+        path = self._path(segmen)
+        if path.endswith('.gz'):
+            return None
+        tmp = path + '.gz.tmp'
+        with open(path, 'rb') as src, gzip.open(tmp, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        with open(tmp, 'rb') as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, path + '.gz')
+        segmen['file'] += '.gz'
+        return path
+
+    def _segel(self, segmen):
+        """
+        Tutup segmen: catat seq terakhir dan agregatnya, lalu kompres jika diaktifkan
+        Return daftar file lama yang dihapus setelah manifest ditulis
+        """
+        records = list(self._iter_segmen(segmen))
+        segmen['seq_akhir'] = records[-1][0] if records else segmen['seq_awal'] - 1
+        nama = segmen['file'][:-len('.ndjson')] + '.agregat.json'
+        self._tulis_json(os.path.join(self.dirname, nama), agregat_transaksi(t for _, t in records))
+        segmen['file_agregat'] = nama
+        segmen['status'] = 'sealed'
+        self._log.pop(self._path(segmen), None)
+        lama = self._kompres(segmen) if SEGMEN_GZIP else None
+        return [lama] if lama else []
+
+    def _simpan(self, manifest, hapus=()):
+        self._tulis_manifest(manifest)
+        for path in hapus:
+            os.remove(path)
+
+    def _tulis_batch(self, daftar):
+        # Semua penulisan segmen memegang lock manifest, jadi file segmen tidak perlu lock sendiri
+        # Manifest hanya disalin dan ditulis ulang saat rotasi; append biasa cukup membaca cache
+        with kunci_file(self.manifest_path):
+            aktif = self._aktif(self.manifest())
+            seqs = []
+            kelompok = []
+            for transaksi in daftar:
+                bulan = self._bulan(transaksi)
+                if aktif is None or bulan > aktif['bulan']:
+                    if kelompok:
+                        seqs.extend(self._log_aktif(aktif)._append(kelompok))
+                        kelompok = []
+                    aktif = self._rotasi(bulan)
+                kelompok.append(transaksi)
+            seqs.extend(self._log_aktif(aktif)._append(kelompok))
+        return seqs
+
+    def _rotasi(self, bulan):
+        """Segel segmen aktif (jika ada) lalu mulai segmen baru untuk bulan ini"""
+        manifest = self._baca_manifest_baru()
+        aktif = self._aktif(manifest)
+        hapus = self._segel(aktif) if aktif is not None else []
+        seq_awal = self._seq_akhir(manifest) + 1
+        # Bulan yang segmennya sudah disegel lebih awal (kelola_segmen.py segel) mendapat file baru
+        file = f"{bulan}.ndjson"
+        if any(s['bulan'] == bulan for s in manifest['segmen']):
+            file = f"{bulan}.{seq_awal}.ndjson"
+        segmen = {
+            "bulan": bulan,
+            "file": file,
+            "seq_awal": seq_awal,
+            "status": "aktif"
+        }
+        manifest['segmen'].append(segmen)
+        self._simpan(manifest, hapus)
+        return segmen
+
+    def _seq_akhir(self, manifest):
+        """Seq terakhir menurut segmen paling baru (segmen arsip tetap dihitung)"""
+        if not manifest['segmen']:
+            return 0
+        segmen = manifest['segmen'][-1]
+        if segmen['status'] == 'aktif':
+            return self._log_aktif(segmen).seq_terakhir()
+        return segmen['seq_akhir']
+
+    # Query
+
+    def seq_terakhir(self):
+        return self._seq_akhir(self.manifest())
+
+    def iter_records(self):
+        return self.iter_from(0)
+
+    def iter_from(self, after_seq=0):
+        """Hanya segmen yang berisi seq > after_seq yang dibuka (segmen arsip dilewati)"""
+        for segmen in list(self.manifest()['segmen']):
+            if segmen['status'] == 'arsip':
+                continue
+            if segmen['status'] == 'aktif':
+                yield from self._log_aktif(segmen).iter_from(after_seq)
+            elif segmen['seq_akhir'] > after_seq:
+                yield from ((seq, t) for seq, t in self._iter_segmen(segmen) if seq > after_seq)
+
+    def agregat_arsip(self):
+        return [self.agregat(segmen) for segmen in self.manifest()['segmen'] if segmen['status'] == 'arsip']
+
+    def versi(self):
+        manifest = self._stat_manifest()
+        aktif = self._aktif(self.manifest())
+        if aktif is None:
+            return manifest
+        try:
+            st = os.stat(self._path(aktif))
+        except FileNotFoundError:
+            return manifest
+        return manifest, (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    # Perawatan (dipakai scripts/kelola_segmen.py)
+
+    def segel(self, sebelum):
+        """Segel segmen aktif jika bulannya < sebelum ('YYYY-MM'); return True jika disegel"""
+        with kunci_file(self.manifest_path):
+            manifest = self._baca_manifest_baru()
+            aktif = self._aktif(manifest)
+            if aktif is None or aktif['bulan'] >= sebelum:
+                return False
+            self._simpan(manifest, self._segel(aktif))
+            return True
+
+    def kompres(self):
+        """Kompres semua segmen tersegel yang belum di-gzip, return daftar bulannya"""
+        with kunci_file(self.manifest_path):
+            manifest = self._baca_manifest_baru()
+            hapus = []
+            bulan = []
+            for segmen in manifest['segmen']:
+                if segmen['status'] == 'sealed':
+                    lama = self._kompres(segmen)
+                    if lama:
+                        hapus.append(lama)
+                        bulan.append(segmen['bulan'])
+            if bulan:
+                self._simpan(manifest, hapus)
+        return bulan
+
+    def arsipkan(self, sebelum):
+        """
+        Pindahkan segmen tersegel dengan bulan < sebelum ('YYYY-MM') ke folder arsip (gzip)
+        Record-nya tidak lagi dimuat; agregatnya tetap dipakai untuk laporan
+        Return daftar bulan yang diarsipkan
+        """
+        os.makedirs(os.path.join(self.dirname, self.FOLDER_ARSIP), exist_ok=True)
+        with kunci_file(self.manifest_path):
+            manifest = self._baca_manifest_baru()
+            hapus = []
+            bulan = []
+            for segmen in manifest['segmen']:
+                if segmen['status'] != 'sealed' or segmen['bulan'] >= sebelum:
+                    continue
+                lama = self._kompres(segmen)
+                if lama:
+                    hapus.append(lama)
+                tujuan = os.path.join(self.FOLDER_ARSIP, os.path.basename(segmen['file']))
+                shutil.copyfile(self._path(segmen), os.path.join(self.dirname, tujuan))
+                hapus.append(self._path(segmen))
+                segmen['file'] = tujuan
+                segmen['status'] = 'arsip'
+                bulan.append(segmen['bulan'])
+            if bulan:
+                self._simpan(manifest, hapus)
+        return bulan
+
+
+BACKENDS = {
+    "json": JsonStorage,
+    "log": LogStorage,
+    "sqlite": SqliteStorage,
+    "segmen": SegmentStorage,
+}
+
+
+def buat_storage(backend, filename):
+    """Buat instance storage berdasarkan nama backend"""
+    try:
+        cls = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Storage backend '{backend}' tidak dikenal. Pilihan: {', '.join(BACKENDS)}")
+    return cls(filename)
+
+
+def migrasi_json_ke_log(src, dst):
+    """
+    Migrasi satu kali dari file JSON array (format lama) ke append-only log
+    Hasil ditulis ke file sementara lalu di-rename agar atomic
+    Return jumlah transaksi yang dimigrasi
+    """
+    if os.path.exists(dst) and os.path.getsize(dst) > 0:
+        raise FileExistsError(f"File tujuan '{dst}' sudah berisi data")
+
+    with open(src, 'r') as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"File '{src}' bukan JSON array transaksi")
+
+    tmp = dst + '.tmp'
+    with open(tmp, 'wb') as f:
+        for seq, transaksi in enumerate(data, 1):
+            f.write(LogStorage._encode(seq, transaksi))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, dst)
+    return len(data)
@@ -0,0 +1,268 @@
+"""
+Penyimpanan transaksi in-memory berbentuk kolom
+Setiap field disimpan sebagai kolom: seq, waktu (epoch detik) dan harga di
+`array`, sedangkan nama/produk/kategori/operator di-encode menjadi kode int
+lewat kamus nilai unik. Satu transaksi hanya memakan beberapa puluh byte;
+dict baru dibuat saat data dikirim keluar (response API, menu CLI)
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from functools import lru_cache
+from config import DATE_FORMAT
+
+EPOCH = datetime(1970, 1, 1)
+# Kolom standar transaksi, sesuai urutan field saat transaksi dibuat
+KOLOM = ('tanggal', 'nama', 'produk', 'kategori', 'harga', 'operator')
+_KOLOM = frozenset(KOLOM)
+_KOLOM_WAJIB = frozenset(KOLOM[:5])
+# Penanda transaksi tanpa field operator (dibuat dari menu CLI)
+_TIDAK_ADA = object()
+# Nilai kolom waktu untuk record yang tanggalnya tidak sesuai DATE_FORMAT
+_TANPA_WAKTU = -1 << 62
+
+
+@lru_cache(maxsize=4096)
+def _hari(tanggal_hari):
+    return (datetime.strptime(tanggal_hari, "%Y-%m-%d") - EPOCH).days
+
+
+def _epoch_kanonik(tanggal):
+    """
+    Epoch untuk string yang persis berbentuk 'YYYY-MM-DD HH:MM:SS' (DATE_FORMAT),
+    None untuk bentuk lain; bagian tanggal di-cache per hari
+    """
+    if (type(tanggal) is str and len(tanggal) == 19 and tanggal[4] == '-' and tanggal[7] == '-'
+            and tanggal[10] == ' ' and tanggal[13] == ':' and tanggal[16] == ':'):
+        angka = tanggal[:4] + tanggal[5:7] + tanggal[8:10] + tanggal[11:13] + tanggal[14:16] + tanggal[17:19]
+        if angka.isascii() and angka.isdigit():
+            jam, menit, detik = int(tanggal[11:13]), int(tanggal[14:16]), int(tanggal[17:19])
+            if jam < 24 and menit < 60 and detik < 60:
+                return _hari(tanggal[:10]) * 86400 + jam * 3600 + menit * 60 + detik
+    return None
+
+
+def ke_epoch(tanggal):
+    """String DATE_FORMAT -> detik sejak 1970 (jam lokal apa adanya, tanpa zona waktu)"""
+    epoch = _epoch_kanonik(tanggal)
+    if epoch is None:
+        epoch = int((datetime.strptime(tanggal, DATE_FORMAT) - EPOCH).total_seconds())
+    return epoch
+
+
+@lru_cache(maxsize=4096)
+def _tanggal_hari(hari):
+    return (EPOCH + timedelta(days=hari)).strftime("%Y-%m-%d")
+
+
+def dari_epoch(detik):
+    """Kebalikan ke_epoch (format DATE_FORMAT); bagian tanggal di-cache per hari"""
+    hari, sisa = divmod(detik, 86400)
+    jam, sisa = divmod(sisa, 3600)
+    menit, detik = divmod(sisa, 60)
+    return f"{_tanggal_hari(hari)} {jam:02d}:{menit:02d}:{detik:02d}"
+
+
+class Kamus:
+    """Dictionary encoding: setiap nilai unik disimpan sekali dan diganti kode int"""
+
+    __slots__ = ('nilai', 'kode')
+
+    def __init__(self):
+        self.nilai = []
+        self.kode = {}
+
+    def encode(self, nilai):
+        kode = self.kode.get(nilai)
+        if kode is None:
+            kode = self.kode[nilai] = len(self.nilai)
+            self.nilai.append(nilai)
+        return kode
+
+
+class BarisTransaksi:
+    """View satu baris tabel tanpa menyalin datanya"""
+
+    __slots__ = ('_tabel', '_i')
+
+    def __init__(self, tabel, i):
+        self._tabel = tabel
+        self._i = i
+
+    @property
+    def seq(self):
+        return self._tabel.seq[self._i]
+
+    @property
+    def tanggal(self):
+        return self._tabel.tanggal(self._i)
+
+    @property
+    def epoch(self):
+        return self._tabel.epoch[self._i]
+
+    @property
+    def nama(self):
+        return self._tabel.kamus_nama.nilai[self._tabel.nama[self._i]]
+
+    @property
+    def produk(self):
+        return self._tabel.kamus_produk.nilai[self._tabel.produk[self._i]]
+
+    @property
+    def kategori(self):
+        return self._tabel.kamus_kategori.nilai[self._tabel.kategori[self._i]]
+
+    @property
+    def harga(self):
+        return self._tabel.harga[self._i]
+
+    @property
+    def operator(self):
+        operator = self._tabel.kamus_operator.nilai[self._tabel.operator[self._i]]
+        return None if operator is _TIDAK_ADA else operator
+
+    def to_dict(self):
+        return self._tabel.to_dict(self._i)
+
+    def __repr__(self):
+        return f"BarisTransaksi(seq={self.seq}, {self.to_dict()!r})"
+
+
+class TabelTransaksi:
+    """
+    Tabel transaksi kolom-per-kolom, hanya bisa ditambah (append)
+    Record yang tidak muat di kolom standar (field tambahan, tanggal
+    format lain, harga bukan int) disimpan utuh di `lainnya`
+    """
+
+    def __init__(self):
+        self.seq = array('Q')
+        self.epoch = array('q')
+        self.harga = array('q')
+        self.nama = array('I')
+        self.produk = array('I')
+        self.kategori = array('I')
+        self.operator = array('I')
+        self.kamus_nama = Kamus()
+        self.kamus_produk = Kamus()
+        self.kamus_kategori = Kamus()
+        self.kamus_operator = Kamus()
+        self.lainnya = {}
+        # nama.lower() -> index baris, untuk pencarian nama pembeli
+        self.idx_nama = {}
+        # kode operator -> index baris, untuk riwayat per kasir
+        self.idx_operator = {}
+        # Index waktu: epoch terurut dan index baris pasangannya (untuk query rentang dengan bisect)
+        self.waktu_urut = array('q')
+        self.baris_urut = array('I')
+
+    def __len__(self):
+        return len(self.seq)
+
+    def tambah(self, seq, transaksi):
+        """Tambahkan satu record (seq harus lebih besar dari seq terakhir)"""
+        i = len(self.seq)
+        nama = transaksi.get('nama', '')
+        harga = transaksi.get('harga', 0)
+        tanggal = transaksi.get('tanggal')
+        try:
+            epoch = _epoch_kanonik(tanggal)
+        except ValueError:  # tanggal tidak ada di kalender
+            epoch = None
+        # Hanya record yang bisa dibentuk ulang persis dari kolom yang tidak disimpan utuh
+        standar = (
+            epoch is not None and type(harga) is int and type(nama) is str
+            and transaksi.keys() <= _KOLOM and _KOLOM_WAJIB <= transaksi.keys()
+        )
+        if not standar:
+            self.lainnya[i] = dict(transaksi)
+            nama = str(nama)
+            harga = harga if type(harga) is int else 0
+            if epoch is None:
+                try:
+                    epoch = ke_epoch(tanggal)
+                except (TypeError, ValueError):
+                    epoch = _TANPA_WAKTU
+
+        self.seq.append(seq)
+        self.epoch.append(epoch)
+        self.harga.append(harga)
+        self.nama.append(self.kamus_nama.encode(nama))
+        self.produk.append(self.kamus_produk.encode(transaksi.get('produk')))
+        self.kategori.append(self.kamus_kategori.encode(transaksi.get('kategori', 'Lainnya')))
+        operator = self.kamus_operator.encode(transaksi.get('operator', _TIDAK_ADA))
+        self.operator.append(operator)
+        key = nama.lower()
+        index = self.idx_nama.get(key)
+        if index is None:
+            index = self.idx_nama[key] = array('I')
+        index.append(i)
+        index = self.idx_operator.get(operator)
+        if index is None:
+            index = self.idx_operator[operator] = array('I')
+        index.append(i)
+        if not self.waktu_urut or epoch >= self.waktu_urut[-1]:
+            self.waktu_urut.append(epoch)
+            self.baris_urut.append(i)
+        else:
+            # Jarang terjadi (jam antar worker sedikit berbeda, data impor), cukup disisipkan
+            posisi = bisect_right(self.waktu_urut, epoch)
+            self.waktu_urut.insert(posisi, epoch)
+            self.baris_urut.insert(posisi, i)
+
+    def tanggal(self, i):
+        lain = self.lainnya.get(i)
+        if lain is not None:
+            return lain.get('tanggal')
+        return dari_epoch(self.epoch[i])
+
+    def to_dict(self, i):
+        """Materialisasi baris i menjadi dict transaksi (format yang sama dengan storage)"""
+        lain = self.lainnya.get(i)
+        if lain is not None:
+            return dict(lain)
+        transaksi = {
+            "tanggal": dari_epoch(self.epoch[i]),
+            "nama": self.kamus_nama.nilai[self.nama[i]],
+            "produk": self.kamus_produk.nilai[self.produk[i]],
+            "kategori": self.kamus_kategori.nilai[self.kategori[i]],
+            "harga": self.harga[i]
+        }
+        operator = self.kamus_operator.nilai[self.operator[i]]
+        if operator is not _TIDAK_ADA:
+            transaksi["operator"] = operator
+        return transaksi
+
+    def baris(self, i):
+        return BarisTransaksi(self, i)
+
+    def index_setelah(self, after_seq):
+        """Index baris pertama dengan seq > after_seq"""
+        return bisect_right(self.seq, after_seq)
+
+    def index_by_nama(self, nama):
+        return self.idx_nama.get(nama.lower(), ())
+
+    def index_by_operator(self, operator):
+        kode = self.kamus_operator.kode.get(operator)
+        if kode is None:
+            return ()
+        return self.idx_operator[kode]
+
+    def index_by_tanggal(self, dari=None, sampai=None):
+        """
+        Index baris dengan dari <= tanggal <= sampai (string DATE_FORMAT, inklusif), urut per baris
+        Rentang dicari dengan bisect pada index waktu, jadi hanya potongan yang cocok yang disentuh
+        Record yang tanggalnya tidak bisa dibaca tidak ikut
+        """
+        if dari is None:
+            awal = bisect_right(self.waktu_urut, _TANPA_WAKTU)
+        else:
+            awal = bisect_left(self.waktu_urut, ke_epoch(dari))
+        if sampai is None:
+            akhir = len(self.waktu_urut)
+        else:
+            akhir = bisect_right(self.waktu_urut, ke_epoch(sampai))
+        return sorted(self.baris_urut[awal:akhir])
@@ -4,10 +4,18 @@ Menggunakan pytest framework
 """
 
 import pytest
+import csv
+import gzip
+import io
 import json
 import os
+import password
+import threading
+from datetime import datetime
 from app import app
 from auth import AuthManager
+from metrics import registry
+from profiler import profiler
 
 
 @pytest.fixture
@@ -29,6 +37,20 @@ def cleanup():
         os.remove('transaksi.json')
 
 
+@pytest.fixture
+def auth_headers(client, cleanup):
+    """Register dan login testuser, return header Authorization"""
+    client.post('/auth/register',
+        json={"username": "testuser", "password": "password123"},
+        content_type='application/json'
+    )
+    login_response = client.post('/auth/login',
+        json={"username": "testuser", "password": "password123"},
+        content_type='application/json'
+    )
+    return {'Authorization': f"Bearer {json.loads(login_response.data)['token']}"}
+
+
 class TestHome:
     """Test home endpoint"""
     
@@ -118,6 +140,27 @@ class TestAuthentication:
         data = json.loads(response.data)
         assert data['status'] == 'error'
     
+    def test_login_hashing_timeout_503(self, client, cleanup, monkeypatch):
+        """Test hashing yang melebihi HASH_TIMEOUT ditolak 503, bukan 500"""
+        client.post('/auth/register',
+            json={"username": "testuser", "password": "password123"},
+            content_type='application/json'
+        )
+        lepas = threading.Event()
+        monkeypatch.setattr(password, 'HASH_TIMEOUT', 0.01)
+        monkeypatch.setattr(password, '_verify', lambda *args: lepas.wait(5))
+        try:
+            response = client.post('/auth/login',
+                json={"username": "testuser", "password": "password123"},
+                content_type='application/json'
+            )
+        finally:
+            lepas.set()
+        assert response.status_code == 503
+        data = json.loads(response.data)
+        assert data['status'] == 'error'
+        assert 'sibuk' in data['message']
+    
     def test_login_nonexistent_user(self, client):
         """Test login with nonexistent user"""
         response = client.post('/auth/login',
@@ -170,6 +213,49 @@ class TestProtectedRoutes:
         assert data['total'] == 29
 
 
+class TestProdukCache:
+    """Test ETag dan varian gzip /api/produk"""
+    
+    def test_produk_304_dengan_etag(self, client, auth_headers):
+        """Test If-None-Match dengan ETag yang sama menghasilkan 304 tanpa body"""
+        response = client.get('/api/produk', headers=auth_headers)
+        assert response.status_code == 200
+        etag = response.headers['ETag']
+        assert etag
+        
+        response = client.get('/api/produk', headers={**auth_headers, 'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+        
+        response = client.get('/api/produk', headers={**auth_headers, 'If-None-Match': '"lama"'})
+        assert response.status_code == 200
+    
+    def test_produk_filter(self, client, auth_headers):
+        """Test filter kategori, harga dan kode pada /api/produk"""
+        response = client.get('/api/produk?kategori=pulsa&max_harga=11500', headers=auth_headers)
+        data = json.loads(response.data)
+        assert response.status_code == 200
+        assert [p['kode'] for p in data['data']] == ["PULSA_5", "PULSA_10", "PULSA_2"]
+        
+        etag = response.headers['ETag']
+        response = client.get('/api/produk?kategori=pulsa&max_harga=11500',
+            headers={**auth_headers, 'If-None-Match': etag})
+        assert response.status_code == 304
+        
+        response = client.get('/api/produk?min_harga=abc', headers=auth_headers)
+        assert response.status_code == 400
+    
+    def test_produk_gzip(self, client, auth_headers):
+        """Test varian gzip berisi data yang sama"""
+        import gzip
+        biasa = client.get('/api/produk', headers=auth_headers)
+        response = client.get('/api/produk', headers={**auth_headers, 'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        assert json.loads(gzip.decompress(response.data)) == json.loads(biasa.data)
+        assert response.headers['ETag'] != biasa.headers['ETag']
+
+
 class TestTransactions:
     """Test transaction endpoints"""
     
@@ -271,6 +357,291 @@ class TestTransactions:
         assert data['status'] == 'success'
         assert 'total_transaksi' in data['data']
         assert 'total_penjualan' in data['data']
+    
+    def test_get_laporan_periode(self, client, auth_headers):
+        """Test laporan per rentang waktu dengan group_by"""
+        client.post('/api/transaksi', json={"nama": "Budi", "kode_produk": "ML_86"}, headers=auth_headers)
+        
+        hari_ini = datetime.now().strftime("%Y-%m-%d")
+        response = client.get(f'/api/laporan?from={hari_ini}&to={hari_ini}&group_by=day,kategori',
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+        data = json.loads(response.data)['data']
+        assert data['group_by'] == ["day", "kategori"]
+        game = [g for g in data['groups'] if g['kategori'] == "Game"]
+        assert game[0]['day'] == hari_ini
+        assert game[0]['total_penjualan'] >= 20000
+        assert data['total_penjualan'] == sum(g['total_penjualan'] for g in data['groups'])
+        
+        response = client.get('/api/laporan?group_by=minggu', headers=auth_headers)
+        assert response.status_code == 400
+        response = client.get('/api/laporan?from=kemarin', headers=auth_headers)
+        assert response.status_code == 400
+
+
+class TestTransaksiBatch:
+    """Test endpoint batch transaksi"""
+    
+    def test_batch_hasil_per_item(self, client, auth_headers):
+        """Test item valid disimpan dan item tidak valid dilaporkan per index"""
+        sebelum = json.loads(client.get('/api/laporan', headers=auth_headers).data)['data']
+        
+        response = client.post('/api/transaksi/batch',
+            json={"items": [
+                {"nama": "Reseller", "kode_produk": "ML_86"},
+                {"nama": "Reseller", "kode_produk": "INVALID"},
+                {"nama": "", "kode_produk": "FF_140"},
+                {"nama": "Reseller", "kode_produk": "pulsa_10"}
+            ]},
+            headers=auth_headers
+        )
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert data['berhasil'] == 2
+        assert data['gagal'] == 2
+        assert [item['status'] for item in data['data']] == ["success", "error", "error", "success"]
+        assert 'tidak ditemukan' in data['data'][1]['message']
+        
+        sesudah = json.loads(client.get('/api/laporan', headers=auth_headers).data)['data']
+        assert sesudah['total_transaksi'] == sebelum['total_transaksi'] + 2
+        assert sesudah['total_penjualan'] == sebelum['total_penjualan'] + 20000 + 11500
+    
+    def test_batch_tanpa_item_valid(self, client, auth_headers):
+        """Test batch kosong atau tanpa item valid ditolak"""
+        response = client.post('/api/transaksi/batch', json={"items": []}, headers=auth_headers)
+        assert response.status_code == 400
+        response = client.post('/api/transaksi/batch',
+            json=[{"nama": "Reseller", "kode_produk": "INVALID"}],
+            headers=auth_headers
+        )
+        assert response.status_code == 400
+        assert json.loads(response.data)['gagal'] == 1
+
+
+class TestRiwayatPagination:
+    """Test pagination dan streaming /api/riwayat"""
+    
+    def test_riwayat_dengan_limit_dan_cursor(self, client, auth_headers):
+        """Test halaman riwayat berurutan sampai next_cursor kosong"""
+        for kode in ["ML_86", "FF_140", "PULSA_10"]:
+            client.post('/api/transaksi',
+                json={"nama": "Pager", "kode_produk": kode},
+                headers=auth_headers
+            )
+        
+        response = client.get('/api/riwayat?limit=2', headers=auth_headers)
+        data = json.loads(response.data)
+        assert response.status_code == 200
+        assert data['total'] == 2
+        assert data['next_cursor'] == data['data'][-1]['seq']
+        
+        response = client.get(f"/api/riwayat?limit=2&cursor={data['next_cursor']}", headers=auth_headers)
+        data = json.loads(response.data)
+        assert len(data['data']) >= 1
+        assert data['next_cursor'] is None
+    
+    def test_riwayat_limit_tidak_valid(self, client, auth_headers):
+        """Test limit di luar batas ditolak"""
+        response = client.get('/api/riwayat?limit=0', headers=auth_headers)
+        assert response.status_code == 400
+        response = client.get('/api/riwayat?cursor=abc', headers=auth_headers)
+        assert response.status_code == 400
+    
+    def test_riwayat_stream(self, client, auth_headers):
+        """Test mode streaming menghasilkan JSON yang sama dengan mode biasa"""
+        client.post('/api/transaksi',
+            json={"nama": "Streamer", "kode_produk": "ML_86"},
+            headers=auth_headers
+        )
+        biasa = json.loads(client.get('/api/riwayat', headers=auth_headers).data)
+        stream = json.loads(client.get('/api/riwayat?stream=1', headers=auth_headers).data)
+        assert stream == biasa
+    
+    def test_riwayat_rentang_waktu(self, client, auth_headers):
+        """Test filter from/to pada riwayat"""
+        client.post('/api/transaksi',
+            json={"nama": "Shift", "kode_produk": "ML_86"},
+            headers=auth_headers
+        )
+        hari_ini = datetime.now().strftime("%Y-%m-%d")
+        data = json.loads(client.get(f'/api/riwayat?from={hari_ini}&to={hari_ini}&nama=shift', headers=auth_headers).data)
+        assert data['total'] >= 1
+        assert all(t['tanggal'].startswith(hari_ini) for t in data['data'])
+        
+        data = json.loads(client.get('/api/riwayat?from=2999-01-01&limit=10', headers=auth_headers).data)
+        assert data['data'] == [] and data['next_cursor'] is None
+        
+        response = client.get('/api/riwayat?from=01-12-2025', headers=auth_headers)
+        assert response.status_code == 400
+    
+    def test_from_to_sama_untuk_riwayat_dan_laporan(self, client, auth_headers):
+        """Test nilai from/to yang sama dibaca sama oleh /api/riwayat dan /api/laporan"""
+        client.post('/api/transaksi',
+            json={"nama": "Rentang", "kode_produk": "ML_86"},
+            headers=auth_headers
+        )
+        riwayat = json.loads(client.get('/api/riwayat?nama=Rentang', headers=auth_headers).data)
+        tanggal = riwayat['data'][-1]['tanggal']
+        hari, jam = tanggal[:10], tanggal[:13]
+        
+        for dari, sampai in [
+            (hari, hari),
+            (f"{hari} 00:00:00", f"{hari} 23:59:59"),
+            (f"{hari}T00:00:00", f"{hari}T23:59:59"),
+            (jam, jam),
+            (f"{jam}:00", f"{jam}:59"),
+        ]:
+            query = {"from": dari, "to": sampai}
+            riwayat = client.get('/api/riwayat', query_string=query, headers=auth_headers)
+            laporan = client.get('/api/laporan', query_string=query, headers=auth_headers)
+            assert riwayat.status_code == laporan.status_code == 200
+            assert json.loads(riwayat.data)['total'] >= 1
+            assert json.loads(laporan.data)['data']['total_transaksi'] == json.loads(riwayat.data)['total']
+        
+        for nilai in ["01-12-2025", f"{jam}:zz", f"{hari} 10:00:00 WIB"]:
+            for endpoint in ('/api/riwayat', '/api/laporan'):
+                response = client.get(endpoint, query_string={"from": nilai}, headers=auth_headers)
+                assert response.status_code == 400
+
+
+class TestRiwayatExport:
+    """Test export riwayat CSV/NDJSON"""
+    
+    def _isi(self, client, headers):
+        client.post('/api/transaksi/batch',
+            json={"items": [
+                {"nama": "Akuntan, PT", "kode_produk": "ML_86"},
+                {"nama": "Reseller", "kode_produk": "PULSA_10"}
+            ]},
+            headers=headers
+        )
+    
+    def test_export_csv(self, client, auth_headers):
+        """Test CSV berisi header dan baris yang sama dengan /api/riwayat"""
+        self._isi(client, auth_headers)
+        response = client.get('/api/riwayat/export?format=csv', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/csv'
+        assert 'riwayat.csv' in response.headers['Content-Disposition']
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        riwayat = json.loads(client.get('/api/riwayat', headers=auth_headers).data)['data']
+        assert [r['nama'] for r in rows] == [t['nama'] for t in riwayat]
+        assert rows[-2]['nama'] == "Akuntan, PT"
+        assert rows[-1]['harga'] == "11500"
+    
+    def test_export_csv_formula_di_escape(self, client, auth_headers):
+        """Test teks yang bisa dibaca sebagai formula spreadsheet diberi awalan '"""
+        nama = ['=HYPERLINK("http://x","klik")', '+62812', '-1+1', '@SUM(A1)', 'Budi']
+        client.post('/api/transaksi/batch',
+            json={"items": [{"nama": n, "kode_produk": "ML_86"} for n in nama]},
+            headers=auth_headers
+        )
+        response = client.get('/api/riwayat/export?format=csv', headers=auth_headers)
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        assert [r['nama'] for r in rows[-5:]] == ["'" + n for n in nama[:4]] + ['Budi']
+        assert rows[-1]['harga'] == "20000"
+        # NDJSON tidak diubah
+        response = client.get('/api/riwayat/export?format=ndjson', headers=auth_headers)
+        records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert records[-5]['nama'] == nama[0]
+    
+    def test_export_ndjson_gzip_dengan_filter(self, client, auth_headers):
+        """Test NDJSON terkompres gzip dengan filter nama dan tanggal"""
+        self._isi(client, auth_headers)
+        hari_ini = datetime.now().strftime("%Y-%m-%d")
+        response = client.get(f'/api/riwayat/export?format=ndjson&gzip=1&nama=reseller&from={hari_ini}',
+            headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert response.mimetype == 'application/gzip'
+        assert 'riwayat.ndjson.gz' in response.headers['Content-Disposition']
+        lines = gzip.decompress(response.data).decode('utf-8').splitlines()
+        records = [json.loads(line) for line in lines]
+        assert records and all(r['nama'] == "Reseller" for r in records)
+        assert 'seq' in records[0]
+    
+    def test_export_parameter_tidak_valid(self, client, auth_headers):
+        """Test format dan tanggal tidak valid ditolak, dan token wajib"""
+        assert client.get('/api/riwayat/export?format=xlsx', headers=auth_headers).status_code == 400
+        assert client.get('/api/riwayat/export?to=besok', headers=auth_headers).status_code == 400
+        assert client.get('/api/riwayat/export').status_code == 401
+
+
+class TestMetrics:
+    """Test endpoint /metrics (format teks Prometheus)"""
+    
+    def test_metrics_per_route(self, client, cleanup):
+        registry.reset()
+        # buffered: body dibaca dan ditutup seperti oleh server WSGI, sehingga request tercatat
+        client.post('/auth/register',
+            json={"username": "testuser", "password": "password123"}, buffered=True)
+        login_response = client.post('/auth/login',
+            json={"username": "testuser", "password": "password123"}, buffered=True)
+        headers = {'Authorization': f"Bearer {json.loads(login_response.data)['token']}"}
+        client.get('/api/laporan', headers=headers, buffered=True)
+        client.get('/api/laporan', headers=headers, buffered=True)
+        client.get('/api/riwayat/tidak-ada', buffered=True)
+        
+        response = client.get('/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        teks = response.get_data(as_text=True)
+        assert 'kasir_http_requests_total{route="/api/laporan",method="GET",status="200"} 2' in teks
+        assert 'kasir_http_requests_total{route="<lainnya>",method="GET",status="404"} 1' in teks
+        assert 'kasir_http_request_duration_seconds_count{route="/api/laporan",method="GET"} 2' in teks
+        assert 'kasir_http_request_duration_seconds_bucket{route="/api/laporan",method="GET",le="+Inf"} 2' in teks
+        for komponen in ('storage', 'auth', 'serialization'):
+            assert f'kasir_http_component_duration_seconds_count{{route="/api/laporan",component="{komponen}"}} 2' in teks
+        assert 'kasir_http_component_duration_seconds_count{route="/auth/login",component="auth"} 1' in teks
+
+
+class TestProfil:
+    """Test profiling per request dan endpoint /api/profil"""
+    
+    @pytest.fixture(autouse=True)
+    def folder_profil(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(profiler, 'folder', str(tmp_path))
+        monkeypatch.setattr(profiler, 'rate', 0)
+        return tmp_path
+    
+    def test_profil_lewat_header(self, client, auth_headers):
+        client.get('/api/laporan', headers=auth_headers, buffered=True)
+        # Header tanpa token valid diabaikan
+        client.get('/api/laporan', headers={'X-Kasir-Profile': '1'}, buffered=True)
+        assert json.loads(client.get('/api/profil', headers=auth_headers).data)['total'] == 0
+        
+        client.get('/api/laporan', headers=dict(auth_headers, **{'X-Kasir-Profile': '1'}), buffered=True)
+        data = json.loads(client.get('/api/profil', headers=auth_headers).data)
+        assert data['total'] == 1
+        profil = data['data'][0]
+        assert (profil['method'], profil['path']) == ('GET', '/api/laporan')
+        
+        response = client.get(f"/api/profil/{profil['nama']}", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.headers['Content-Disposition'].startswith('attachment')
+        teks = client.get(f"/api/profil/{profil['nama']}?format=teks", headers=auth_headers).get_data(as_text=True)
+        assert '(get_laporan)' in teks
+        teks = client.get(f"/api/profil/{profil['nama']}?format=teks&sort=tottime&limit=5", headers=auth_headers)
+        assert 'Ordered by: internal time' in teks.get_data(as_text=True)
+        assert client.get(f"/api/profil/{profil['nama']}?format=teks&sort=nama", headers=auth_headers).status_code == 400
+    
+    def test_sampling_dan_rotasi(self, client, auth_headers, monkeypatch):
+        monkeypatch.setattr(profiler, 'rate', 1.0)
+        monkeypatch.setattr(profiler, 'paths', ('/api/riwayat',))
+        monkeypatch.setattr(profiler, 'maks', 2)
+        client.get('/api/laporan', headers=auth_headers, buffered=True)
+        for _ in range(3):
+            client.get('/api/riwayat', headers=auth_headers, buffered=True)
+        monkeypatch.setattr(profiler, 'rate', 0)
+        daftar = json.loads(client.get('/api/profil', headers=auth_headers).data)['data']
+        assert len(daftar) == 2
+        assert {p['path'] for p in daftar} == {'/api/riwayat'}
+    
+    def test_profil_tidak_valid(self, client, auth_headers):
+        assert client.get('/api/profil').status_code == 401
+        assert client.get('/api/profil/..%2Fusers.json', headers=auth_headers).status_code == 404
+        assert client.get('/api/profil/tidak-ada.prof', headers=auth_headers).status_code == 404
 
 
 class TestErrorHandling:
@@ -0,0 +1,115 @@
+"""
+Unit tests untuk mode ASGI: response harus identik dengan mode WSGI
+"""
+
+import asyncio
+import json
+import os
+import pytest
+from app import app as flask_app
+from asgi import WSGIKeASGI, app
+
+
+@pytest.fixture
+def cleanup():
+    yield
+    for path in ('users.json', 'transaksi.json'):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def panggil(aplikasi, method, path, body=None, headers=None):
+    """Jalankan satu request ASGI, return (status, headers, body, jumlah message body)"""
+    path, _, query = path.partition('?')
+    headers = dict(headers or {})
+    if body is not None:
+        body = json.dumps(body).encode()
+        headers['Content-Type'] = 'application/json'
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(),
+        'headers': [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        'http_version': '1.1', 'scheme': 'http', 'server': ('localhost', 5000), 'client': ('127.0.0.1', 5555)
+    }
+
+    async def jalan():
+        masuk = [{'type': 'http.request', 'body': body or b'', 'more_body': False}]
+        keluar = []
+
+        async def receive():
+            if masuk:
+                return masuk.pop(0)
+            await asyncio.Event().wait()  # client tetap terhubung
+
+        async def send(message):
+            keluar.append(message)
+
+        await aplikasi(scope, receive, send)
+        return keluar
+
+    keluar = asyncio.run(jalan())
+    assert keluar[0]['type'] == 'http.response.start'
+    assert keluar[-1].get('more_body', False) is False
+    isi = b''.join(m['body'] for m in keluar[1:])
+    return keluar[0]['status'], {k.decode(): v.decode() for k, v in keluar[0]['headers']}, isi, len(keluar) - 1
+
+
+def test_response_sama_dengan_wsgi(cleanup):
+    status, _, isi, _ = panggil(app, 'POST', '/auth/register', {"username": "kasir1", "password": "password123"})
+    assert status == 201
+    status, _, isi, _ = panggil(app, 'POST', '/auth/login', {"username": "kasir1", "password": "password123"})
+    assert status == 200
+    headers = {'Authorization': f"Bearer {json.loads(isi)['token']}"}
+
+    # token_required tetap berlaku
+    status, _, isi, _ = panggil(app, 'GET', '/api/laporan')
+    assert status == 401
+    assert json.loads(isi)['status'] == 'error'
+
+    status, _, isi, _ = panggil(app, 'POST', '/api/transaksi', {"nama": "Budi", "kode_produk": "ML_86"}, headers)
+    assert status == 201
+    assert json.loads(isi)['data']['operator'] == 'kasir1'
+
+    client = flask_app.test_client()
+    for path in ('/', '/api/produk', '/api/laporan', '/api/riwayat?nama=Budi'):
+        status, header_asgi, isi, _ = panggil(app, 'GET', path, headers=headers)
+        response = client.get(path, headers=headers)
+        assert (status, isi) == (response.status_code, response.data)
+        assert header_asgi['content-type'] == response.headers['Content-Type']
+
+
+def test_response_streaming_dikirim_bertahap(cleanup):
+    panggil(app, 'POST', '/auth/register', {"username": "kasir1", "password": "password123"})
+    _, _, isi, _ = panggil(app, 'POST', '/auth/login', {"username": "kasir1", "password": "password123"})
+    headers = {'Authorization': f"Bearer {json.loads(isi)['token']}"}
+    panggil(app, 'POST', '/api/transaksi/batch',
+            {"items": [{"nama": f"Pembeli {i}", "kode_produk": "PULSA_10"} for i in range(3)]}, headers)
+
+    status, _, isi, jumlah_message = panggil(app, 'GET', '/api/riwayat?stream=1', headers=headers)
+    assert status == 200
+    data = json.loads(isi)
+    assert data['total'] == 3
+    assert [t['nama'] for t in data['data']] == ["Pembeli 0", "Pembeli 1", "Pembeli 2"]
+    assert jumlah_message == 3  # pembuka, data, penutup
+
+
+def test_body_terlalu_besar():
+    aplikasi = WSGIKeASGI(flask_app, max_body=10)
+    status, _, isi, _ = panggil(aplikasi, 'POST', '/auth/login', {"username": "kasir1", "password": "password123"})
+    assert status == 413
+
+
+def test_lifespan():
+    async def jalan():
+        masuk = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        keluar = []
+
+        async def receive():
+            return masuk.pop(0)
+
+        async def send(message):
+            keluar.append(message['type'])
+
+        await WSGIKeASGI(flask_app)({'type': 'lifespan'}, receive, send)
+        return keluar
+
+    assert asyncio.run(jalan()) == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
@@ -0,0 +1,147 @@
+"""
+Unit tests untuk AuthManager dan token cache
+"""
+
+import json
+import os
+import time
+from datetime import datetime, timedelta
+import jwt
+import pytest
+import auth
+import password
+from auth import AuthManager, TokenCache, UserStore, SECRET_KEY
+
+
+def buat_token(username="kasir1", exp_detik=3600):
+    payload = {
+        "username": username,
+        "iat": datetime.utcnow(),
+        "exp": datetime.utcnow() + timedelta(seconds=exp_detik)
+    }
+    return jwt.encode(payload, SECRET_KEY, algorithm="HS256")
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    """Token cache baru untuk setiap test"""
+    cache = TokenCache(maxsize=2)
+    monkeypatch.setattr(auth, 'token_cache', cache)
+    return cache
+
+
+class TestTokenCache:
+    """Test cache token terverifikasi"""
+
+    def test_token_berulang_tidak_didecode_ulang(self, cache, monkeypatch):
+        token = buat_token()
+        decode_asli = jwt.decode
+        panggilan = []
+        monkeypatch.setattr(auth.jwt, 'decode', lambda *a, **kw: panggilan.append(1) or decode_asli(*a, **kw))
+
+        for _ in range(3):
+            payload, valid = AuthManager.verify_token(token)
+            assert valid and payload['username'] == "kasir1"
+        assert len(panggilan) == 1
+        assert cache.stats()['hits'] == 2
+        assert cache.stats()['misses'] == 1
+
+    def test_entry_kadaluarsa_pada_exp_token(self, cache, monkeypatch):
+        token = buat_token(exp_detik=60)
+        assert AuthManager.verify_token(token)[1]
+        sekarang = time.time()
+        monkeypatch.setattr(auth.time, 'time', lambda: sekarang + 120)
+        assert cache.get(token) is None
+        assert cache.stats()['size'] == 0
+
+    def test_lru_membatasi_ukuran(self, cache):
+        tokens = [buat_token(f"kasir{i}") for i in range(3)]
+        for token in tokens:
+            AuthManager.verify_token(token)
+        assert cache.stats()['size'] == 2
+        assert cache.get(tokens[0]) is None
+        assert cache.get(tokens[2]) is not None
+
+    def test_token_tidak_valid_tidak_di_cache(self, cache):
+        assert AuthManager.verify_token("invalid_token") == (None, False)
+        assert AuthManager.verify_token(buat_token(exp_detik=-10)) == (None, False)
+        assert cache.stats()['size'] == 0
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """User store dengan file users.json sementara"""
+    store = UserStore(str(tmp_path / "users.json"))
+    monkeypatch.setattr(auth, 'user_store', store)
+    return store
+
+
+class TestUserStore:
+    """Test user store in-memory"""
+
+    def test_login_tidak_membaca_file_ulang(self, store, monkeypatch):
+        AuthManager.register("kasir1", "password123")
+        dibaca = []
+        load_asli = json.load
+        monkeypatch.setattr(auth.json, 'load', lambda f: dibaca.append(1) or load_asli(f))
+        for _ in range(5):
+            assert AuthManager.login("kasir1", "password123")[1] == 200
+        assert dibaca == []
+
+    def test_register_tersimpan_ke_file(self, store):
+        assert AuthManager.register("kasir1", "password123")[1] == 201
+        assert AuthManager.register("kasir1", "password123")[1] == 400
+        with open(store.filename) as f:
+            assert "kasir1" in json.load(f)
+
+    def test_edit_dari_luar_terdeteksi(self, store):
+        AuthManager.register("kasir1", "password123")
+        with open(store.filename) as f:
+            users = json.load(f)
+        users["kasir2"] = {"password": "rahasia99", "created_at": "2025-12-01T00:00:00"}
+        with open(store.filename, 'w') as f:
+            json.dump(users, f)
+        assert AuthManager.login("kasir2", "rahasia99")[1] == 200
+
+        os.remove(store.filename)
+        assert AuthManager.login("kasir1", "password123")[1] == 401
+
+
+class TestPasswordHashing:
+    """Test hashing password dan hash pool"""
+
+    def test_register_menyimpan_hash(self, store):
+        AuthManager.register("kasir1", "password123")
+        tersimpan = store.get("kasir1")["password"]
+        assert tersimpan != "password123"
+        assert password.is_hashed(tersimpan)
+        assert AuthManager.login("kasir1", "password123")[1] == 200
+        assert AuthManager.login("kasir1", "salah123")[1] == 401
+
+    def test_plain_text_di_hash_ulang_saat_login(self, store):
+        with open(store.filename, 'w') as f:
+            json.dump({"lama": {"password": "password123", "created_at": "2025-11-30T17:00:00"}}, f)
+        assert AuthManager.login("lama", "wrongpass")[1] == 401
+        assert store.get("lama")["password"] == "password123"
+
+        assert AuthManager.login("lama", "password123")[1] == 200
+        tersimpan = store.get("lama")["password"]
+        assert password.is_hashed(tersimpan)
+        assert store.get("lama")["created_at"] == "2025-11-30T17:00:00"
+        assert AuthManager.login("lama", "password123")[1] == 200
+
+    def test_pool_penuh_ditolak_cepat(self, store, monkeypatch):
+        AuthManager.register("kasir1", "password123")
+        pool = password.HashPool(workers=1, queue=0)
+        monkeypatch.setattr(password, 'hash_pool', pool)
+        pool._slot.acquire()
+        try:
+            response, status = AuthManager.login("kasir1", "password123")
+        finally:
+            pool._slot.release()
+        assert status == 503
+        assert AuthManager.login("kasir1", "password123")[1] == 200
+
+    def test_user_tidak_dikenal_tidak_di_hash(self, store, monkeypatch):
+        monkeypatch.setattr(password, 'hash_pool', None)
+        assert AuthManager.login("tidak_ada", "password123")[1] == 401
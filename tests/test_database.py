@@ -0,0 +1,547 @@
+"""
+Unit tests untuk Database dan storage backend
+"""
+
+import json
+import multiprocessing
+import sqlite3
+import threading
+import time
+import pytest
+import storage
+from database import Database
+from storage import GroupCommit, LogStorage, SegmentStorage, SqliteStorage, migrasi_json_ke_log
+
+
+def contoh_transaksi(nama="Budi", harga=20000, tanggal="2025-12-01 10:00:00", operator="kasir1"):
+    return {
+        "tanggal": tanggal,
+        "nama": nama,
+        "produk": "Mobile Legends 86 Diamond",
+        "kategori": "Game",
+        "harga": harga,
+        "operator": operator
+    }
+
+
+@pytest.fixture(params=["json", "log", "sqlite", "segmen"])
+def database(request, tmp_path):
+    """Database baru untuk setiap backend"""
+    return Database(str(tmp_path / f"transaksi.{request.param}"), backend=request.param)
+
+
+class TestDatabase:
+    """Test API Database yang sama untuk semua backend"""
+
+    def test_tambah_dan_baca(self, database):
+        database.tambah_transaksi(contoh_transaksi("Budi", 20000))
+        database.tambah_transaksi(contoh_transaksi("Ani", 15000))
+        assert database.get_semua_transaksi() == [
+            contoh_transaksi("Budi", 20000),
+            contoh_transaksi("Ani", 15000)
+        ]
+        assert database.hitung_total_transaksi() == 2
+        assert database.hitung_total_penjualan() == 35000
+
+    def test_get_transaksi_by_nama(self, database):
+        database.tambah_transaksi(contoh_transaksi("Budi"))
+        database.tambah_transaksi(contoh_transaksi("Ani"))
+        hasil = database.get_transaksi_by_nama("BUDI")
+        assert [t['nama'] for t in hasil] == ["Budi"]
+
+    def test_index_nama_diperbarui_saat_append(self, database):
+        database.tambah_transaksi(contoh_transaksi("Budi"))
+        assert len(database.get_transaksi_by_nama("budi")) == 1
+        database.tambah_transaksi(contoh_transaksi("BUDI", 15000))
+        hasil = database.get_transaksi_by_nama("Budi")
+        assert [t['harga'] for t in hasil] == [20000, 15000]
+        assert database.get_transaksi_by_nama("tidak ada") == []
+
+    def test_get_transaksi_by_tanggal_dan_operator(self, database):
+        database.tambah_transaksi(contoh_transaksi("Budi", tanggal="2025-12-01 08:00:00", operator="pagi"))
+        database.tambah_transaksi(contoh_transaksi("Ani", tanggal="2025-12-01 15:00:00", operator="siang"))
+        database.tambah_transaksi(contoh_transaksi("Citra", tanggal="2025-12-02 09:00:00", operator="pagi"))
+        hasil = database.get_transaksi_by_tanggal("2025-12-01 00:00:00", "2025-12-01 23:59:59")
+        assert [t['nama'] for t in hasil] == ["Budi", "Ani"]
+        assert [t['nama'] for t in database.get_transaksi_by_operator("pagi")] == ["Budi", "Citra"]
+
+    def test_transaksi_tanpa_operator(self, database):
+        transaksi = contoh_transaksi()
+        del transaksi['operator']
+        database.tambah_transaksi(transaksi)
+        assert database.get_semua_transaksi() == [transaksi]
+
+
+class TestTambahBanyak:
+    """Test bulk insert transaksi"""
+
+    def test_tambah_banyak_satu_penulisan(self, database, monkeypatch):
+        panggilan = []
+        tulis_batch = database.storage._tulis_batch
+        monkeypatch.setattr(database.storage, '_tulis_batch', lambda daftar: panggilan.append(len(daftar)) or tulis_batch(daftar))
+        database.tambah_banyak_transaksi([contoh_transaksi(f"Pembeli {i}", 1000) for i in range(25)])
+        assert panggilan == [25]
+        assert database.hitung_total_transaksi() == 25
+        assert database.hitung_total_penjualan() == 25000
+        assert [t['seq'] for t in database.get_transaksi_page(3, after_seq=22)[0]] == [23, 24, 25]
+
+
+class TestPagination:
+    """Test pembacaan transaksi per halaman berbasis seq"""
+
+    def test_get_transaksi_page(self, database):
+        for i in range(5):
+            database.tambah_transaksi(contoh_transaksi(f"Pembeli {i}"))
+        halaman1, cursor = database.get_transaksi_page(2)
+        assert [t['seq'] for t in halaman1] == [1, 2]
+        assert cursor == 2
+        halaman2, cursor = database.get_transaksi_page(2, after_seq=cursor)
+        assert [t['nama'] for t in halaman2] == ["Pembeli 2", "Pembeli 3"]
+        halaman3, cursor = database.get_transaksi_page(2, after_seq=cursor)
+        assert [t['seq'] for t in halaman3] == [5]
+        assert cursor is None
+
+    def test_get_transaksi_page_dengan_nama(self, database):
+        for nama in ["Budi", "Ani", "budi", "Budi"]:
+            database.tambah_transaksi(contoh_transaksi(nama))
+        halaman, cursor = database.get_transaksi_page(2, nama="budi")
+        assert [t['seq'] for t in halaman] == [1, 3]
+        halaman, cursor = database.get_transaksi_page(2, after_seq=cursor, nama="budi")
+        assert [t['seq'] for t in halaman] == [4]
+        assert cursor is None
+
+
+class TestRentangWaktu:
+    """Test query rentang tanggal lewat index waktu"""
+
+    def test_rentang_nama_dan_cursor(self, database):
+        database.tambah_banyak_transaksi([
+            contoh_transaksi("Budi", tanggal=f"2025-12-0{hari} 0{jam}:00:00")
+            for hari in (1, 2, 3) for jam in (8, 9)
+        ] + [contoh_transaksi("Ani", tanggal="2025-12-02 08:30:00")])
+
+        hasil = database.get_transaksi_by_tanggal("2025-12-02 00:00:00", "2025-12-02 23:59:59")
+        assert [t['tanggal'] for t in hasil] == ["2025-12-02 08:00:00", "2025-12-02 09:00:00", "2025-12-02 08:30:00"]
+        assert [t['nama'] for t in database.get_transaksi_by_tanggal("2025-12-02 00:00:00", nama="ani")] == ["Ani"]
+
+        items, cursor = database.get_transaksi_page(2, dari="2025-12-01 09:00:00", sampai="2025-12-03 08:00:00")
+        assert [t['seq'] for t in items] == [2, 3]
+        items, cursor = database.get_transaksi_page(2, after_seq=cursor, dari="2025-12-01 09:00:00", sampai="2025-12-03 08:00:00")
+        assert ([t['seq'] for t in items], cursor) == ([4, 5], 5)
+        items, cursor = database.get_transaksi_page(2, after_seq=cursor, dari="2025-12-01 09:00:00", sampai="2025-12-03 08:00:00")
+        assert ([t['seq'] for t in items], cursor) == ([7], None)
+
+
+class TestRingkasan:
+    """Test agregat penjualan yang diperbarui per transaksi"""
+
+    def test_ringkasan_per_kategori_dan_operator(self, database):
+        database.tambah_transaksi(contoh_transaksi("Budi", 20000, operator="pagi"))
+        database.tambah_transaksi(contoh_transaksi("Ani", 15000, operator="siang"))
+        ringkasan = database.get_ringkasan()
+        assert ringkasan['total_transaksi'] == 2
+        assert ringkasan['total_penjualan'] == 35000
+        assert ringkasan['per_kategori'] == {"Game": {"total_transaksi": 2, "total_penjualan": 35000}}
+        assert ringkasan['per_operator']['siang'] == {"total_transaksi": 1, "total_penjualan": 15000}
+
+    def test_ringkasan_dibangun_ulang_dari_storage(self, database):
+        database.tambah_transaksi(contoh_transaksi("Budi", 20000))
+        dibuka_ulang = Database(database.filename, backend=database.backend)
+        assert dibuka_ulang.hitung_total_penjualan() == 20000
+
+        # Transaksi yang ditulis instance lain terdeteksi lewat versi storage
+        assert database.get_transaksi_by_nama("ani") == []
+        dibuka_ulang.tambah_transaksi(contoh_transaksi("Ani", 15000))
+        assert database.hitung_total_transaksi() == 2
+        assert database.hitung_total_penjualan() == 35000
+        assert [t['nama'] for t in database.get_transaksi_by_nama("ani")] == ["Ani"]
+
+
+class TestRollup:
+    """Test laporan per rentang waktu dari rollup jam/hari/bulan"""
+
+    def _isi(self, database):
+        database.tambah_banyak_transaksi([
+            contoh_transaksi("A", 1000, tanggal="2025-11-30 23:10:00", operator="pagi"),
+            contoh_transaksi("B", 2000, tanggal="2025-12-01 08:00:00", operator="pagi"),
+            contoh_transaksi("C", 3000, tanggal="2025-12-01 08:59:59", operator="siang"),
+            contoh_transaksi("D", 4000, tanggal="2025-12-15 13:00:00", operator="siang"),
+            contoh_transaksi("E", 5000, tanggal="2026-01-02 00:00:00", operator="pagi"),
+        ])
+
+    def test_rentang_dan_group_by(self, database):
+        self._isi(database)
+        laporan = database.get_laporan_periode("2025-12-01", "2025-12-31", ["day"])
+        assert laporan['total_transaksi'] == 3
+        assert laporan['total_penjualan'] == 9000
+        assert laporan['groups'] == [
+            {"day": "2025-12-01", "total_transaksi": 2, "total_penjualan": 5000},
+            {"day": "2025-12-15", "total_transaksi": 1, "total_penjualan": 4000},
+        ]
+
+        per_operator = database.get_laporan_periode(group_by=["month", "operator"])['groups']
+        assert per_operator[0] == {"month": "2025-11", "operator": "pagi", "total_transaksi": 1, "total_penjualan": 1000}
+        assert len(per_operator) == 4
+
+    def test_presisi_jam_dan_rentang_terbuka(self, database):
+        self._isi(database)
+        assert database.get_laporan_periode("2025-11-30 23", "2025-12-01 08")['total_penjualan'] == 6000
+        assert database.get_laporan_periode(sampai="2025-11-30")['total_transaksi'] == 1
+        assert database.get_laporan_periode(dari="2025-12-02")['total_penjualan'] == 9000
+        # Hasil rollup sama dengan menjumlahkan transaksi mentah
+        assert database.get_laporan_periode()['total_penjualan'] == database.hitung_total_penjualan()
+
+    def test_rollup_mengikuti_tulisan_instance_lain(self, database):
+        self._isi(database)
+        lain = Database(database.filename, backend=database.backend)
+        lain.tambah_transaksi(contoh_transaksi("F", 6000, tanggal="2025-12-15 14:30:00"))
+        groups = database.get_laporan_periode("2025-12-15", "2025-12-15", ["hour"])['groups']
+        assert [g['hour'] for g in groups] == ["2025-12-15 13", "2025-12-15 14"]
+
+    def test_rentang_sangat_lebar(self, database):
+        self._isi(database)
+        # Transaksi terlambat menyisip di tengah urutan bucket
+        database.tambah_transaksi(contoh_transaksi("F", 6000, tanggal="2025-12-10 10:00:00"))
+        database.hitung_total_transaksi()
+        # Hitung lookup bucket: rentang 10.000 tahun tidak boleh berjalan per bulan kalender
+        dilihat = []
+
+        class HitungGet(dict):
+            def get(self, key, default=None):
+                dilihat.append(key)
+                return super().get(key, default)
+
+        rollup = database._rollup
+        for granularitas in list(rollup.buckets):
+            rollup.buckets[granularitas] = HitungGet(rollup.buckets[granularitas])
+        jumlah_bucket = sum(len(buckets) for buckets in rollup.buckets.values())
+        laporan = database.get_laporan_periode("0001-01-01", "9999-12-31", ["hour"])
+        assert 0 < len(dilihat) <= jumlah_bucket
+        assert laporan['total_penjualan'] == 21000
+        assert [g['hour'] for g in laporan['groups']] == [
+            "2025-11-30 23", "2025-12-01 08", "2025-12-10 10", "2025-12-15 13", "2026-01-02 00"
+        ]
+        per_hari = database.get_laporan_periode("2025-12-01 08", "2025-12-15 12", ["day"])['groups']
+        assert [(g['day'], g['total_penjualan']) for g in per_hari] == [("2025-12-01", 5000), ("2025-12-10", 6000)]
+
+    def test_parameter_tidak_valid(self, database):
+        with pytest.raises(ValueError):
+            database.get_laporan_periode("2025-12-02", "2025-12-01")
+        with pytest.raises(ValueError):
+            database.get_laporan_periode(group_by=["minggu"])
+        with pytest.raises(ValueError):
+            database.get_laporan_periode(group_by=["day", "month"])
+        with pytest.raises(ValueError):
+            database.get_laporan_periode("01-12-2025")
+
+
+def _tulis_dari_proses(path, backend, prefix, jumlah):
+    database = Database(path, backend=backend)
+    for i in range(jumlah):
+        database.tambah_transaksi(contoh_transaksi(f"{prefix}-{i}", 1000))
+
+
+class TestPenulisanKonkuren:
+    """Test penulisan dari banyak thread, instance dan proses sekaligus"""
+
+    @pytest.mark.parametrize("backend", ["json", "log", "sqlite", "segmen"])
+    def test_banyak_thread_dan_instance(self, tmp_path, backend):
+        path = str(tmp_path / f"transaksi.{backend}")
+        instances = [Database(path, backend=backend) for _ in range(2)]
+
+        def kerja(database, prefix):
+            for i in range(20):
+                database.tambah_transaksi(contoh_transaksi(f"{prefix}-{i}", 1000))
+
+        threads = [threading.Thread(target=kerja, args=(instances[i % 2], f"T{i}")) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert [seq for seq, _ in instances[0].storage.iter_records()] == list(range(1, 161))
+        for database in instances:
+            assert database.hitung_total_transaksi() == 160
+            assert database.hitung_total_penjualan() == 160000
+
+    @pytest.mark.parametrize("backend", ["json", "log", "segmen"])
+    def test_banyak_proses(self, tmp_path, backend):
+        try:
+            ctx = multiprocessing.get_context("fork")
+        except ValueError:
+            pytest.skip("fork tidak tersedia")
+        path = str(tmp_path / f"transaksi.{backend}")
+        procs = [ctx.Process(target=_tulis_dari_proses, args=(path, backend, f"P{i}", 25)) for i in range(4)]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()
+        database = Database(path, backend=backend)
+        assert database.hitung_total_transaksi() == 100
+        assert len({t['nama'] for t in database.get_semua_transaksi()}) == 100
+
+    def test_group_commit_menggabungkan_penulisan(self):
+        batches = []
+
+        def tulis_batch(items):
+            time.sleep(0.01)
+            batches.append(len(items))
+            awal = sum(batches) - len(items)
+            return list(range(awal + 1, awal + 1 + len(items)))
+
+        writer = GroupCommit(tulis_batch)
+        hasil = []
+        threads = [threading.Thread(target=lambda: hasil.extend(writer.submit(["x"]))) for _ in range(10)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert sorted(hasil) == list(range(1, 11))
+        assert len(batches) < 10
+
+    def test_group_commit_meneruskan_error(self):
+        def gagal(items):
+            raise OSError("disk penuh")
+
+        with pytest.raises(OSError):
+            GroupCommit(gagal).submit(["x"])
+
+
+class TestJsonStorage:
+    """Test file JSON array yang bisa diedit dari luar"""
+
+    def test_edit_dari_luar_terbaca(self, tmp_path):
+        path = tmp_path / "transaksi.json"
+        database = Database(str(path), backend="json")
+        database.tambah_transaksi(contoh_transaksi("Budi", 100))
+        database.tambah_transaksi(contoh_transaksi("Ani", 100))
+        assert database.hitung_total_penjualan() == 200
+
+        # Jumlah record tetap sama, hanya isinya yang berubah
+        data = json.loads(path.read_text())
+        data[0]['harga'] = 999
+        path.write_text(json.dumps(data))
+        assert database.hitung_total_penjualan() == 1099
+        assert [t['harga'] for t in database.get_semua_transaksi()] == [999, 100]
+
+    def test_edit_dari_luar_lalu_tulis(self, tmp_path):
+        path = tmp_path / "transaksi.json"
+        database = Database(str(path), backend="json")
+        database.tambah_transaksi(contoh_transaksi("Budi", 100))
+        database.tambah_transaksi(contoh_transaksi("Ani", 100))
+        data = json.loads(path.read_text())
+        data[0]['harga'] = 999
+        path.write_text(json.dumps(data))
+        # Penulisan berikutnya melanjutkan file yang sudah diedit, bukan salinan lama
+        database.tambah_transaksi(contoh_transaksi("Citra", 100))
+        assert database.hitung_total_penjualan() == 1199
+        assert [t['harga'] for t in database.get_semua_transaksi()] == [999, 100, 100]
+
+    def test_tulisan_worker_lain_tanpa_muat_ulang(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "transaksi.json")
+        database = Database(path, backend="json")
+        lain = Database(path, backend="json")
+        database.tambah_transaksi(contoh_transaksi("Budi", 100))
+        muat_ulang = []
+        monkeypatch.setattr(database, '_muat_ulang', lambda: muat_ulang.append(1))
+        # Worker lain hanya menambah record: cukup record baru yang dibaca
+        lain.tambah_transaksi(contoh_transaksi("Ani", 200))
+        assert database.hitung_total_penjualan() == 300
+        database.tambah_transaksi(contoh_transaksi("Citra", 300))
+        lain.tambah_banyak_transaksi([contoh_transaksi("Dedi", 400), contoh_transaksi("Eka", 500)])
+        assert [t['nama'] for t in database.get_semua_transaksi()] == ["Budi", "Ani", "Citra", "Dedi", "Eka"]
+        assert muat_ulang == []
+
+    def test_file_diganti_lalu_ditulis(self, tmp_path):
+        path = tmp_path / "transaksi.json"
+        database = Database(str(path), backend="json")
+        database.tambah_transaksi(contoh_transaksi("Budi"))
+        path.unlink()
+        # Penulisan berikutnya dimulai dari file kosong, bukan melanjutkan salinan lama
+        database.tambah_transaksi(contoh_transaksi("Ani"))
+        assert [t['nama'] for t in database.get_semua_transaksi()] == ["Ani"]
+
+
+class TestLogStorage:
+    """Test append-only log"""
+
+    def test_seq_berlanjut_setelah_dibuka_ulang(self, tmp_path):
+        path = str(tmp_path / "transaksi.ndjson")
+        LogStorage(path).append(contoh_transaksi())
+        storage = LogStorage(path)
+        assert storage.last_seq == 1
+        assert storage.append(contoh_transaksi()) == 2
+        assert [seq for seq, _ in storage.iter_records()] == [1, 2]
+
+    def test_baris_terpotong_dilewati(self, tmp_path):
+        path = tmp_path / "transaksi.ndjson"
+        LogStorage(str(path)).append(contoh_transaksi())
+        with open(path, 'a') as f:
+            f.write('{"seq": 2, "nama": "Bu')
+        storage = LogStorage(str(path))
+        assert storage.last_seq == 1
+        assert storage.append(contoh_transaksi("Ani")) == 2
+        assert [t['nama'] for _, t in storage.iter_records()] == ["Budi", "Ani"]
+
+
+    def test_iter_from_memakai_index_offset(self, tmp_path):
+        storage = LogStorage(str(tmp_path / "transaksi.ndjson"))
+        for i in range(3):
+            storage.append(contoh_transaksi(f"Pembeli {i}"))
+        assert [seq for seq, _ in storage.iter_from(1)] == [2, 3]
+        # Record yang ditambahkan setelah index dibangun ikut terbaca
+        storage.append(contoh_transaksi("Pembeli 3"))
+        assert [seq for seq, _ in storage.iter_from(3)] == [4]
+        assert list(storage._idx_seq) == [1, 2, 3, 4]
+
+
+class TestSqliteStorage:
+    """Test backend SQLite"""
+
+    def test_file_lama_dengan_nama_key_dimigrasi(self, tmp_path):
+        path = str(tmp_path / "transaksi.db")
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            CREATE TABLE transaksi (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                tanggal TEXT NOT NULL, nama TEXT NOT NULL, nama_key TEXT NOT NULL,
+                produk TEXT NOT NULL, kategori TEXT NOT NULL,
+                harga INTEGER NOT NULL, operator TEXT
+            );
+            CREATE INDEX idx_transaksi_nama ON transaksi (nama_key);
+            INSERT INTO transaksi (tanggal, nama, nama_key, produk, kategori, harga)
+            VALUES ('2024-01-15 10:00:00', 'Budi', 'budi', 'Diamond', 'Game', 100);
+        """)
+        conn.close()
+
+        storage = SqliteStorage(path)
+        storage.append(contoh_transaksi("Ani"))
+        assert [(seq, t['nama']) for seq, t in storage.iter_records()] == [(1, "Budi"), (2, "Ani")]
+        kolom = {row[1] for row in storage._conn().execute("PRAGMA table_info(transaksi)")}
+        assert "nama_key" not in kolom
+        assert not storage._conn().execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_transaksi_%'"
+        ).fetchall()
+
+
+class TestSegmentStorage:
+    """Test storage log per bulan: rotasi, segel, kompres dan arsip"""
+
+    def _isi(self, path):
+        database = Database(path, backend="segmen")
+        database.tambah_banyak_transaksi([
+            contoh_transaksi("A", 1000, tanggal="2025-10-05 10:00:00", operator="pagi"),
+            contoh_transaksi("B", 2000, tanggal="2025-10-20 10:00:00", operator="siang"),
+            contoh_transaksi("C", 3000, tanggal="2025-11-02 10:00:00", operator="pagi"),
+        ])
+        database.tambah_transaksi(contoh_transaksi("D", 4000, tanggal="2025-12-01 08:00:00"))
+        # Transaksi bulan lama yang datang terlambat tetap masuk segmen aktif
+        database.tambah_transaksi(contoh_transaksi("E", 5000, tanggal="2025-11-30 23:59:59"))
+        return database
+
+    def test_rotasi_per_bulan(self, tmp_path):
+        database = self._isi(str(tmp_path / "segmen"))
+        segmen = database.storage.manifest()['segmen']
+        assert [(s['bulan'], s['status'], s['seq_awal']) for s in segmen] == [
+            ("2025-10", "sealed", 1), ("2025-11", "sealed", 3), ("2025-12", "aktif", 4)
+        ]
+        assert segmen[0]['seq_akhir'] == 2
+        agregat = database.storage.agregat(segmen[0])
+        assert agregat['total_penjualan'] == 3000
+        assert agregat['per_operator'] == {
+            "pagi": {"total_transaksi": 1, "total_penjualan": 1000},
+            "siang": {"total_transaksi": 1, "total_penjualan": 2000},
+        }
+        assert [seq for seq, _ in database.storage.iter_from(3)] == [4, 5]
+        assert [t['nama'] for t in Database(database.filename, backend="segmen").get_semua_transaksi()] == list("ABCDE")
+
+    def test_catch_up_hanya_membuka_segmen_aktif(self, tmp_path, monkeypatch):
+        database = self._isi(str(tmp_path / "segmen"))
+        dibuka = []
+        iter_segmen = database.storage._iter_segmen
+        monkeypatch.setattr(database.storage, '_iter_segmen', lambda s: dibuka.append(s['bulan']) or iter_segmen(s))
+        Database(database.filename, backend="segmen").tambah_transaksi(contoh_transaksi("F", 6000, tanggal="2025-12-02 09:00:00"))
+        assert database.hitung_total_transaksi() == 6
+        assert dibuka == []
+
+    def test_append_tidak_menulis_ulang_manifest(self, tmp_path, monkeypatch):
+        database = self._isi(str(tmp_path / "segmen"))
+        ditulis = []
+        monkeypatch.setattr(database.storage, '_tulis_manifest', ditulis.append)
+        monkeypatch.setattr(database.storage, '_baca_manifest_baru', lambda: ditulis.append("salin"))
+        database.tambah_transaksi(contoh_transaksi("F", 6000, tanggal="2025-12-02 09:00:00"))
+        assert ditulis == []
+        assert database.hitung_total_transaksi() == 6
+        # Agregat segmen tersegel ada di file terpisah, manifest hanya menyimpan namanya
+        manifest = json.loads((tmp_path / "segmen" / "manifest.json").read_text())
+        assert [s.get('file_agregat') for s in manifest['segmen']] == [
+            "2025-10.agregat.json", "2025-11.agregat.json", None
+        ]
+
+    def test_kompres_dan_arsip(self, tmp_path):
+        path = str(tmp_path / "segmen")
+        database = self._isi(path)
+        sebelum = database.get_ringkasan()
+
+        assert database.storage.kompres() == ["2025-10", "2025-11"]
+        assert sorted(p.name for p in (tmp_path / "segmen").glob("*.ndjson*")) == [
+            "2025-10.ndjson.gz", "2025-11.ndjson.gz", "2025-12.ndjson"
+        ]
+        assert len(Database(path, backend="segmen").get_semua_transaksi()) == 5
+
+        assert SegmentStorage(path).arsipkan("2025-11") == ["2025-10"]
+        assert (tmp_path / "segmen" / "arsip" / "2025-10.ndjson.gz").exists()
+        # Instance yang sudah berjalan ikut membangun ulang state-nya
+        for db_ in (database, Database(path, backend="segmen")):
+            assert [t['nama'] for t in db_.get_semua_transaksi()] == ["C", "D", "E"]
+            assert db_.get_ringkasan() == sebelum
+            laporan = db_.get_laporan_periode("2025-10-01", "2025-10-31", ["day", "operator"])
+            assert [(g['day'], g['operator'], g['total_penjualan']) for g in laporan['groups']] == [
+                ("2025-10-05", "pagi", 1000), ("2025-10-20", "siang", 2000)
+            ]
+
+        database.tambah_transaksi(contoh_transaksi("F", 6000, tanggal="2026-01-01 00:00:00"))
+        assert database.storage.manifest()['segmen'][-1]['seq_awal'] == 6
+
+    def test_kompres_saat_disegel(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(storage, 'SEGMEN_GZIP', True)
+        database = self._isi(str(tmp_path / "segmen"))
+        assert [s['file'] for s in database.storage.manifest()['segmen']] == [
+            "2025-10.ndjson.gz", "2025-11.ndjson.gz", "2025-12.ndjson"
+        ]
+        assert not (tmp_path / "segmen" / "2025-10.ndjson").exists()
+        assert [t['nama'] for t in Database(database.filename, backend="segmen").get_semua_transaksi()] == list("ABCDE")
+
+    def test_segel_bulan_lalu(self, tmp_path):
+        database = self._isi(str(tmp_path / "segmen"))
+        assert database.storage.segel("2025-12") is False
+        assert database.storage.segel("2026-01") is True
+        assert database.storage.manifest()['segmen'][-1]['status'] == "sealed"
+        database.tambah_transaksi(contoh_transaksi("F", 6000, tanggal="2025-12-31 10:00:00"))
+        segmen = database.storage.manifest()['segmen']
+        assert (segmen[-1]['bulan'], segmen[-1]['seq_awal'], segmen[-1]['file']) == ("2025-12", 6, "2025-12.6.ndjson")
+        assert database.hitung_total_transaksi() == 6
+        dibuka_ulang = Database(database.filename, backend="segmen")
+        assert [t['nama'] for t in dibuka_ulang.get_semua_transaksi()] == list("ABCDEF")
+
+
+class TestMigrasi:
+    """Test migrasi transaksi.json ke log"""
+
+    def test_migrasi_json_ke_log(self, tmp_path):
+        src = tmp_path / "transaksi.json"
+        dst = tmp_path / "transaksi.ndjson"
+        src.write_text(json.dumps([contoh_transaksi("Budi"), contoh_transaksi("Ani")]))
+
+        assert migrasi_json_ke_log(str(src), str(dst)) == 2
+        database = Database(str(dst), backend="log")
+        assert [t['nama'] for t in database.get_semua_transaksi()] == ["Budi", "Ani"]
+        assert database.storage.last_seq == 2
+
+    def test_migrasi_tidak_menimpa_log(self, tmp_path):
+        src = tmp_path / "transaksi.json"
+        dst = tmp_path / "transaksi.ndjson"
+        src.write_text("[]")
+        dst.write_text('{"seq":1}\n')
+        with pytest.raises(FileExistsError):
+            migrasi_json_ke_log(str(src), str(dst))
@@ -0,0 +1,35 @@
+"""
+Unit tests untuk importer daftar harga Excel
+"""
+
+import sys
+from pathlib import Path
+import pytest
+
+pd = pytest.importorskip("pandas")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'scripts'))
+
+import import_products_from_xls as importer  # noqa: E402
+
+
+class TestCleanProducts:
+    """Test pembersihan kolom secara vectorized"""
+
+    def test_clean_products(self):
+        df = pd.DataFrame({
+            'kode': [' ML_86 ', None, 'nan', 'D1000', 'X1', 'ML_86'],
+            'nama': ['Mobile Legends 86', 'Tanpa kode', 'x', 'Dana 1.000.000', None, 'ML 86 baru'],
+            'harga': [20000.9, 1, 1, '1.000.300', 'gratis', 21000],
+            'kategori': ['Game', 'Game', 'Game', None, '', ' E-Money '],
+        })
+        products = importer.clean_products(df, 'kode', 'nama', 'harga', 'kategori')
+        assert list(products) == ['ML_86', 'D1000', 'X1']
+        assert products['ML_86'] == {'nama': 'ML 86 baru', 'harga': 21000, 'kategori': 'E-Money'}
+        assert products['D1000'] == {'nama': 'Dana 1.000.000', 'harga': 1000300, 'kategori': 'Lainnya'}
+        assert products['X1'] == {'nama': 'nan', 'harga': 0, 'kategori': 'Lainnya'}
+        assert all(type(p['harga']) is int for p in products.values())
+
+    def test_find_columns_header_supplier(self):
+        cols = importer.find_columns(['Produk', 'Kode', 'Keterangan', 'Harga Umum', 'Harga Reseller'])
+        assert cols == {'code': 1, 'name': 2, 'price': 3, 'cat': 0}
+        assert importer.find_columns(['Daftar Harga', None, None]) is None
@@ -0,0 +1,141 @@
+"""
+Unit tests untuk katalog produk
+"""
+
+import json
+import pytest
+from katalog import Katalog, SnapshotKatalog, catat_riwayat_harga, diff_katalog, harga_pada, tulis_katalog
+
+PRODUK_AWAL = {"ML_86": {"nama": "Mobile Legends 86 Diamond", "harga": 20000, "kategori": "Game"}}
+
+
+def tulis_produk(path, produk):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(produk, f)
+
+
+@pytest.fixture
+def produk_file(tmp_path):
+    path = tmp_path / "products.json"
+    tulis_produk(path, PRODUK_AWAL)
+    return path
+
+
+def tunggu_reload(katalog):
+    if katalog._reload_thread is not None:
+        katalog._reload_thread.join(timeout=5)
+
+
+class TestKatalogReload:
+    """Test hot reload products.json"""
+
+    def test_perubahan_file_dimuat_di_background(self, produk_file):
+        katalog = Katalog(produk_file, PRODUK_AWAL, interval=0)
+        lama = katalog.current()
+
+        tulis_produk(produk_file, {"ML_86": {"nama": "Mobile Legends 86 Diamond", "harga": 21000, "kategori": "Game"}})
+        katalog.current()
+        tunggu_reload(katalog)
+
+        baru = katalog.current()
+        assert baru is not lama
+        assert baru.produk["ML_86"]["harga"] == 21000
+        assert baru.etag != lama.etag
+        # Snapshot lama yang dipegang request yang sedang berjalan tidak ikut berubah
+        assert lama.produk["ML_86"]["harga"] == 20000
+
+    def test_pengecekan_dibatasi_interval(self, produk_file):
+        katalog = Katalog(produk_file, PRODUK_AWAL, interval=3600)
+        tulis_produk(produk_file, {"FF_140": {"nama": "Free Fire 140 Diamond", "harga": 19000, "kategori": "Game"}})
+        assert katalog.current().produk == PRODUK_AWAL
+        assert katalog._reload_thread is None
+
+    def test_file_tidak_valid_katalog_lama_dipertahankan(self, produk_file):
+        katalog = Katalog(produk_file, PRODUK_AWAL, interval=0)
+        produk_file.write_text('{"rusak": ')
+        katalog.current()
+        tunggu_reload(katalog)
+        assert katalog.current().produk == PRODUK_AWAL
+        produk_file.write_text(json.dumps({"X": {"nama": "Tanpa harga", "kategori": "Game"}}))
+        assert katalog.muat_ulang() is False
+        assert katalog.current().produk == PRODUK_AWAL
+
+
+@pytest.fixture
+def snapshot():
+    return SnapshotKatalog({
+        "ML_86": {"nama": "Mobile Legends 86 Diamond", "harga": 20000, "kategori": "Game"},
+        "ML_150": {"nama": "Mobile Legends 150 Diamond", "harga": 35000, "kategori": "Game"},
+        "FF_140": {"nama": "Free Fire 140 Diamond", "harga": 19000, "kategori": "Game"},
+        "PULSA_10": {"nama": "Pulsa All Operator 10.000", "harga": 11500, "kategori": "Pulsa"},
+        "PLN_20": {"nama": "Token PLN 20.000", "harga": 21500, "kategori": "PLN"},
+    })
+
+
+class TestIndexKatalog:
+    """Test pencarian katalog lewat index"""
+
+    def kode(self, snapshot, **filter):
+        return [p['kode'] for p in snapshot.cari(**filter)]
+
+    def test_filter_kategori_case_insensitive(self, snapshot):
+        assert self.kode(snapshot, kategori="game") == ["ML_86", "ML_150", "FF_140"]
+        assert self.kode(snapshot, kategori="Voucher") == []
+
+    def test_filter_rentang_harga(self, snapshot):
+        assert self.kode(snapshot, min_harga=19000, max_harga=21500) == ["ML_86", "FF_140", "PLN_20"]
+        assert self.kode(snapshot, max_harga=11500) == ["PULSA_10"]
+
+    def test_prefix_kode_dan_kata(self, snapshot):
+        assert self.kode(snapshot, kode="ml_") == ["ML_86", "ML_150"]
+        assert self.kode(snapshot, q="mob leg 15") == ["ML_150"]
+        assert self.kode(snapshot, q="diam", kategori="game", max_harga=20000) == ["ML_86", "FF_140"]
+
+    def test_substring_nama(self, snapshot):
+        assert self.kode(snapshot, nama="egends 8") == ["ML_86"]
+        assert self.kode(snapshot, nama="ln") == ["PLN_20"]
+        assert self.kode(snapshot, nama="operator", kategori="Game") == []
+
+    def test_tanpa_filter_semua_produk(self, snapshot):
+        assert len(self.kode(snapshot)) == 5
+
+
+class TestImportIncremental:
+    """Test diff katalog dan riwayat harga"""
+
+    LAMA = {
+        "ML_86": {"nama": "Mobile Legends 86 Diamond", "harga": 20000, "kategori": "Game"},
+        "FF_140": {"nama": "Free Fire 140 Diamond", "harga": 19000, "kategori": "Game"},
+        "PLN_20": {"nama": "Token PLN 20.000", "harga": 21500, "kategori": "PLN"},
+    }
+    BARU = {
+        "ML_86": {"nama": "Mobile Legends 86 Diamond", "harga": 21000, "kategori": "Game"},
+        "FF_140": {"nama": "Free Fire 140 Diamonds", "harga": 19000, "kategori": "Game"},
+        "PULSA_10": {"nama": "Pulsa All Operator 10.000", "harga": 11500, "kategori": "Pulsa"},
+    }
+
+    def test_diff_katalog(self):
+        assert diff_katalog(self.LAMA, self.BARU) == {
+            "added": ["PULSA_10"],
+            "removed": ["PLN_20"],
+            "price_changed": ["ML_86"],
+            "updated": ["FF_140"],
+        }
+        assert not any(diff_katalog(self.BARU, self.BARU).values())
+
+    def test_riwayat_harga(self, tmp_path):
+        path = tmp_path / "price_history.ndjson"
+        catat_riwayat_harga(path, {}, self.LAMA, diff_katalog({}, self.LAMA), "2025-12-01 00:00:00")
+        jumlah = catat_riwayat_harga(path, self.LAMA, self.BARU, diff_katalog(self.LAMA, self.BARU), "2025-12-10 00:00:00")
+        assert jumlah == 3
+
+        assert harga_pada(path, "ML_86", "2025-12-05 12:00:00") == 20000
+        assert harga_pada(path, "ML_86", "2025-12-10 08:00:00") == 21000
+        assert harga_pada(path, "PLN_20", "2025-12-11 00:00:00") is None
+        assert harga_pada(path, "PULSA_10", "2025-12-05 00:00:00") is None
+
+    def test_tulis_katalog_atomic(self, tmp_path):
+        path = tmp_path / "products.json"
+        tulis_katalog(path, self.BARU)
+        assert json.loads(path.read_text(encoding='utf-8')) == self.BARU
+        assert [p.name for p in tmp_path.iterdir()] == ["products.json"]
@@ -0,0 +1,103 @@
+"""
+Unit tests untuk metrik request (gabungan antar worker dan format Prometheus)
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import time
+from metrics import Registry, waktu_komponen, _lokal
+
+
+def test_gabung_worker_dalam_grup_yang_sama(tmp_path):
+    grup = os.getpid()
+    # Snapshot worker lain dari master yang sama (file <master>-<pid worker>.json)
+    lain = Registry(folder="")
+    lain.catat("/api/laporan", "GET", "200", 0.003, {"storage": 0.001})
+    lain.catat("/api/laporan", "GET", "200", 0.2, {})
+    (tmp_path / f"{grup}-1.json").write_text(json.dumps(lain.data()))
+
+    worker = Registry(folder=str(tmp_path), grup=grup)
+    worker.catat("/api/laporan", "GET", "500", 0.004, {"storage": 0.002})
+
+    teks = worker.render()
+    assert 'kasir_http_requests_total{route="/api/laporan",method="GET",status="200"} 2' in teks
+    assert 'kasir_http_requests_total{route="/api/laporan",method="GET",status="500"} 1' in teks
+    assert 'kasir_http_request_duration_seconds_bucket{route="/api/laporan",method="GET",le="0.005"} 2' in teks
+    assert 'kasir_http_request_duration_seconds_bucket{route="/api/laporan",method="GET",le="0.1"} 2' in teks
+    assert 'kasir_http_request_duration_seconds_count{route="/api/laporan",method="GET"} 3' in teks
+    assert 'kasir_http_component_duration_seconds_count{route="/api/laporan",component="storage"} 2' in teks
+
+
+def test_file_master_mati_dihapus(tmp_path):
+    # pid yang hampir pasti tidak ada: sisa deployment sebelumnya
+    (tmp_path / "999999999-123.json").write_text('{"requests":[["/","GET","200",5]],"durasi":[],"komponen":[]}')
+    registry = Registry(folder=str(tmp_path), grup=os.getpid())
+    registry.catat("/", "GET", "200", 0.001, {})
+    teks = registry.render()
+    assert 'kasir_http_requests_total{route="/",method="GET",status="200"} 1' in teks
+    assert not (tmp_path / "999999999-123.json").exists()
+
+
+def test_waktu_komponen_hanya_dalam_request():
+    @waktu_komponen('storage')
+    def baca():
+        return tulis()
+
+    @waktu_komponen('storage')
+    def tulis():
+        return 42
+
+    # Di luar request: fungsi asli saja
+    assert baca() == 42
+    _lokal.komponen, _lokal.aktif = {}, False
+    try:
+        assert baca() == 42
+        # Panggilan bersarang tidak dihitung dua kali
+        assert list(_lokal.komponen) == ['storage']
+        assert _lokal.komponen['storage'] > 0
+    finally:
+        _lokal.komponen = None
+
+
+def test_waktu_komponen_generator_mengukur_iterasi():
+    @waktu_komponen('storage', iterasi=True)
+    def iter_lambat():
+        for i in range(3):
+            time.sleep(0.01)
+            yield i
+
+    _lokal.komponen, _lokal.aktif = {}, False
+    try:
+        hasil = iter_lambat()
+        # Generator dikonsumsi setelah fungsinya kembali, seperti body response streaming
+        assert list(hasil) == [0, 1, 2]
+        assert _lokal.komponen['storage'] >= 0.03
+    finally:
+        _lokal.komponen = None
+
+def test_worker_mati_dilipat_ke_satu_file(tmp_path):
+    grup = "kasir-prod"
+    mati = Registry(folder="")
+    mati.catat("/", "GET", "200", 0.001, {})
+    for pid in (999999998, 999999999):
+        (tmp_path / f"{grup}-{pid}.json").write_text(json.dumps(mati.data()))
+
+    registry = Registry(folder=str(tmp_path), grup=grup)
+    registry.catat("/", "GET", "200", 0.001, {})
+    for _ in range(2):
+        teks = registry.render()
+        assert 'kasir_http_requests_total{route="/",method="GET",status="200"} 3' in teks
+    assert sorted(p.name for p in tmp_path.glob("*.json")) == [
+        f"{grup}-{os.getpid()}.json", f"{grup}-arsip.json"
+    ]
+
+
+def test_grup_worker_uvicorn_memakai_pid_supervisor(monkeypatch):
+    monkeypatch.delitem(sys.modules, 'gunicorn', raising=False)
+    monkeypatch.setattr(multiprocessing, 'parent_process', lambda: object())
+    assert Registry(folder="").grup == os.getppid()
+    monkeypatch.setattr(multiprocessing, 'parent_process', lambda: None)
+    assert Registry(folder="").grup == os.getpid()
+    assert Registry(folder="", grup="kasir-prod").grup == "kasir-prod"
@@ -0,0 +1,82 @@
+"""
+Unit tests untuk tabel transaksi in-memory berbentuk kolom
+"""
+
+import json
+from tabel import TabelTransaksi, dari_epoch, ke_epoch
+
+
+def contoh(nama="Budi", tanggal="2025-12-01 10:00:00", operator="kasir1", harga=20000):
+    transaksi = {
+        "tanggal": tanggal,
+        "nama": nama,
+        "produk": "Mobile Legends 86 Diamond",
+        "kategori": "Game",
+        "harga": harga
+    }
+    if operator is not None:
+        transaksi["operator"] = operator
+    return transaksi
+
+
+class TestTabelTransaksi:
+    """Test penyimpanan kolom dan materialisasi dict"""
+
+    def test_epoch_bolak_balik(self):
+        for tanggal in ("1970-01-01 00:00:00", "2024-02-29 23:59:59", "2025-12-01 08:05:09", "1969-12-31 23:00:00"):
+            assert dari_epoch(ke_epoch(tanggal)) == tanggal
+
+    def test_materialisasi_sama_dengan_record_asli(self):
+        records = [
+            contoh(),
+            contoh("Ani", operator=None),  # transaksi dari CLI tanpa operator
+            dict(contoh("Citra"), operator=None),  # operator NULL dari sqlite
+            dict(contoh("Dedi"), catatan="promo"),  # field tambahan
+            contoh("Eka", tanggal="01/12/2025"),  # format tanggal lain
+            contoh("Gita", tanggal="2025-12- 1 10:00:00"),  # tidak zero-padded
+            contoh("Hadi", tanggal="2025-02-30 10:00:00"),  # tidak ada di kalender
+            contoh("Fajar", harga=1500.5),
+        ]
+        tabel = TabelTransaksi()
+        for seq, transaksi in enumerate(records, 1):
+            tabel.tambah(seq, transaksi)
+        hasil = [tabel.to_dict(i) for i in range(len(tabel))]
+        assert hasil == records
+        assert json.dumps(hasil[0]) == json.dumps(records[0])  # urutan field ikut terjaga
+        assert len(tabel.lainnya) == 5
+
+    def test_baris_view_dan_kamus(self):
+        tabel = TabelTransaksi()
+        for seq in range(1, 101):
+            tabel.tambah(seq * 2, contoh(f"Pembeli {seq % 3}", operator=None if seq % 2 else "pagi"))
+        baris = tabel.baris(1)
+        assert (baris.seq, baris.nama, baris.harga, baris.operator) == (4, "Pembeli 2", 20000, "pagi")
+        assert baris.tanggal == "2025-12-01 10:00:00"
+        assert not hasattr(baris, '__dict__')
+        # Nilai yang berulang hanya disimpan sekali
+        assert tabel.kamus_produk.nilai == ["Mobile Legends 86 Diamond"]
+        assert len(tabel.kamus_nama.nilai) == 3
+
+    def test_index(self):
+        tabel = TabelTransaksi()
+        tabel.tambah(1, contoh("Budi", tanggal="2025-12-01 10:00:00", operator="pagi"))
+        tabel.tambah(2, contoh("ANI", tanggal="2025-12-02 10:00:00", operator="siang"))
+        tabel.tambah(5, contoh("budi", tanggal="2025-12-03 10:00:00", operator="pagi"))
+        assert list(tabel.index_by_nama("BUDI")) == [0, 2]
+        assert list(tabel.index_by_operator("pagi")) == [0, 2]
+        assert list(tabel.index_by_operator("malam")) == []
+        assert tabel.index_by_tanggal("2025-12-02 00:00:00", "2025-12-03 10:00:00") == [1, 2]
+        assert tabel.index_setelah(2) == 2
+        assert tabel.index_setelah(4) == 2
+
+    def test_index_waktu_dengan_record_tidak_urut(self):
+        tabel = TabelTransaksi()
+        urutan_masuk = ["2025-12-01 10:00:00", "2025-12-01 12:00:00", "2025-12-01 11:00:00",
+                        "2025-11-30 09:00:00", "2025-12-01 12:00:00", "bukan tanggal"]
+        for seq, tanggal in enumerate(urutan_masuk, 1):
+            tabel.tambah(seq, contoh(f"P{seq}", tanggal=tanggal))
+        assert list(tabel.waktu_urut[1:]) == sorted(tabel.waktu_urut[1:])
+        assert tabel.index_by_tanggal("2025-12-01 11:00:00", "2025-12-01 12:00:00") == [1, 2, 4]
+        assert tabel.index_by_tanggal(sampai="2025-12-01 10:00:00") == [0, 3]
+        assert tabel.index_by_tanggal() == [0, 1, 2, 3, 4]
+        assert tabel.index_by_tanggal("2026-01-01 00:00:00") == []
@@ -3,8 +3,9 @@ Transaction module untuk mengelola transaksi
 """
 
 from datetime import datetime
-from config import DAFTAR_PRODUK, DATE_FORMAT
+from config import DATE_FORMAT
 from database import db
+from katalog import snapshot
 from utils import input_dengan_validasi
 
 
@@ -35,8 +36,9 @@ class Transaksi:
                 print("❌ Kode produk tidak boleh kosong!")
                 continue
             
-            if kode in DAFTAR_PRODUK:
-                produk = DAFTAR_PRODUK[kode]
+            daftar_produk = snapshot().produk
+            if kode in daftar_produk:
+                produk = daftar_produk[kode]
                 tanggal = datetime.now().strftime(DATE_FORMAT)
                 
                 # Buat data transaksi